@@ -11,56 +11,130 @@
 #
 ################################################################################
 
-import pygame, sys
+import pygame, sys, time, threading
+from array import array
 import pygame.freetype
 from pygame.locals import *
-import requests
-from bs4 import BeautifulSoup
 from settings import *
 import button_class as btn
+import glyph_class as gly
+import board_class as brd
+import puzzle_generator as gen
+import pool_class as pl
+import cache_class as ch
+import sudoku_core as core
+import stats_class as st
+import geometry_class as geo
+import budget_class as bud
+import fetch_class as ft
 
 
 class App:
 
-    def __init__(self):
+    def __init__(self, size=BOARD_SIZE, pool=True):
         pygame.init() # initializes pygame
         self.window = pygame.display.set_mode((WIDTH, HEIGHT)) # project window
         self.running = True # tells program when to stop running the project
         self.solving_board = False # used to show user their correct cells
         self.selected = None # the mouse position in relation to the Sudoku
         self.mouse_pos = None # the raw mouse position
+        # number of rows, columns, and digits on the Sudoku board, along with
+        # its lookup tables (see geometry_class.py)
+        self.size = size
+        self.geometry = geo.geometry(size)
+        # the cells are sized to fit the space set aside for the grid
+        self.cell_size = GRID_SIZE // size # size of each cell on the grid
+        self.grid_size = self.cell_size * size # size of the entire grid
         self.state = "CHANGE_DIFFICULTY" # the current game state
         self.cell_changed = False # tracks if a cell's contents have changed
         self.hints_enabled = True # enables or disables game hints
-        self.correct_cells = [] # list holding the correct cell indices
-        self.conflicting_cells = [] # list holding conflicting cell indices
         self.playing_buttons = [] # list holding the playing state buttons
         self.notes_button = None # notes button
+        self.auto_notes_button = None # auto notes button
         self.hints_button = None # hints button
         self.difficulty_buttons = [] # list holding the difficulty buttons
         self.finished_buttons = [] # list holding the finished state buttons
+        self.solving_buttons = [] # list holding the solving state buttons
         self.difficulty = None # holds the value of the desired difficulty level
+        # difficulty of the board being waited for in the WAITING state
+        self.waiting_difficulty = None
         self.notes_enabled = False # enables or disables Sudoku notes
+        # keeps the notes filled in with every cell's candidates
+        self.auto_notes = False
         self.start_time = None # start time of the game
         self.elapsed_time = None # currently elapsed time for the game
         self.end_time = None # finish time of the game
-        self.locked_cells = [] # list holding the locked Sudoku cells
-        self.font = pygame.font.SysFont("arial", CELL_SIZE//2) # text font
-        self.notes_font = pygame.font.SysFont("arial", CELL_SIZE//3) #notes font
-        self.sudoku_board = [] # holds the actual Sudoku board values
+        # The solve shown by the Solve button happens on a separate thread,
+        # which records every change it makes to the board in a trace. The
+        # trace is then replayed on the window at the chosen speed.
+        self.solve_thread = None # thread that solves the board
+        self.solve_result = None # what the solve thread's solve returned
+        # cancelled when the game quits, which stops every search that is
+        # still running (see solve_budget)
+        self.stop_token = bud.CancelToken()
+        self.solve_trace = None # changes made to the board by the solver
+        self.trace_pos = 0 # number of changes in the trace replayed so far
+        self.solve_speed = SOLVE_SPEED # index of the speed in SOLVE_SPEEDS
+        self.solve_credit = 0 # cells that are due to be filled in
+        # set by Skip to End: the rest of the solve is shown as soon as the
+        # solver has recorded it
+        self.skip_to_end = False
+        # every string drawn on the window is only rendered once (see
+        # glyph_class.py)
+        self.glyphs = gly.glyphs
+        # font of the prompt and time text (the same size on every board)
+        self.text_font = self.glyphs.font("arial", TEXT_FONT_SIZE)
+        self.font = self.glyphs.font("arial", self.cell_size//2) # cell font
+        # notes font (the notes are laid out like the cells of a subgrid)
+        self.notes_font = self.glyphs.font("arial",
+         self.cell_size//self.geometry.box_width)
+        # holds the actual Sudoku board values along with the locked, correct,
+        # and conflicting cells (see board_class.py)
+        self.sudoku_board = brd.Board(size=size)
         # Holds the finished Sudoku board values (initialized to 0's)
-        self.finished_board = [[0 for x in range(ROWS)] for x in range(COLS)]
-        # Holds the note values that the user enters throughout the game.
-        # Each note for each cell is initialized to False.
-        self.notes = [[[False for x in range(ROWS)] for y in range(COLS)]
-         for z in range(NUMS)]
+        self.finished_board = brd.Board(size=size)
+        # Holds the note values that the user enters throughout the game as
+        # one mask per cell (bit d - 1 is set if the note d is shown in the
+        # cell, the same layout the solver uses for candidates). Every cell
+        # starts out without any notes.
+        self.notes = [0] * self.geometry.cells
         self.load_buttons() # loads the game buttons
+        # saves every solved board (and its solution) to disk
+        self.puzzle_cache = ch.PuzzleCache()
+        # retrieves boards from websudoku (only used if PUZZLE_SOURCE is
+        # "websudoku"), keeping its connections open between boards
+        self.fetcher = ft.WebsudokuFetcher()
+        # keeps ready-to-play boards for every difficulty so that starting a
+        # new game doesn't have to wait for a board to be made (the pool can
+        # be left off, e.g. by benchmark.py, in which case new boards are made
+        # when they are needed)
+        self.puzzle_pool = pl.PuzzlePool(self.make_board)
+        if pool:
+            self.puzzle_pool.start()
         self.start_time = pygame.time.get_ticks() # starts the game time
         # clock used to cause a small delay when displaying the window
         self.clock = pygame.time.Clock()
+        # Only the parts of the window that changed since the last frame are
+        # redrawn. These variables remember what was last drawn on the window.
+        self.drawn_state = None # game state that the window was last drawn in
+        self.drawn_cells = {} # what was drawn in each cell (by position)
+        self.drawn_buttons = {} # how each button was drawn
+        self.drawn_time = None # time text that was drawn
+        self.time_rect = None # area of the window covered by the time text
+        self.dirty_rects = [] # areas of the window changed during this frame
+        # The grid lines never change, so they are drawn once onto their own
+        # (transparent) layer, which is blitted over any cell that is redrawn
+        self.grid_layer = self.make_grid_layer()
+        # area of the window covered by the grid (including its outline)
+        self.grid_area = self.grid_layer.get_bounding_rect()
+        # The parts of the board that don't change during a game (the grid,
+        # the locked cells, and their values) are drawn once per game onto a
+        # board layer for each background color (see board_layer)
+        self.board_layers = {}
+        self.drawn_layer = None # board layer that is currently on the window
         # used for testing the different boards
         # self.state = "PLAYING"
-        # self.sudoku_board = UNSOLVABLE_BOARD2
+        # self.sudoku_board = brd.Board(UNSOLVABLE_BOARD2)
         # self.reset_locked_cells()
         # self.difficulty = 1
         # print("Initializing program...")
@@ -82,6 +156,11 @@ class App:
                 self.playing_events() # check events
                 self.playing_update() # update game logic
                 self.playing_draw() # draw game board
+            if self.state == "SOLVING":
+                # Execute SOLVING state functions
+                self.solving_events() # check events
+                self.solving_update() # update game logic
+                self.solving_draw() # draw the board being solved
             if self.state == "FINISHED":
                 # Execute FINISHED state functions
                 self.finished_events() # check events
@@ -92,7 +171,19 @@ class App:
                 self.difficulty_events() # check events
                 self.difficulty_update() # update game logic
                 self.difficulty_draw() # draw select difficulty window
+            if self.state == "WAITING":
+                # Execute WAITING state functions
+                self.waiting_events() # check events
+                self.waiting_update() # wait for the board
+                self.waiting_draw() # draw the waiting text
+            # wait until it is time for the next frame (this keeps the program
+            # from using a whole CPU core while the user isn't doing anything)
+            self.clock.tick(FPS)
         # when the game is no longer running, close pygame and exit the program
+        self.stop_token.cancel() # stop any search that is still running
+        self.puzzle_pool.stop() # stop making new boards
+        self.fetcher.close() # close the connections to websudoku
+        self.puzzle_cache.close() # close the puzzle cache file
         pygame.quit() # quit pygame
         sys.exit() # exit the program
 ################################################################################
@@ -111,6 +202,9 @@ class App:
             # exit the program if the user wants to quit
             if event.type == pygame.QUIT:
                 self.running = False # this causes exiting code to be performed
+            # redraw the whole window if it was covered up or restored
+            if event.type == pygame.VIDEOEXPOSE:
+                self.drawn_state = None
             # check to see if the user has clicked on the window
             if event.type == pygame.MOUSEBUTTONDOWN:
                 selected = self.mouse_on_grid() # get the mouse position
@@ -119,8 +213,6 @@ class App:
                     # assign the position to the self.selected variable,
                     # otherwise just ignore the mouse press
                     self.selected = selected
-                    # reset conflicting cells (since the cell has now changed)
-                    self.conflicting_cells = []
                 else:
                     # make the variable empty since the mouse isn't on the board
                     self.selected = None
@@ -140,53 +232,55 @@ class App:
                                 # button's parameters and execute the click
                                 # function
                                 button.params = self.difficulty
+                                # starts the game (or waits for a board)
                                 button.click() # get_sudoku_board function
-                                self.state = "PLAYING" # update game state
-                                self.reset_time() # reset start time
                             else:
                                 button.click() # execute button function
             # check to see if the user typed on keyboard
             if event.type == pygame.KEYDOWN:
                 # make sure that the selected cell in inside of the Sudoku
                 # board and that it isn't locked (has a pre-determined value)
-                if self.selected != None and (list(self.selected)
-                 not in self.locked_cells):
-                    # make sure the key press was an integer
-                    if self.is_int(event.unicode):
-                        digit_val = int(event.unicode) # integer value of key
+                if self.selected != None and not self.sudoku_board.is_locked(
+                 self.selected[0], self.selected[1]):
+                    # make sure the key press was a value on the board
+                    digit_val = self.key_value(event.unicode)
+                    if digit_val is not None:
                         # check to see if notes are enabled
                         if self.notes_enabled:
                             # make sure key press was greater than 0
                             if (digit_val > 0):
-                                # assign the correct note value (indexes are
-                                # 0-based so subtract 1 from value to get it's
-                                # correct index)
-                                val = self.notes[self.selected[0]][
-                                 self.selected[1]][digit_val - 1]
-                                self.notes[self.selected[0]][self.selected[1]][
-                                 digit_val - 1] = not val
+                                # toggle the note's bit in the cell's mask
+                                # (bits are 0-based so subtract 1 from value
+                                # to get it's correct bit)
+                                self.notes[self.selected[0] * self.size +
+                                 self.selected[1]] ^= 1 << (digit_val - 1)
                                 # reset board value if a note was assigned to
                                 # the selecetd cell.
-                                self.sudoku_board[self.selected[0]][
-                                 self.selected[1]] = 0
+                                self.sudoku_board.set_cell(self.selected[0],
+                                 self.selected[1], 0)
                         else:
                             # notes weren't enabled, then assign the selected
                             # cell with the key press value or toggle value
-                            if self.sudoku_board[self.selected[0]][
-                             self.selected[1]] == digit_val:
-                                self.sudoku_board[self.selected[0]][
-                                 self.selected[1]] = 0
+                            # (the board updates its conflicting cells and
+                            # how many cells are correct as it does this)
+                            old_val = self.sudoku_board[self.selected[0]][
+                             self.selected[1]]
+                            if old_val == digit_val:
+                                self.sudoku_board.set_cell(self.selected[0],
+                                 self.selected[1], 0)
                             else:
-                                self.sudoku_board[self.selected[0]][
-                                 self.selected[1]] = digit_val
+                                self.sudoku_board.set_cell(self.selected[0],
+                                 self.selected[1], digit_val)
                             self.cell_changed = True # set flag to true
                             # remove any notes in the selected cell's
                             # surrounding row, column, and subgrid (remember to
                             # subtract 1 from value since indexes are 0-based)
                             if (digit_val > 0):
                                 self.remove_notes(self.selected, digit_val - 1)
-                            # update conflicting cells accordingly
-                            self.update_conflicting_cells(int(event.unicode))
+                            # give back the candidates that the old value was
+                            # blocking (if auto notes are enabled)
+                            if self.auto_notes and old_val != 0:
+                                self.restore_notes(self.selected, old_val)
 
 
     ############## playing_update function ###############
@@ -209,43 +303,100 @@ class App:
     ################ playing_draw function ###############
     # This function draws the elapsed time, the game board, and all of the
     # playing buttons to the screen.
+    # Only the cells, buttons, and time that changed since the last frame are
+    # redrawn.
     def playing_draw(self):
-        self.window.fill(DK_GRAY) # fill in window with dark gray color
+        self.begin_frame("PLAYING") # start a new frame
         self.update_time() # update elapsed time
-        self.display_time(ELAPSED_TIME_TEXT, self.elapsed_time) # display time
-        # iterate through each playing button and draw it on the window
-        for button in self.playing_buttons:
-            button.draw(self.window) # draw playing button
-        # fill game area in with white
-        pygame.draw.rect(self.window, WHITE, (GRID_POS[0], GRID_POS[1],
-         GRID_SIZE, GRID_SIZE))
-        # shade in the selected cell (if one is selected)
-        if self.selected:
-            # shade in the surrounding row, column, and subgrid
-            self.shade_surrounding_cells(self.window, self.selected, STEEL_BLUE)
-            self.shade_cells(self.window, [list(self.selected)], LIGHT_BLUE)
-            #self.shade_selected_cell(self.window, self.selected, LIGHT_BLUE)
-        # display any active notes on the Sudoku board
-        self.show_notes(self.window)
-        # shade in all of the locked cells
-        self.shade_cells(self.window, self.locked_cells, LOCKED_GRAY)
-        # shade in any conflicting cells (if hints are enabled)
-        if self.hints_enabled:
-            self.shade_cells(self.window, self.conflicting_cells, OLD_ROSE)
-        # if the backtracking algorithm is being run, shade in all the correct
-        # cells that the user has input to the Sudoku board
-        if self.solving_board :
-            self.shade_cells(self.window, self.correct_cells, GRAY)
-        # show all of the current Sudoku values on the screen
-        self.draw_numbers(self.window)
-        # draw the Sudoku board grid (the gameboard outline and internal boxes)
-        self.draw_grid(self.window)
-        pygame.display.update() # update pygame
+        self.draw_time(ELAPSED_TIME_TEXT, self.elapsed_time) # display time
+        self.draw_buttons(self.playing_buttons) # draw the playing buttons
+        # draw the Sudoku cells (the game area is white)
+        self.draw_cells(self.window, WHITE)
+        self.end_frame() # show the changes on the screen
         self.cell_changed = False # update variable to prevent an infinite loop
 ################################################################################
 
 
 
+############################# SOLVING STATE LOGIC ##############################
+
+    ############## solving_events function ###############
+    # This function keeps track of important events that occur during the
+    # SOLVING state. Such events include quitting the program, clicking on the
+    # speed buttons, or pressing the speed keys (+ and - change the speed and
+    # Enter skips to the end of the solve).
+    def solving_events(self):
+        # iterate through each pygame event
+        for event in pygame.event.get():
+            # exit the program if the user wants to quit
+            if event.type == pygame.QUIT:
+                self.running = False # this causes exiting code to be performed
+            # redraw the whole window if it was covered up or restored
+            if event.type == pygame.VIDEOEXPOSE:
+                self.drawn_state = None
+            # check to see if the user has clicked on the window
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                # iterate through each solving button
+                for button in self.solving_buttons:
+                    # check to see if the user clicked on a button
+                    if button.selected:
+                        button.click() # execute button function
+            # check to see if the user typed on keyboard
+            if event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS,
+                 pygame.K_KP_PLUS):
+                    self.change_solve_speed(1)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.change_solve_speed(-1)
+                elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                    self.skip_solve()
+
+
+    ############## solving_update function ###############
+    # This function replays as much of the solve as is due at the current
+    # speed (many cells per frame when the speed is high), and switches to the
+    # FINISHED state once the whole solve has been shown
+    def solving_update(self):
+        self.mouse_pos = pygame.mouse.get_pos() # get the mouse position
+        # iterate through solving buttons and update them accordingly
+        for button in self.solving_buttons:
+            button.update(self.mouse_pos) # update button
+        # check whether the solver is done before looking at the trace, so
+        # that the trace is known to be complete
+        solved = not self.solve_thread.is_alive()
+        # add the cells that are due since the last frame
+        self.solve_credit += (self.clock.get_time() / 1000 *
+         SOLVE_SPEEDS[self.solve_speed])
+        steps = int(self.solve_credit)
+        if self.skip_to_end:
+            # show everything the solver has recorded so far (the rest is
+            # shown on later frames, so the window never waits for it)
+            self.replay_steps(len(self.solve_trace))
+            self.solve_credit = 0
+        elif self.replay_steps(steps) < steps:
+            # the solver hasn't caught up, so don't let the steps pile up
+            self.solve_credit = 0
+        else:
+            self.solve_credit -= steps
+        if solved and self.trace_pos == len(self.solve_trace):
+            self.finish_solve()
+
+
+    ############### solving_draw function ################
+    # This function draws the elapsed time, the board being solved, and all of
+    # the solving buttons to the screen.
+    def solving_draw(self):
+        self.begin_frame("SOLVING") # start a new frame
+        self.update_time() # update elapsed time
+        self.draw_time(ELAPSED_TIME_TEXT, self.elapsed_time) # display time
+        self.draw_buttons(self.solving_buttons) # draw the solving buttons
+        # draw the Sudoku cells (the game area is white)
+        self.draw_cells(self.window, WHITE)
+        self.end_frame() # show the changes on the screen
+################################################################################
+
+
+
 ############################# FINISHED STATE LOGIC #############################
 
     ############## finished_events function ##############
@@ -258,6 +409,9 @@ class App:
             # exit the program if the user wants to quit
             if event.type == pygame.QUIT:
                 self.running = False # this causes exiting code to be performed
+            # redraw the whole window if it was covered up or restored
+            if event.type == pygame.VIDEOEXPOSE:
+                self.drawn_state = None
             # check to see if the user has clicked on the window
             if event.type == pygame.MOUSEBUTTONDOWN:
                 # iterate through each finished button
@@ -267,9 +421,8 @@ class App:
                         if button.text == "New Game":
                             # add in difficulty parameters
                             button.params = self.difficulty
+                            # starts the game (or waits for a board)
                             button.click() # get_sudoku_board function
-                            self.state = "PLAYING" # update game state
-                            self.reset_time() # reset starting time
                         elif button.text == "Change Difficulty":
                             self.state = "CHANGE_DIFFICULTY" # update game state
                             button.click() # change_difficulty function
@@ -289,22 +442,14 @@ class App:
     ############### finished_draw function ###############
     # This function draws the finish time, the completed Sudoku board, and all
     # of the finished buttons to the screen.
+    # Only the parts that changed since the last frame are redrawn.
     def finished_draw(self):
-        self.window.fill(DK_GRAY) # fill window in with dark gray color
-        self.display_time(TOTAL_TIME_TEXT, self.end_time) # display finish time
-        # iterate through each finished button
-        for button in self.finished_buttons:
-            button.draw(self.window) # draw button on window
-        # fill game area in with gray
-        pygame.draw.rect(self.window, GRAY, (GRID_POS[0], GRID_POS[1],
-         GRID_SIZE, GRID_SIZE))
-        # Shade locked cells
-        self.shade_cells(self.window, self.locked_cells, LOCKED_GRAY)
-        # show all of the current Sudoku values on the screen
-        self.draw_numbers(self.window)
-        # draw the Sudoku board grid (the gameboard outline and internal boxes)
-        self.draw_grid(self.window)
-        pygame.display.update() # update pygame
+        self.begin_frame("FINISHED") # start a new frame
+        self.draw_time(TOTAL_TIME_TEXT, self.end_time) # display finish time
+        self.draw_buttons(self.finished_buttons) # draw the finished buttons
+        # draw the Sudoku cells (the game area is gray)
+        self.draw_cells(self.window, GRAY)
+        self.end_frame() # show the changes on the screen
 ################################################################################
 
 
@@ -320,17 +465,19 @@ class App:
             # exit the program if the user wants to quit
             if event.type == pygame.QUIT:
                 self.running = False # this causes exiting code to be performed
+            # redraw the whole window if it was covered up or restored
+            if event.type == pygame.VIDEOEXPOSE:
+                self.drawn_state = None
             # check to see if the user has clicked on the window
             if event.type == pygame.MOUSEBUTTONDOWN:
                 # iterate through each difficulty button
                 for button in self.difficulty_buttons:
                     # check to see if the user clicked on a button
                     if button.selected:
-                        button.click() # get_sudoku_board function
-                        self.state = "PLAYING" # update the game state
                         # update difficulty variable with button parameters
                         self.difficulty = button.params
-                        self.reset_time() # reset start time
+                        # starts the game (or waits for a board)
+                        button.click() # get_sudoku_board function
 
 
     ############# difficulty_update function #############
@@ -345,21 +492,60 @@ class App:
 
     ############## difficulty_draw function ##############
     # This function draws the change difficulty promp text and all of the
-    # difficulty buttons to the screen.
+    # difficulty buttons to the screen. The prompt text never changes, so it is
+    # only drawn when the whole window is redrawn.
     def difficulty_draw(self):
-        self.window.fill(DK_GRAY) # fill  background in with dark gray color
-        font = self.font.render(PROMPT_TEXT, True, BLACK) # prompt text font
-        # get the center of the window
-        x = (WIDTH - font.get_width())//2
-        # Make sure to adjust the height coordinate to be closer towards the
-        # top of the window since we don't want to have the text displayed
-        # exactly in the center of the window.
-        y = CHANGE_BTN_DIFF
-        self.window.blit(font, (x, y)) # Blit prompt text to window
-        # iterate through each difficulty button
-        for button in self.difficulty_buttons:
-            button.draw(self.window) # draw button on window
-        pygame.display.update() # update pygame
+        if self.begin_frame("CHANGE_DIFFICULTY"):
+            # prompt text font
+            font = self.glyphs.render(self.text_font, PROMPT_TEXT, BLACK)
+            # get the center of the window
+            x = (WIDTH - font.get_width())//2
+            # Make sure to adjust the height coordinate to be closer towards the
+            # top of the window since we don't want to have the text displayed
+            # exactly in the center of the window.
+            y = CHANGE_BTN_DIFF
+            self.window.blit(font, (x, y)) # Blit prompt text to window
+        self.draw_buttons(self.difficulty_buttons) # draw difficulty buttons
+        self.end_frame() # show the changes on the screen
+################################################################################
+
+
+
+############################## WAITING STATE LOGIC #############################
+
+    ############### waiting_events function ##############
+    # This function keeps track of important events that occur during the
+    # WAITING state (quitting the program and uncovering the window)
+    def waiting_events(self):
+        for event in pygame.event.get():
+            # exit the program if the user wants to quit
+            if event.type == pygame.QUIT:
+                self.running = False # this causes exiting code to be performed
+            # redraw the whole window if it was covered up or restored
+            if event.type == pygame.VIDEOEXPOSE:
+                self.drawn_state = None
+
+
+    ############### waiting_update function ##############
+    # This function starts the game as soon as the puzzle pool has a board of
+    # the difficulty that is being waited for
+    def waiting_update(self):
+        board = self.puzzle_pool.get(self.waiting_difficulty, wait=False)
+        if board is not None:
+            self.start_game(board)
+
+
+    ################ waiting_draw function ###############
+    # This function draws the waiting text, which never changes, so it is only
+    # drawn when the whole window is redrawn
+    def waiting_draw(self):
+        if self.begin_frame("WAITING"):
+            font = self.glyphs.render(self.text_font, WAITING_TEXT, BLACK)
+            # center the text on the window
+            x = (WIDTH - font.get_width())//2
+            y = (HEIGHT - font.get_height())//2
+            self.window.blit(font, (x, y)) # Blit waiting text to window
+        self.end_frame() # show the changes on the screen
 ################################################################################
 
 
@@ -396,12 +582,15 @@ class App:
 
 
     ################ display_time function ###############
-    # this function displays the given time and text on the window
+    # this function displays the given time and text on the window and returns
+    # the area of the window that it covers
     def display_time(self, text, time):
         # Show elapsed time on the window
-        font = self.font.render(text, True, BLACK) # font for the text
-        # font for the given time string
-        time_font = self.font.render(self.convert_time(time), True, BLACK)
+        # font for the text
+        font = self.glyphs.render(self.text_font, text, BLACK)
+        # font for the given time string (this changes every second, so it
+        # isn't kept in the glyph cache)
+        time_font = self.text_font.render(self.convert_time(time), True, BLACK)
         # get the center of the window
         font_width = font.get_width()
         x = (WIDTH - font_width - BTN_PADDING - time_font.get_width())//2
@@ -409,9 +598,10 @@ class App:
         # top of the window since we don't want to have the text displayed
         # exactly in the center of the window.
         y = (GRID_POS[1] - BTN_HEIGHT)
-        self.window.blit(font, (x, y)) # blit text to window
+        rect = self.window.blit(font, (x, y)) # blit text to window
         x += font_width + BTN_PADDING # add in padding between text and time
-        self.window.blit(time_font, (x,y)) # blit time string to window
+        # blit time string to window
+        return rect.union(self.window.blit(time_font, (x,y)))
 ################################################################################
 
 
@@ -462,6 +652,15 @@ class App:
          background_color = OLD_ROSE, text = "Hints")
         # add hints button to playing_buttons list
         self.playing_buttons.append(self.hints_button)
+        # Auto Notes button (toggles whether the notes are kept filled in with
+        # the candidates of every cell). I swap this button's colors when the
+        # user clicks it, just like the hints button.
+        self.auto_notes_button = btn.Button(GRID_POS[0],
+         (GRID_POS[1] - BTN_HEIGHT - BTN_PADDING), BTN_WIDTH, BTN_HEIGHT,
+         function = self.toggle_auto_notes, color = OLD_ROSE,
+         background_color = GREEN, text = "Auto Notes")
+        # add auto notes button to playing_buttons list
+        self.playing_buttons.append(self.auto_notes_button)
 
         # CHANGE_DIFFICULTY state buttons
         # Easy button (creates an easy difficulty game)
@@ -485,6 +684,25 @@ class App:
          BTN_HEIGHT, function = self.get_sudoku_board, params = "4",
          color = WARM_RED, background_color = LIGHT_BLUE, text = "Evil"))
 
+        # SOLVING state buttons
+        # Slower button (slows down the solve that is being shown)
+        self.solving_buttons.append(btn.Button(FIN_BTN_DIFF,
+         (GRID_POS[1] + GRID_SIZE + (2 * BTN_PADDING)), BTN_WIDTH, BTN_HEIGHT,
+         function = self.change_solve_speed, params = -1, color = MUSTARD,
+         background_color = LIGHT_BLUE, text = "Slower"))
+        # Faster button (speeds up the solve that is being shown)
+        self.solving_buttons.append(btn.Button((FIN_BTN_DIFF + BTN_WIDTH +
+         BTN_PADDING), (GRID_POS[1] + GRID_SIZE + (2 * BTN_PADDING)),
+         BTN_WIDTH, BTN_HEIGHT, function = self.change_solve_speed,
+         params = 1, color = GREEN, background_color = LIGHT_BLUE,
+         text = "Faster"))
+        # Skip to End button (shows the solved board right away)
+        self.solving_buttons.append(btn.Button(
+         (FIN_BTN_DIFF + (2 * BTN_WIDTH) + (2 * BTN_PADDING)),
+         (GRID_POS[1] + GRID_SIZE + (2 * BTN_PADDING)), BIG_BTN_WIDTH,
+         BTN_HEIGHT, function = self.skip_solve, color = SKY_BLUE,
+         background_color = LIGHT_BLUE, text = "Skip to End"))
+
         # FINISHED state buttons
         # New Game button (starts a new game with the current difficulty)
         self.finished_buttons.append(btn.Button(FIN_BTN_DIFF,
@@ -519,9 +737,9 @@ class App:
 
 
     ################ toggle_hints function ###############
-    # This function swaps the hints_button's primary and background colors,
-    # updates the hints_enabled variable, and resets any conflicting cells
-    # (since the grid is no longer selected)
+    # This function swaps the hints_button's primary and background colors and
+    # updates the hints_enabled variable (conflicting cells are only shown
+    # while hints are enabled)
     def toggle_hints(self):
         temp_color = self.hints_button.color # temporary variable
         # swap the button's color with its background color
@@ -530,7 +748,6 @@ class App:
         self.hints_button.background_color = temp_color
         # toggle hints_enabled value
         self.hints_enabled = not self.hints_enabled
-        self.conflicting_cells = [] # reset conflicting cells
 
 
     ################ toggle_notes function ###############
@@ -545,37 +762,92 @@ class App:
         self.notes_enabled = not self.notes_enabled
 
 
+    ############## toggle_auto_notes function ############
+    # This function swaps the auto_notes_button's primary and background
+    # colors and updates the auto_notes variable. Turning auto notes on fills
+    # in the notes of every empty cell with its candidates.
+    def toggle_auto_notes(self):
+        temp_color = self.auto_notes_button.color # temporary variable
+        # swap the button's color with its background color
+        self.auto_notes_button.color = self.auto_notes_button.background_color
+        # change the button's background color to equal its original color
+        self.auto_notes_button.background_color = temp_color
+        # toggle auto_notes value
+        self.auto_notes = not self.auto_notes
+        if self.auto_notes:
+            self.fill_notes()
+
+
     ################# show_solve function ################
     # This function prepares the Sudoku board to be solved by removing any
-    # incorrect cells, adding the user's correct cells into a seperate list,
-    # and resetting the conflicting cells and the notes lists. It then solves
-    # the Sudoku by using the show_backtrack function. Once that is done, the
-    # function then empties the pygame events queue, changes the game state to
-    # FINISHED, updates the appropriate variables, and finally calculates the
-    # total time that it took to solve the Sudoku.
+    # incorrect cells (which also clears every conflict), adding the user's
+    # correct cells into a seperate list, and resetting the notes lists. It
+    # then starts
+    # solving the Sudoku by using the show_backtrack function and switches to
+    # the SOLVING state, which shows the solve (see finish_solve for what
+    # happens once it is done).
     def show_solve(self):
         # Prepare the board to be solved:
         # Removing all of the incorrect cells from the sudoku_board prevents the
         # backtracking algorithm from trying to solve an un-solvable Sudoku
         # board.
         self.remove_incorrect_cells()
-        # Add cells (if any) with the correct values to the correct_cells list
+        # Add cells (if any) with the correct values to the correct cells
         # (this excludes any locked cells)
         self.add_correct_cells()
-        self.conflicting_cells = [] # reset conflicting_cells list
         # reset notes list
-        self.notes = [[[False for x in range(ROWS)] for y in range(COLS)]
-         for z in range(NUMS)]
+        self.notes = [0] * self.geometry.cells
         self.solving_board  = True # update variable
-        self.show_backtrack(self.sudoku_board) # solve the Sudoku
+        self.selected = None # the board can't be edited while it is solved
+        self.show_backtrack(self.sudoku_board) # start solving the Sudoku
+        self.state = "SOLVING" # change game state
+
+
+    ################ finish_solve function ###############
+    # This function is called once the whole solve has been shown. It empties
+    # the pygame events queue, changes the game state to FINISHED, updates the
+    # appropriate variables, and finally calculates the total time that it
+    # took to solve the Sudoku.
+    def finish_solve(self):
         pygame.event.clear() # clear events
         self.state = "FINISHED" # change game state
+        if not self.solve_result:
+            # the solve ran out of time (None) or didn't find a solution
+            # (False), so show the known solution instead
+            if self.solve_result is None:
+                print("The solve took too long, so the solution is shown "
+                 "instead")
+            else:
+                print("The solver couldn't find a solution, so the known "
+                 "solution is shown instead")
+            for x in range(self.size):
+                for y in range(self.size):
+                    self.sudoku_board[x][y] = self.finished_board[x][y]
         # reset variables that are no longer needed
         self.solving_board  = False
-        self.selected = None
+        # the replay changed the board's cells directly, so recount them
+        self.sudoku_board.track()
+        self.solve_thread = None
+        self.solve_trace = None
         # get the end time for solving the sudoku
         self.update_time() # update the elapsed time one final time
         self.end_time = self.elapsed_time # assign the total end time
+
+
+    ############ change_solve_speed function #############
+    # This function makes the solve that is being shown faster (a positive
+    # change) or slower (a negative change)
+    def change_solve_speed(self, change):
+        self.solve_speed = min(max(self.solve_speed + change, 0),
+         len(SOLVE_SPEEDS) - 1)
+
+
+    ################ skip_solve function #################
+    # This function skips to the end of the solve that is being shown (the
+    # solve is finished by solving_update, since waiting for the solver here
+    # could freeze the window for up to SOLVE_TIME_LIMIT seconds)
+    def skip_solve(self):
+        self.skip_to_end = True
 ################################################################################
 
 
@@ -587,64 +859,66 @@ class App:
     # subgrid. This function is called whenever the user inputs a value into
     # the Sudoku board.
     def remove_notes(self, pos, val):
-        # remove all notes from cell
-        for num in range(NUMS):
-            self.notes[pos[0]][pos[1]][num] = False
-        # remove note from row
-        for i in range(ROWS):
-            if self.notes[pos[0]][i][val]:
-                self.notes[pos[0]][i][val] = False
-        # remove note from column
-        for i in range(COLS):
-            if self.notes[i][pos[1]][val]:
-                self.notes[i][pos[1]][val] = False
-        # remove note from subgrid
-        # start at the beginning of the subgrid
-        row_delta = pos[0] - (pos[0] % SUBGRID_WIDTH)
-        col_delta = pos[1] - (pos[1] % SUBGRID_HEIGHT)
-        # iterate through subgrid and remove the note from each cell (if it
-        # is present in that cell)
-        for row in range(row_delta, row_delta + SUBGRID_WIDTH, 1):
-            for col in range(col_delta, col_delta + SUBGRID_HEIGHT, 1):
-                if self.notes[row][col][val]:
-                    self.notes[row][col][val] = False
-
-
-    ################# show_notes function ################
-    # This function displays all of the notes on the window
-    def show_notes(self, window):
-        # iterate through each cell and display any notes that are present
-        for x, row in enumerate(self.notes):
-            for y, col in enumerate(row):
-                for note_index, val in enumerate(col):
-                    # only display enabled notes (value will be True)
-                    if val != False:
-                        # When displaying values to the window, remember to swap
-                        # the x and y order to show them in the correct place.
-                        pos = [(y * CELL_SIZE) + GRID_POS[0],
-                         (x * CELL_SIZE) + GRID_POS[1]]
-                        # draw the note on the window (since indices are
-                        # 0-based, make sure to add 1 to the note_index to get
-                        # the actual number that should be displayed)
-                        self.draw_note(window, note_index + 1, OFF_BLACK, pos)
+        i = pos[0] * self.size + pos[1]
+        self.notes[i] = 0 # remove all notes from cell
+        # remove note from every cell in the surrounding row, column, and
+        # subgrid (the cell's peers)
+        keep = ~(1 << val)
+        for p in self.geometry.peers[i]:
+            self.notes[p] &= keep
+
+
+    ################ fill_notes function #################
+    # This function replaces the notes of every cell with its candidates (the
+    # digits that aren't used in its row, column, or subgrid yet)
+    def fill_notes(self):
+        self.notes = core.candidate_masks(self.sudoku_board)
+
+
+    ############### restore_notes function ##############
+    # This function is called (when auto notes are enabled) after a value was
+    # removed from a cell. The cell gets its candidates back as notes, and the
+    # removed value is added back to the notes of every peer that it fits.
+    def restore_notes(self, pos, val):
+        board = self.sudoku_board
+        i = pos[0] * self.size + pos[1]
+        self.notes[i] = core.candidate_mask(board, pos[0], pos[1])
+        bit = 1 << (val - 1)
+        for p in self.geometry.peers[i]:
+            if core.candidate_mask(board, self.geometry.row_of[p],
+             self.geometry.col_of[p]) & bit:
+                self.notes[p] |= bit
+
 
     ################# draw_note function #################
     # This function draws an individual note on the window. Each note can be
-    # in 1 of 9 possible positions, so I make sure to add in the appropriate
-    # offset value depending on which note was passed into the function
+    # in 1 of 9 possible positions (on a 9x9 board), so I make sure to add in
+    # the appropriate offset value depending on which note was passed into the
+    # function
     def draw_note(self, window, val, color, pos):
-        font = self.notes_font.render(str(val), True, color) # note font
-        # divide the cell into 9 pieces (9 possible values)
-        width = (CELL_SIZE - font.get_width())//9
-        height = (CELL_SIZE - font.get_height())//9
+        # note font
+        font = self.glyphs.render(self.notes_font, SYMBOLS[val], color)
+        across = self.geometry.box_width # notes in each row of the cell
+        down = self.geometry.box_height # rows of notes in the cell
+        # divide the cell into one piece per possible value (laid out like the
+        # cells of a subgrid, so 3x3 pieces on a 9x9 board)
+        width = self.cell_size//across
+        height = self.cell_size//down
         # add the correct offset to the value being displayed
-        # Each cell has three values displayed in the top (1-3), three values
-        # displayed in the middle (4-6), and three values displayed in the
-        # bottom (7-9). I also subtract 1 from the value and perform a modulus
-        # of three on that value so that I can position the note value
-        # accordingly within those groupings of three (left, middle, or right)
-        pos[0] += width + ((CELL_SIZE//3) * ((val-1)%3)) + NOTES_PADDING
-        pos[1] += height + ((CELL_SIZE//3) * (((val-1)//3)%3)) - NOTES_PADDING
+        # On a 9x9 board, each cell has three values displayed in the top
+        # (1-3), three values displayed in the middle (4-6), and three values
+        # displayed in the bottom (7-9). I also subtract 1 from the value and
+        # perform a modulus of three on that value so that I can position the
+        # note value accordingly within those groupings of three (left, middle,
+        # or right). Bigger boards lay their notes out the same way, with as
+        # many notes in each row as a subgrid has columns. Each note is
+        # centered in its piece.
+        x = width * ((val-1)%across) + (width - font.get_width())//2
+        y = height * ((val-1)//across) + (height - font.get_height())//2
+        # keep the note inside of the cell (the glyphs can be a little bigger
+        # than their piece), since only the cell is redrawn when it changes
+        pos[0] += min(max(x, 0), self.cell_size - font.get_width())
+        pos[1] += min(max(y, 0), self.cell_size - font.get_height())
         window.blit(font, pos) # blit the number to the window
 ################################################################################
 
@@ -656,13 +930,12 @@ class App:
     # This function resets all of the locked cells. It is called whenever a
     # new game is created.
     def reset_locked_cells(self):
-        self.locked_cells = [] # reset locked_cells list
-        self.correct_cells = [] # reset correct_cells list
-        # Initialize the locked cells from the given sudoku_board
-        for x, row in enumerate(self.sudoku_board):
-            for y, val in enumerate(row):
-                if val != 0:
-                    self.locked_cells.append([x, y]) # add index to list
+        # Lock every filled in cell of the given sudoku_board (this also resets
+        # the correct cells)
+        self.sudoku_board.lock_givens()
+        # draw the new game's board layer now, so the first frame is fast
+        self.board_layers = {}
+        self.board_layer(WHITE)
 
 
     ########### remove_incorrect_cells function ##########
@@ -676,131 +949,57 @@ class App:
         for x, row in enumerate(self.sudoku_board):
             for y, val in enumerate(row):
                 if val != self.finished_board[x][y]:
-                    self.sudoku_board[x][y] = 0 # remove incorrect value
+                    # remove incorrect value
+                    self.sudoku_board.set_cell(x, y, 0)
 
 
     ############# add_correct_cells function #############
-    # This function adds any correct cells into the correct_cells list. I use
-    # the correct_cells list when solving the board to show the user the correct
-    # cells that they input into the Sudoku board.
+    # This function marks any correct cells on the sudoku_board. I use the
+    # correct cells when solving the board to show the user the correct cells
+    # that they input into the Sudoku board.
     def add_correct_cells(self):
-        # iterate through the sudoku_board and add correct indexes into the list
+        # iterate through the sudoku_board and mark the correct cells
         for x, row in enumerate(self.sudoku_board):
             for y, val in enumerate(row):
-                if [x, y] not in self.locked_cells and val != 0:
-                    self.correct_cells.append([x, y]) # add index to list
-
-    ######### update_conflicting_cells function ##########
-    # This function updates any conflicting cells that are present when the
-    # user inputs a value into the Sudoku board.
-    def update_conflicting_cells(self, value):
-        self.conflicting_cells = [] # reset conflicting cells
-        # make sure value is greater than 0
-        if value != 0:
-            # check row for conflicting value
-            for i in range(ROWS):
-                # add conflicting cell index to list (if a conflict exists)
-                if self.sudoku_board[self.selected[0]][i] == value and [
-                 self.selected[0], self.selected[1]] != [self.selected[0], i]:
-                    self.conflicting_cells.append([self.selected[0], i])
-            # check column for conflicting values
-            for i in range(COLS):
-                # add conflicting cell index to list (if a conflict exists)
-                if self.sudoku_board[i][self.selected[1]] == value and [
-                 self.selected[0], self.selected[1]] != [i, self.selected[1]]:
-                    self.conflicting_cells.append([i, self.selected[1]])
-            # start at the first cell in the subgrid
-            row_delta = self.selected[0] - (self.selected[0] % SUBGRID_WIDTH)
-            col_delta = self.selected[1] - (self.selected[1] % SUBGRID_HEIGHT)
-            # iterate through subgrid and check for conflicting values
-            for row in range(row_delta, row_delta + SUBGRID_WIDTH, 1):
-                for col in range(col_delta, col_delta + SUBGRID_HEIGHT, 1):
-                    # add conflicting cell index to list (if a conflict exists)
-                    if self.sudoku_board[row][col] == value and [
-                     self.selected[0], self.selected[1]] != [row, col]:
-                        self.conflicting_cells.append([row, col])
-        else:
-            # if the value is zero, then do nothing
-            pass
-
-
-    ################ shade_cells function ################
-    # This function shades a list of cells in with a given color
-    def shade_cells(self, window, cellList, color):
-        # iterate through each index in the list
-        for cell in cellList:
-            # fill the cell in with the given color
-            pygame.draw.rect(window, color, ((cell[1]*CELL_SIZE) + GRID_POS[0],
-             (cell[0] * CELL_SIZE) + GRID_POS[1], CELL_SIZE, CELL_SIZE))
-
-
-    ############ shade_selected_cell function ############
-    # This function shades the selected cell in with a given color
-    def shade_selected_cell(self, window, pos, color):
-        # When highlighting the selected cell, remember to swap
-        # the x and y position values to highlight the correct cell.
-        # fill the cell in with the given color
-        pygame.draw.rect(window, color, ((pos[1] * CELL_SIZE) + GRID_POS[0],
-         (pos[0] * CELL_SIZE) + GRID_POS[1], CELL_SIZE, CELL_SIZE))
-
-
-    ########## shade_surrounding_cells function ##########
-    # This function shades in the surrounding row, column, and subgrid  of the
-    # selected cell with a given color
-    def shade_surrounding_cells(self, window, pos, color):
-        # shade in the surrounding row
-        for i in range(ROWS):
-            # remember to swap the x and y position values to get the position
-            # of the correct cell.
-            pygame.draw.rect(window, color, ((i * CELL_SIZE) + GRID_POS[0],
-             (pos[0] * CELL_SIZE) + GRID_POS[1], CELL_SIZE, CELL_SIZE))
-        # shade the surrounding column
-        for i in range(COLS):
-            # remember to swap the x and y position values to get the position
-            # of the correct cell.
-            pygame.draw.rect(window, color, ((pos[1] * CELL_SIZE) + GRID_POS[0],
-             (i * CELL_SIZE) + GRID_POS[1], CELL_SIZE, CELL_SIZE))
-        # start at the first cell in the subgrid
-        row_delta = pos[1] - (pos[1] % SUBGRID_WIDTH)
-        col_delta = pos[0] - (pos[0] % SUBGRID_HEIGHT)
-        # iterate through subgrid and shade each cell
-        for row in range(row_delta, row_delta + SUBGRID_WIDTH, 1):
-            for col in range(col_delta, col_delta + SUBGRID_HEIGHT, 1):
-                # remember to swap the x and y position values to get the
-                # position of the correct cell.
-                pygame.draw.rect(window, color, ((row * CELL_SIZE)+ GRID_POS[0],
-                 (col * CELL_SIZE) + GRID_POS[1], CELL_SIZE, CELL_SIZE))
+                if not self.sudoku_board.is_locked(x, y) and val != 0:
+                    self.sudoku_board.add_correct(x, y) # mark cell
+
+
+    ############# surrounding_cells function ############
+    # This function returns the surrounding row, column, and subgrid of the
+    # selected cell as a bitset (bit row * size + col is set for each cell)
+    def surrounding_cells(self, pos):
+        i = pos[0] * self.size + pos[1]
+        cells = 1 << i
+        # add every cell in the surrounding row, column, and subgrid (the
+        # cell's peers)
+        for p in self.geometry.peers[i]:
+            cells |= 1 << p
+        return cells
 ################################################################################
 
 
 
 ############################### HELPER FUNCTIONS ###############################
 
-    ################## is_int function ###################
-    # This simple function just tries to convert a character value into an
-    # integer. If it is successful, the function returns True, otherwise it
-    # returns False.
-    def is_int(self, char_val):
-        try:
-            int(char_val) # try to convert character into an integer
-            return True # if successful, return True
-        except:
-            return False # if unsuccessful, return False
+    ################# key_value function #################
+    # This simple function converts a typed character into a value on the
+    # board (0-9, or a letter for the values above 9 on bigger boards). If the
+    # character isn't a value on the board, the function returns None.
+    def key_value(self, char_val):
+        val = geo.SYMBOL_VALUES.get(char_val.upper())
+        if val is None or val > self.size:
+            return None
+        return val
 
 
     ################ is_finished function ################
-    # This function checks to see if the Sudoku board is finished. It achieves
-    # this by comparing the sudoku_board values to the finished_board values.
+    # This function checks to see if the Sudoku board is finished. The
+    # sudoku_board keeps count of how many of its cells match the
+    # finished_board as they are changed, so this doesn't have to compare the
+    # boards.
     def is_finished(self):
-        # iterate through the sudoku_board
-        for x, row in enumerate(self.sudoku_board):
-            for y, val in enumerate(row):
-                # make sure that the values are identical
-                if val != self.finished_board[x][y]:
-                    return False # if they are not then return False
-        # the end of the array has been reached, so that means that both of
-        # them are identical (return True to signal that the board is finished)
-        return True
+        return self.sudoku_board.is_solved()
 
 
     ############### mouse_on_grid function ###############
@@ -809,165 +1008,380 @@ class App:
     def mouse_on_grid(self):
         if self.mouse_pos[0] < GRID_POS[0] or self.mouse_pos[1] < GRID_POS[1]:
             return False
-        if self.mouse_pos[0] > (GRID_POS[0] + GRID_SIZE) or self.mouse_pos[1]> (
-         GRID_POS[1] + GRID_SIZE):
+        if self.mouse_pos[0] >= (GRID_POS[0] + self.grid_size) or \
+         self.mouse_pos[1] >= (GRID_POS[1] + self.grid_size):
             return False
         # The only remaining option is that the user clicked inside the
         # sudoku_board. Remember that when using a mouse, the result is flipped
         # with respect to the sudoku_board (the y value is given first and then
         # the x value), so to get the right sudoku_board index, simply return
         # in the correct format.
-        return ((self.mouse_pos[1] - GRID_POS[1])//CELL_SIZE,
-         (self.mouse_pos[0] - GRID_POS[0])//CELL_SIZE)
+        return ((self.mouse_pos[1] - GRID_POS[1])//self.cell_size,
+         (self.mouse_pos[0] - GRID_POS[0])//self.cell_size)
 
 
     ############### is_solvable function ###############
-    # This function makes sure that the Sudoku board is solvable by making sure
-    # that there are no conflicts between the locked cells. This function is
-    # called right after a Sudoku board is created to make sure that it is
+    # This function makes sure that the Sudoku board is solvable. This function
+    # is called right after a Sudoku board is created to make sure that it is
     # solvable. This prevents the backtracking algorithm from running into any
-    # issues when trying to solve the Sudoku recursively.
+    # issues when trying to solve the Sudoku. sudoku_core.precheck rejects
+    # conflicts between the locked cells while it loads the board, and then
+    # looks for deeper contradictions (e.g. a cell that no digit fits), which
+    # takes microseconds for most unsolvable boards.
     def is_solvable(self, board):
-        for cell in self.locked_cells:
-            if self.conflict_detected(cell[0], cell[1],
-             board[cell[0]][cell[1]], board):
-                return False
-        # The end of the list has been reached and no conflicts have been
-        # detected (return True).
-        return True
+        return core.precheck(board)
 ################################################################################
 
 
 
 ############################### DRAWING FUNCTIONS ##############################
 
-    ################ draw_numbers function ###############
-    # This function draws each Sudoku value on the window
-    def draw_numbers(self, window):
-        # iterate through the Sudoku board
-        for x, row in enumerate(self.sudoku_board):
-            for y, num in enumerate(row):
-                # make sure that the value is not 0
-                if num != 0:
-                    # When displaying values to the window, remember to swap
-                    # the x and y order to show them in the correct place.
-                    pos = [(y * CELL_SIZE) + GRID_POS[0],
-                     (x * CELL_SIZE) + GRID_POS[1]]
-                    # select the appripriate color for the number (locked cells
-                    # will always have black numbers)
-                    if [x, y] in self.locked_cells or not self.hints_enabled:
-                        color = BLACK
+    ################ begin_frame function ################
+    # This function starts a new frame. The whole window is redrawn whenever
+    # the game state changes (or the window needs it); otherwise only the parts
+    # that change during the frame are redrawn. It returns True if the whole
+    # window is being redrawn.
+    def begin_frame(self, state):
+        self.dirty_rects = [] # nothing has changed yet
+        if self.drawn_state == state:
+            return False
+        # forget everything that was drawn so that it all gets drawn again
+        self.drawn_state = state
+        self.drawn_cells = {}
+        self.drawn_layer = None
+        self.drawn_buttons = {}
+        self.drawn_time = None
+        self.time_rect = None
+        self.window.fill(DK_GRAY) # fill in window with dark gray color
+        self.dirty_rects.append(self.window.get_rect())
+        return True
+
+
+    ################# end_frame function #################
+    # This function shows the parts of the window that changed during the
+    # frame on the screen (nothing is sent to the screen if nothing changed)
+    def end_frame(self):
+        if self.dirty_rects:
+            pygame.display.update(self.dirty_rects) # update pygame
+
+
+    ################ draw_buttons function ###############
+    # This function draws every button in the list whose look has changed
+    # since it was last drawn (e.g. the mouse moved over it)
+    def draw_buttons(self, buttons):
+        for button in buttons:
+            look = (button.selected, button.color, button.background_color)
+            if self.drawn_buttons.get(button) != look:
+                self.drawn_buttons[button] = look
+                button.draw(self.window) # draw button on window
+                self.dirty_rects.append(button.rect)
+
+
+    ################# draw_time function #################
+    # This function draws the given text and time if they are different from
+    # what is currently shown (the time only changes once per second)
+    def draw_time(self, text, time):
+        shown = (text, self.convert_time(time))
+        if self.drawn_time == shown:
+            return
+        self.drawn_time = shown
+        # erase the old time text
+        if self.time_rect:
+            self.window.fill(DK_GRAY, self.time_rect)
+            self.dirty_rects.append(self.time_rect)
+        self.time_rect = self.display_time(text, time)
+        self.dirty_rects.append(self.time_rect)
+
+
+    ################# draw_cells function ################
+    # This function redraws every Sudoku cell whose contents or shading have
+    # changed since it was last drawn, on top of the given background color.
+    # When a new board layer is needed (a new game, or a different
+    # background), the whole layer is blitted first and only the cells that
+    # differ from it are drawn on top.
+    def draw_cells(self, window, background):
+        layer, layer_cells = self.board_layer(background)
+        if self.drawn_layer is not layer:
+            self.drawn_layer = layer
+            window.blit(layer, self.grid_area, self.grid_area)
+            self.drawn_cells = dict(layer_cells)
+            self.dirty_rects.append(self.grid_area)
+        # the surrounding row, column, and subgrid of the selected cell
+        surrounding = self.surrounding_cells(self.selected) if \
+         self.selected else 0
+        for x in range(self.size):
+            for y in range(self.size):
+                cell = self.cell_state(x, y, background, surrounding)
+                if self.drawn_cells.get((x, y)) != cell:
+                    self.drawn_cells[(x, y)] = cell
+                    if layer_cells[(x, y)] == cell:
+                        # the cell looks just like it does on the board layer
+                        rect = self.cell_rect(x, y)
+                        window.blit(layer, rect, rect)
                     else:
-                        # if hints are enabled, then make the color blue if the
-                        # value is correct and red if it is incorrect
-                        color = BLUE if (self.finished_board[x][y]==
-                         num) else RED
-                    # blit the value to the window
-                    self.draw_text(window, str(num), color, pos)
+                        rect = self.draw_cell(window, x, y, cell)
+                        # put back the grid lines that were covered up
+                        window.blit(self.grid_layer, rect, rect)
+                    self.dirty_rects.append(rect)
+
+
+    ################# cell_state function ################
+    # This function returns everything that is drawn in a cell: its shading,
+    # its value, the color of its value, and its notes. Cells are shaded (from
+    # most to least important) as correct cells while the board is being
+    # solved, conflicting cells (if hints are enabled), locked cells, the
+    # selected cell, and the selected cell's row, column, and subgrid.
+    def cell_state(self, x, y, background, surrounding):
+        board = self.sudoku_board
+        i = x * self.size + y
+        bit = 1 << i # the cell's bit in the board's cell sets
+        if self.solving_board and board.correct & bit:
+            shade = GRAY
+        elif self.hints_enabled and board.conflicting & bit:
+            shade = OLD_ROSE
+        elif board.locked & bit:
+            shade = LOCKED_GRAY
+        elif self.selected == (x, y):
+            shade = LIGHT_BLUE
+        elif surrounding & bit:
+            shade = STEEL_BLUE
+        else:
+            shade = background
+        num = board.cells[i]
+        color = None
+        # select the appripriate color for the number (locked cells will
+        # always have black numbers)
+        if num != 0:
+            if board.locked & bit or not self.hints_enabled:
+                color = BLACK
+            else:
+                # if hints are enabled, then make the color blue if the value
+                # is correct and red if it is incorrect
+                color = BLUE if self.finished_board[x][y] == num else RED
+        return (shade, num, color, self.notes[i])
+
+
+    ################# draw_cell function #################
+    # This function draws a single cell (as returned by cell_state) and returns
+    # the area of the window that it covers
+    def draw_cell(self, window, x, y, cell):
+        shade, num, color, notes = cell
+        rect = self.cell_rect(x, y)
+        pygame.draw.rect(window, shade, rect) # fill the cell in
+        # draw each note in the cell's mask on the window (since bits are
+        # 0-based, make sure to add 1 to the bit to get the actual number that
+        # should be displayed)
+        while notes:
+            bit = notes & -notes # lowest note left in the mask
+            notes ^= bit
+            self.draw_note(window, bit.bit_length(), OFF_BLACK,
+             list(rect.topleft))
+        if num != 0:
+            self.draw_text(window, SYMBOLS[num], color, list(rect.topleft))
+        return rect
+
+
+    ################# cell_rect function #################
+    # This function returns the area of the window covered by a single cell
+    def cell_rect(self, x, y):
+        # When displaying values to the window, remember to swap the x and y
+        # order to show them in the correct place.
+        return pygame.Rect((y * self.cell_size) + GRID_POS[0],
+         (x * self.cell_size) + GRID_POS[1], self.cell_size, self.cell_size)
 
 
     ################# draw_text function
     # This function draws a single Sudoku value on the screen in a specified
     # color.
     def draw_text(self, window, text, color, pos):
-        font = self.font.render(text, True, color) # value font
+        font = self.glyphs.render(self.font, text, color) # value font
         # get the center of the cell
-        pos[0] += (CELL_SIZE - font.get_width())//2
-        pos[1] += (CELL_SIZE - font.get_height())//2
+        pos[0] += (self.cell_size - font.get_width())//2
+        pos[1] += (self.cell_size - font.get_height())//2
         window.blit(font, pos) # blit value to window
 
 
+    ################ board_layer function ################
+    # This function returns the board layer for the given background color
+    # (drawing it the first time it is asked for during a game) along with
+    # what is drawn in each of its cells. The board layer shows the empty
+    # board with its locked cells, their values, and the grid lines.
+    def board_layer(self, background):
+        if background not in self.board_layers:
+            layer = pygame.Surface((WIDTH, HEIGHT)) # same size as the window
+            layer.fill(DK_GRAY) # the grid outline reaches past the grid
+            cells = {} # what is drawn in each cell of the layer
+            for x in range(self.size):
+                for y in range(self.size):
+                    if self.sudoku_board.is_locked(x, y):
+                        cell = (LOCKED_GRAY, self.sudoku_board[x][y], BLACK, 0)
+                    else:
+                        cell = (background, 0, None, 0)
+                    cells[(x, y)] = cell
+                    self.draw_cell(layer, x, y, cell)
+            self.draw_grid(layer)
+            self.board_layers[background] = (layer, cells)
+        return self.board_layers[background]
+
+
+    ############## make_grid_layer function ##############
+    # This function draws the grid lines on their own layer. Everything but
+    # the lines is transparent, so the layer can be blitted over a cell to put
+    # its lines back.
+    def make_grid_layer(self):
+        layer = pygame.Surface((WIDTH, HEIGHT)) # same size as the window
+        layer.fill(WHITE)
+        layer.set_colorkey(WHITE) # white parts of the layer are transparent
+        self.draw_grid(layer)
+        return layer
+
+
     ################# draw_grid function #################
     # This function draws the Sudoku board grid (the gameboard outline and
-    # the internal boxes that make up a Sudoku board)
+    # the internal boxes that make up a Sudoku board). The lines between the
+    # subgrids are drawn thicker.
     def draw_grid(self, window):
+        size = self.grid_size
         # blit the outline of the game board to the window
-        pygame.draw.rect(window, BLACK, (GRID_POS[0], GRID_POS[1], GRID_SIZE,
-         GRID_SIZE), 2)
+        pygame.draw.rect(window, BLACK, (GRID_POS[0], GRID_POS[1], size,
+         size), 2)
         # blit all of the internal lines on the Sudoku board to the window
-        for x in range(ROWS):
+        for x in range(self.size):
             # draw vertical lines on the window
             pygame.draw.line(window, BLACK,
-             (GRID_POS[0] + (x * CELL_SIZE), GRID_POS[1]),
-             (GRID_POS[0] + (x * CELL_SIZE), GRID_POS[1] + 450),
-             (1 if (x % 3 != 0) else 2))
+             (GRID_POS[0] + (x * self.cell_size), GRID_POS[1]),
+             (GRID_POS[0] + (x * self.cell_size), GRID_POS[1] + size),
+             (1 if (x % self.geometry.box_width != 0) else 2))
             # draw horizontal lines on the window
             pygame.draw.line(window, BLACK,
-             (GRID_POS[0], GRID_POS[1] + (x * CELL_SIZE)),
-             (GRID_POS[0] + 450, GRID_POS[1] + (x * CELL_SIZE)),
-             (1 if (x % 3 != 0) else 2))
+             (GRID_POS[0], GRID_POS[1] + (x * self.cell_size)),
+             (GRID_POS[0] + size, GRID_POS[1] + (x * self.cell_size)),
+             (1 if (x % self.geometry.box_height != 0) else 2))
 ################################################################################
 
 
 
 ############################ BOARD-RELATED FUNCTIONS ###########################
 
-    ########## populate_finished_board function ##########
-    # This function resets the finished board and copies over the new Sudoku
-    # board values. It is called whenever a new game is created so that the
-    # finished board can be updated accordingly.
-    def populate_finished_board(self, board):
-        # reset finished board array
-        self.finished_board = [[0 for x in range(ROWS)] for x in range(COLS)]
-        # perform a deep copy of the sudoku_board to the finished_board
-        for x, row in enumerate(self.sudoku_board):
-            for y, val in enumerate(row):
-                # copy each index value so they can be altered independently
-                self.finished_board[x][y] = self.sudoku_board[x][y]
-        # solve the board and update the finished_board accordingly
-        if self.backtrack(self.finished_board):
-            print(f"Solution: {self.finished_board}")
-        else:
-            print("Error solving board")
+    ############ fetch_websudoku_board function ##########
+    # This function retrieves a Sudoku board from https://nine.websudoku.com
+    # (or the page WEBSUDOKU_URL points to) with the fetcher, which times out,
+    # retries with backoff, and fetches a few boards at once (see
+    # fetch_class.py). It raises FetchError if the website can't be reached.
+    def fetch_websudoku_board(self, difficulty, stats=None):
+        return brd.Board(self.fetcher.fetch(difficulty, stats))
+
+
+    ################ make_board function #################
+    # This function makes a new (puzzle, solution) pair for the given
+    # difficulty. By default the puzzle is made by the offline puzzle generator
+    # (see puzzle_generator.py); setting PUZZLE_SOURCE to "websudoku" in
+    # settings.py retrieves the puzzle from https://nine.websudoku.com instead
+    # (for 9x9 boards, the only size the website has).
+    # It runs on the puzzle pool's background thread, so it doesn't touch any
+    # of the game's variables. It returns None if the board wasn't solvable.
+    # If STATS_LOG is set in settings.py, the time spent in each phase and the
+    # solver's counters are appended to it as one line of JSON.
+    def make_board(self, difficulty):
+        start = time.perf_counter()
+        # only collect statistics if there is somewhere to write them
+        stats = st.SolveStats() if STATS_LOG else None
+        board = self.make_puzzle(difficulty, stats)
+        if board is not None and board[2]:
+            # save the solution so the board isn't solved again if it is
+            # fetched again
+            self.puzzle_cache.store(board[0], board[1],
+             time.perf_counter() - start, difficulty)
+        if stats is not None:
+            stats.write(STATS_LOG, source=PUZZLE_SOURCE, difficulty=difficulty,
+             made=board is not None)
+        return board and board[:2]
+
+
+    ################ make_puzzle function ################
+    # This function does the work of make_board. It returns (puzzle, solution,
+    # solved), where solved is True if the solution had to be found by solving
+    # a fetched board (so it is worth saving in the puzzle cache), or None if
+    # the board wasn't solvable. A fetched board is looked up in the cache
+    # before it is solved. The time spent in each phase is added to the
+    # optional stats.
+    def make_puzzle(self, difficulty, stats=None):
+        if PUZZLE_SOURCE != "websudoku" or self.size != WEBSUDOKU_SIZE:
+            return self.generate_puzzle(difficulty, stats)
+        try:
+            puzzle = self.fetch_websudoku_board(difficulty, stats).to_rows()
+        except ft.FetchError as error:
+            # the fetcher has already retried, so make the board offline
+            # instead of trying again right away
+            print(f"Error retrieving a board from websudoku: {error}")
+            return self.generate_puzzle(difficulty, stats)
+        # skip solving the board if it has been solved before
+        solution = self.puzzle_cache.lookup(puzzle)
+        if solution:
+            return puzzle, solution, False
+        solution = [row[:] for row in puzzle]
+        # rule out most bad boards without searching
+        if not core.precheck(puzzle):
+            print("The board can't be solved... Let me try to get a different "
+             "board")
+            return None
+        # make sure that the board has exactly one solution (otherwise the
+        # hints could mark a valid value as incorrect). A board that takes too
+        # long to check is skipped, so it can't hold up the puzzle pool.
+        result, solutions, nodes = core.check_uniqueness(puzzle, stats=stats,
+         budget=self.solve_budget())
+        if result != core.UNIQUE or not core.solve(solution, stats=stats,
+         budget=self.solve_budget()):
+            print("An error occured... Let me try to get a different board")
+            return None
+        return puzzle, solution, True
+
+
+    ############## generate_puzzle function #############
+    # This function generates a puzzle with a unique solution for the
+    # difficulty offline, and returns it the same way as make_puzzle (None
+    # means the game is quitting, which stops the generator). Generated boards
+    # aren't cached, since the generator makes the solution along with the
+    # puzzle.
+    def generate_puzzle(self, difficulty, stats=None):
+        began = time.perf_counter()
+        board = gen.generate(difficulty, size=self.size, token=self.stop_token)
+        if stats is not None:
+            stats.add_phase("generate", began)
+        return board and board + (False,)
 
 
     ############## get_sudoku_board function #############
-    # This function performs some web scraping in order to retrieve a Sudoku
-    # board from https://nine.websudoku.com.
+    # This function starts a new game by taking a ready-to-play board (and its
+    # solution) for the given difficulty from the puzzle pool. If the pool is
+    # still empty (e.g. right after the program starts), the game waits (in
+    # the WAITING state) for the pool to make one, since making it here could
+    # freeze the window for a long time (e.g. an Evil 25x25 board).
     def get_sudoku_board(self, difficulty):
-        # difficulty needs to be parsed in as a string with one digit. 1-4
-        html_doc = requests.get("https://nine.websudoku.com/?level={}".format(
-         difficulty)).content
-        # parse the contents of the webpage into a readable/retrievable format
-        soup = BeautifulSoup(html_doc, "html.parser")
-        # id names that are used in the website
-        ids = ['f00', 'f01', 'f02', 'f03', 'f04', 'f05', 'f06', 'f07', 'f08',
-               'f10', 'f11', 'f12', 'f13', 'f14', 'f15', 'f16', 'f17', 'f18',
-               'f20', 'f21', 'f22', 'f23', 'f24', 'f25', 'f26', 'f27', 'f28',
-               'f30', 'f31', 'f32', 'f33', 'f34', 'f35', 'f36', 'f37', 'f38',
-               'f40', 'f41', 'f42', 'f43', 'f44', 'f45', 'f46', 'f47', 'f48',
-               'f50', 'f51', 'f52', 'f53', 'f54', 'f55', 'f56', 'f57', 'f58',
-               'f60', 'f61', 'f62', 'f63', 'f64', 'f65', 'f66', 'f67', 'f68',
-               'f70', 'f71', 'f72', 'f73', 'f74', 'f75', 'f76', 'f77', 'f78',
-               'f80', 'f81', 'f82', 'f83', 'f84', 'f85', 'f86', 'f87', 'f88']
-        data = [] # empty list which will be populated with the index values
-        # iterate through the list of ids
-        for id_val in ids:
-            data.append(soup.find('input', id=id_val)) # add id_value into list
-        # initialize and empty board to have all 0 values
-        board = [[0 for x in range(ROWS)] for i in range(COLS)]
-        # substitute in non-zero id values into the board
-        for index, cell in enumerate(data):
-            try:
-                # parse the cell value into the board
-                board[index//ROWS][index % COLS] = int(cell['value'])
-            except:
-                pass
-        self.sudoku_board =  board # assign the new sudoku board
-        self.reset_locked_cells() # reset the locked_cells list
-        # reset the notes list
-        self.notes = [[[False for x in range(ROWS)] for y in range(COLS)]
-         for z in range(NUMS)]
-        # reset conflicting cells
-        self.conflicting_cells = []
-        # make sure that the board is is_solvable
-        if self.is_solvable(self.sudoku_board):
-            # reinitialize the finished board and solve it
-            self.populate_finished_board(self.sudoku_board)
-        else:
-            # if the board isn't solvable, then retrieve another Sudoku
-            print("An error occured... Let me try to get a different board")
-            self.get_sudoku_board(difficulty)
+        board = self.puzzle_pool.get(difficulty, wait=False)
+        if board is None:
+            self.waiting_difficulty = difficulty
+            self.state = "WAITING" # update game state
+            return
+        self.start_game(board)
+
+
+    ################ start_game function #################
+    # This function starts a new game of the given (puzzle, solution) pair
+    def start_game(self, board):
+        puzzle, solution = board
+        self.sudoku_board = brd.Board(puzzle) # assign the new sudoku board
+        self.reset_locked_cells() # reset the locked cells
+        # the solution was already found when the board was made
+        self.finished_board = brd.Board(solution)
+        # keep track of the conflicting and correct cells from now on
+        self.sudoku_board.track(self.finished_board)
+        # reset the notes list (or fill it in if auto notes are enabled)
+        self.notes = [0] * self.geometry.cells
+        if self.auto_notes:
+            self.fill_notes()
+        self.state = "PLAYING" # update game state
+        self.reset_time() # reset start time
 
 ################################################################################
 
@@ -978,172 +1392,95 @@ class App:
     ################# check_row function #################
     # This function checks to see if there are any conflicting row values
     def check_row(self, row, col, value, board):
-        # check row for conflicting value
-        for i in range(ROWS):
-            # make sure to skip the index that is being checked against.
-            if i != col:
-                # check if the values are equal to each other (make sure
-                # that only non-zero values are compared together)
-                if value != 0 and board[row][i] == value:
-                    # return True if the value appears in the same column
-                    return True
-        # no conflicting value detected, return False
-        return False
+        return core.check_row(row, col, value, board)
 
 
     ################# check_col function #################
     # This function checks to see if there are any conflicting column values
     def check_col(self, row, col, value, board):
-        # check column for conflicting values
-        for i in range(COLS):
-            # make sure to skip the index that is being checked against.
-            if i != row:
-                # check if the values are equal to each other (make sure
-                # that only non-zero values are compared together)
-                if value != 0 and board[i][col] == value :
-                    # return True if the value appears in the same column
-                    return True
-        # no conflicting value detected, return False
-        return False
+        return core.check_col(row, col, value, board)
 
 
     ############### check_subgrid function ###############
     # This function checks to see if there are any conflicting subgrid values
     def check_subgrid(self, row, col, value, board):
-        # start at the first cell in the subgrid
-        row_delta = row - (row % SUBGRID_WIDTH)
-        col_delta = col - (col % SUBGRID_HEIGHT)
-        # iterate through subgrid and check for conflicting values
-        for r in range(row_delta, row_delta + SUBGRID_WIDTH, 1):
-            for c in range(col_delta, col_delta + SUBGRID_HEIGHT, 1):
-                # make sure to skip the index that is being checked against.
-                if r != row and c != col:
-                    # check if the values are equal to each other (make sure
-                    # that only non-zero values are compared together)
-                    if value != 0 and board[r][c] == value:
-                        # return True if the value appears in the same subgrid
-                        return True
-        # no conflicting value detected, return False
-        return False
+        return core.check_subgrid(row, col, value, board)
 
 
     ############# conflict_detected function #############
     # This function checks to see if there are any conflicting values in the
     # surrounding row, column, or subgrid. If there are any conflicting values,
     # the function returns True. If there aren't any conflicting values, then
-    # the function returns False.
+    # the function returns False. The actual checks live in sudoku_core.py so
+    # that they can be used without pygame.
     def conflict_detected(self, row, col, value, board):
-        # check row, column, and subgrid for conflicting values
-        return (self.check_row(row, col, value, board)
-         or self.check_col(row, col, value, board)
-         or self.check_subgrid(row, col, value, board))
+        return core.conflict_detected(row, col, value, board)
 
 
     ################ backtrack function ################
-    # This function performs the backtracking algorithm in order to solve the
-    # provided Sudoku board. The backtracking algorithm iterates as far as
-    # possible down one path until the board can no longer be solved. When it
-    # reaches this point, it then backtracks to a previous point and then takes
-    # a different path. This process repeats itself until the algorithm is able
-    # to sucessfully complete the board.
-    def backtrack(self, board):
-        # iterate through the whole board
-        for row in range(ROWS):
-            for col in range(COLS):
-                # make sure the space is empty
-                if board[row][col] == 0:
-                    # space is empty; plug in values (1-9) and try to solve
-                    # the board.
-                    for val in range (1, NUMS + 1, 1):
-                        # make sure there are no conflicting values
-                        if not self.conflict_detected(row, col, val, board):
-                            board[row][col] = val # assign value to board
-                            # iterate to next spot and continue trying to solve
-                            # the Sudoku if no conflicts are detected
-                            if self.backtrack(board):
-                                return True
-                            else :
-                                # reset cell (backtrack) and try the next value
-                                board[row][col] = 0;
-                    # not possible to solve Sudoku using this iteration, so
-                    # return false
-                    return False
-        # The end of the Sudoku has been reached, make sure that there are no
-        # conflicts on the whole Sudoku and return the result.
-        solved_successfully = True
-        for row in range(ROWS):
-            for col in range(COLS):
-                # check if there is a conflict
-                if self.conflict_detected(row, col, board[row][col], board):
-                    solved_successfully = False
-                    break
-        return solved_successfully
+    # This function solves the provided Sudoku board in place using the
+    # solving engine (see sudoku_core.py and solver_class.py). The engine
+    # keeps a mask of the digits used in every row, column, and subgrid, fills
+    # in any cells that only have one possible value, and then tries the
+    # remaining values of the cell with the fewest options, backtracking
+    # whenever a path can no longer be solved. The optional backend picks
+    # another solving engine (SOLVER_BACKEND in settings.py by default), and
+    # the optional budget limits the search (see budget_class.py).
+    def backtrack(self, board, backend=None, budget=None):
+        return core.solve(board, backend=backend, budget=budget)
 
 
     ############## show_backtrack function #############
-    # This function performs the backtracking algorithm in order to solve the
-    # provided Sudoku board. The only difference between this function and the
-    # backtrack function above is that the show_backtrack function shows the
-    # Sudoku being solved along the way. I could have added this functionality
-    # to the backtrack function, but I figured that it didn't really make
-    # sense to make that function more inefficient than it needed to be. This is
-    # more of a niche case where I wanted to see firsthand what was going on
-    # while the backtracking algorithm was at work. The backtracking algorithm
-    # iterates as far as possible down one path until the board can no longer be
-    # solved. When it reaches this point, it then backtracks to a previous point
-    # and then takes a different path. This process repeats itself until the
-    # algorithm is able to sucessfully complete the board.
+    # This function solves the provided Sudoku board exactly like the backtrack
+    # function above, except that the solve can be shown to the user. The
+    # board is solved on a separate thread (which only takes milliseconds), and
+    # every value that the solving engine assigns to (or removes from) the
+    # board is recorded in a trace. The board itself is only changed as the
+    # trace is replayed (see replay_steps), so the search never has to wait
+    # for the window to be drawn.
     def show_backtrack(self, board):
-        # I get pygame's events in this function to allow the user to quit the
-        # program while the show_backtrack function is running. I also do this
-        # because if you fail to make a call to the event queue for too long,
-        # the system may decide your program has locked up, which causes the
-        # program to become unresponsive. This prevents that from happening.
-        # iterate through each pygame event
-        for event in pygame.event.get():
-            # exit the program if the user wants to quit
-            if event.type == pygame.QUIT:
-                pygame.quit() # quit pygame
-                sys.exit() # exit the program
-        # iterate through the whole board
-        for row in range(ROWS):
-            for col in range(COLS):
-                # check if space is empty
-                if board[row][col] == 0:
-                    # space is empty; plug in values (1-9) and try to solve
-                    # the board.
-                    for val in range (1, NUMS + 1, 1):
-                        # make sure there are no conflicting values
-                        if not self.conflict_detected(row, col, val, board):
-                            board[row][col] = val # assign value to board
-                            self.playing_draw() # draw the playing state screen
-                            self.clock.tick(30) # perform a small delay
-                            # iterate to next spot and continue trying to solve
-                            # the Sudoku if no conflicts are detected
-                            if self.show_backtrack(board):
-                                return True
-                            else :
-                                # reset cell (backtrack) and try the next value
-                                board[row][col] = 0;
-                    # not possible to solve sudoku using this iteration, so
-                    # return false
-                    return False
-                else:
-                    # space isn't empty, so check to see if there are any
-                    # conflicts so far.
-                    if self.conflict_detected(row, col, board[row][col], board):
-                        return False
-        # The end of the board has been reached, make sure that there are no
-        # conflicts on the whole board and return the result.
-        solved_successfully = True
-        for row in range(ROWS):
-            for col in range(COLS):
-                # check if there is a conflict
-                if self.conflict_detected(row, col, board[row][col], board):
-                    solved_successfully = False
-                    break
-            if not solved_successfully:
-                break
-        return solved_successfully
+        self.solve_trace = array("I")
+        self.trace_pos = 0
+        self.solve_credit = 0
+        self.skip_to_end = False
+        self.solve_result = None
+        self.solve_thread = threading.Thread(target=self.trace_solve,
+         args=(board.to_rows(),), name="solver", daemon=True)
+        self.solve_thread.start()
+
+
+    ################ trace_solve function ##############
+    # This function runs on the solve thread. It solves the board (within the
+    # game's solve budget), recording every change in the solve trace.
+    def trace_solve(self, board):
+        self.solve_result = core.solve_trace(board, self.solve_trace,
+         budget=self.solve_budget())
+
+
+    ################ solve_budget function #############
+    # This function returns a new budget for a search started by the game. The
+    # search is stopped after SOLVE_TIME_LIMIT seconds, or as soon as the game
+    # quits.
+    def solve_budget(self):
+        return bud.SearchBudget(seconds=SOLVE_TIME_LIMIT, token=self.stop_token)
+
+
+    ################ replay_steps function #############
+    # This function applies the next changes in the solve trace to the
+    # sudoku_board until the given number of values have been assigned (or
+    # the solver hasn't recorded any more changes yet). It returns the number
+    # of values that were assigned.
+    def replay_steps(self, steps):
+        trace = self.solve_trace
+        end = len(trace)
+        assigned = 0
+        while assigned < steps and self.trace_pos < end:
+            row, col, val = core.decode_step(trace[self.trace_pos], self.size)
+            self.sudoku_board[row][col] = val
+            self.trace_pos += 1
+            # resetting a cell happens instantly (only assignments are shown)
+            if val != 0:
+                assigned += 1
+        return assigned
 
 ################################################################################
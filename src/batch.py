@@ -0,0 +1,442 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   batch.py
+#
+# Description: This file contains the command-line batch mode. It reads
+#              puzzles (one line each, with one character per cell and 0 or .
+#              for the empty cells) from a file or stdin, solves them one at
+#              a time, and streams the solutions back out line by line. When
+#              it is done it reports the throughput and the per-puzzle latency
+#              percentiles.
+#              Puzzles can be spread across several processes with --workers,
+#              in which case they are handed out in chunks and the solutions
+#              are still written in the same order as the input. With
+#              --symmetry, puzzles that are equivalent to one that has already
+#              been solved (see symmetry_class.py) are answered by transforming
+#              the earlier solution instead of being solved again. With
+#              --uniqueness, each puzzle is checked for a unique solution
+#              instead, and a line like "unique 12" (the result followed by
+#              the number of search nodes) is written for every puzzle. With
+#              --stats-log, the search counters and phase timings of every
+#              puzzle (see stats_class.py) are written to a JSON-lines file.
+#              --backend picks the solving engine (see sudoku_core.py).
+#              --max-nodes and --timeout limit the search of each puzzle (see
+#              budget_class.py), so a single bad puzzle can't stall a worker;
+#              "timeout" is written for a puzzle whose search ran out.
+#              The size of each puzzle is taken from the length of its line
+#              (81 characters for 9x9, 256 for 16x16, and 625 for 25x25,
+#              where values above 9 are written as letters), so one input can
+#              mix puzzles of different sizes.
+#
+#              Usage: python batch.py [puzzles.txt] [-o solutions.txt]
+#                      [--workers N] [--chunk-size N] [--symmetry]
+#                      [--uniqueness] [--stats-log stats.jsonl]
+#                      [--backend backtracking|dlx] [--max-nodes N]
+#                      [--timeout SECONDS]
+#
+################################################################################
+
+import os, sys, math, time, json, argparse
+import multiprocessing
+from collections import deque
+from settings import *
+import sudoku_core as core
+import symmetry_class as sym
+import geometry_class as geo
+import stats_class as st
+import budget_class as bud
+
+
+# Line written in place of a solution when a puzzle can't be solved
+UNSOLVABLE_TEXT = "unsolvable"
+# Line written in place of a solution when a line isn't a valid puzzle
+INVALID_TEXT = "invalid"
+# Line written in place of a solution when a puzzle's search ran out of budget
+TIMEOUT_TEXT = "timeout"
+# Number of puzzles handed to a worker process at a time
+DEFAULT_CHUNK_SIZE = 256
+# Number of chunks each worker can have queued up before the results are read
+CHUNKS_PER_WORKER = 4
+
+# Symmetry index used by solve_line in this process (None when --symmetry
+# isn't being used)
+symmetry_index = None
+
+
+class LatencyHistogram:
+
+    # Every bucket covers a 2% wider range of latencies than the one before it,
+    # so percentiles are accurate to within 2% while the memory used stays the
+    # same no matter how many puzzles are recorded.
+    GROWTH = 1.02
+
+    def __init__(self):
+        self.buckets = {} # number of samples recorded in each bucket
+        self.count = 0 # total number of samples
+        self.total = 0.0 # sum of every sample (in seconds)
+
+
+    ################### record function ##################
+    # This function adds a single latency (in seconds) to the histogram
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        index = int(math.log(micros, self.GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+
+
+    ################# percentile function ################
+    # This function returns the latency (in seconds) below which the given
+    # percentage of the samples fall
+    def percentile(self, percent):
+        if self.count == 0:
+            return 0.0
+        target = math.ceil(self.count * percent / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                # report the upper edge of the bucket
+                return self.GROWTH ** (index + 1) / 1e6
+        return self.GROWTH ** (max(self.buckets) + 1) / 1e6
+
+
+
+############################### PARSING FUNCTIONS ##############################
+
+############### parse_puzzle function ################
+# This function converts a puzzle line (81 characters for a 9x9 puzzle) into a
+# board (a list of rows). It returns None if the line isn't a valid puzzle.
+def parse_puzzle(line):
+    return geo.text_to_rows(line.strip())
+
+
+############### format_board function ################
+# This function converts a board back into a single line
+def format_board(board):
+    return geo.board_text(board)
+
+
+############### read_puzzles function ################
+# This function yields each puzzle line from the given stream, skipping blank
+# lines and comments (lines starting with #). Lines are read one at a time so
+# the whole file never has to fit in memory.
+def read_puzzles(stream):
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+################ load_corpus function ################
+# This function returns the boards (lists of rows) of the named corpus, or of
+# the corpus file at the given path (see the corpora folder)
+def load_corpus(corpus):
+    path = corpus if os.path.isfile(corpus) else os.path.join(CORPORA_DIR,
+     corpus + ".txt")
+    boards = []
+    with open(path) as source:
+        for number, line in enumerate(read_puzzles(source), 1):
+            board = geo.text_to_rows(line)
+            if board is None:
+                raise ValueError("{}: puzzle {} isn't a valid board".format(
+                 path, number))
+            boards.append(board)
+    return boards
+################################################################################
+
+
+
+################################ BATCH SOLVING #################################
+
+################ solve_line function ################
+# This function solves a single puzzle line. It returns the line that should
+# be written out along with whether the puzzle was "solved", "unsolvable",
+# "invalid", or "timeout". The optional stats (a SolveStats object) are filled
+# in with the parse and solve phases. The backend picks the solving engine,
+# and limits (see new_budget) limit the search.
+def solve_line(line, stats=None, backend=None, limits=None):
+    board = parse_line(line, stats)
+    if board is None:
+        return INVALID_TEXT, "invalid"
+    budget = new_budget(limits)
+    if symmetry_index is not None:
+        solved = symmetry_index.solve(board, stats, backend, budget)
+    else:
+        solved = core.solve(board, stats=stats, backend=backend, budget=budget)
+    if solved:
+        return format_board(board), "solved"
+    if solved is None:
+        return TIMEOUT_TEXT, "timeout"
+    return UNSOLVABLE_TEXT, "unsolvable"
+
+
+################ check_line function ################
+# This function checks whether a single puzzle line has a unique solution. It
+# returns the line that should be written out (the result and the number of
+# search nodes) along with the result ("unique", "multiple", "none",
+# "timeout", or "invalid"). The optional stats are filled in with the parse
+# and validate phases, the backend picks the solving engine, and limits (see
+# new_budget) limit the search.
+def check_line(line, stats=None, backend=None, limits=None):
+    board = parse_line(line, stats)
+    if board is None:
+        return INVALID_TEXT, "invalid"
+    result, solutions, nodes = core.check_uniqueness(board, stats=stats,
+     backend=backend, budget=new_budget(limits))
+    return "{} {}".format(result, nodes), result
+
+
+################ parse_line function ################
+# This function parses a puzzle line just like parse_puzzle, adding the time
+# it took to the parse phase of the optional stats
+def parse_line(line, stats=None):
+    if stats is None:
+        return parse_puzzle(line)
+    began = time.perf_counter()
+    board = parse_puzzle(line)
+    stats.add_phase("parse", began)
+    return board
+
+
+################ new_budget function ################
+# This function returns a new search budget for a single puzzle from the
+# given limits, (max_nodes, seconds), or None if there are no limits
+def new_budget(limits):
+    if limits is None:
+        return None
+    return bud.SearchBudget(*limits)
+
+
+############## enable_symmetry function ##############
+# This function gives the current process its own symmetry index. It is also
+# used to set up each worker process when the puzzles are solved in parallel.
+def enable_symmetry():
+    global symmetry_index
+    symmetry_index = sym.SymmetryIndex()
+
+
+################ solve_chunk function ################
+# This function solves (or with check, checks the uniqueness of) a chunk of
+# puzzle lines and returns a list holding the result, status, latency (in
+# seconds), and statistics of each puzzle. It is the function that runs inside
+# of the worker processes.
+def solve_chunk(lines, check=False, log=False, backend=None, limits=None):
+    return list(solve_serial(lines, check, log, backend, limits))
+
+
+################## chunked function ##################
+# This function groups the lines from the given iterable into lists holding
+# (at most) the given number of lines
+def chunked(lines, size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+############### solve_serial function ################
+# This function solves (or checks) the puzzles one at a time in the current
+# process and yields the result, status, latency, and statistics of each one.
+# The statistics are a dictionary from SolveStats.as_dict when log is True,
+# and None otherwise (in which case nothing is timed but the latency). The
+# backend picks the solving engine (SOLVER_BACKEND when it is None), and the
+# limits (see new_budget) limit the search of each puzzle.
+def solve_serial(lines, check=False, log=False, backend=None, limits=None):
+    handle_line = check_line if check else solve_line
+    stats = None
+    for line in lines:
+        if log:
+            stats = st.SolveStats()
+        began = time.perf_counter()
+        result, status = handle_line(line, stats, backend, limits)
+        latency = time.perf_counter() - began
+        yield result, status, latency, stats and stats.as_dict()
+
+
+############## solve_parallel function ###############
+# This function spreads the puzzles across a pool of worker processes and
+# yields the result, status, latency, and statistics of each one in input
+# order. Only a few chunks per worker are in flight at any time, so the input
+# is never read much further ahead than the output (which keeps memory use
+# flat).
+def solve_parallel(lines, workers, chunk_size, symmetry=False, check=False,
+ log=False, backend=None, limits=None):
+    pending = deque() # chunks that have been handed to the pool, in order
+    with multiprocessing.Pool(workers, enable_symmetry if symmetry else
+     None) as pool:
+        for chunk in chunked(lines, chunk_size):
+            pending.append(pool.apply_async(solve_chunk, (chunk, check,
+             log, backend, limits)))
+            # wait for the oldest chunk once enough work is queued up
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+############### solve_stream function ################
+# This function solves each puzzle line from the given iterable and writes one
+# result line to the output for every puzzle (in the same order as the input).
+# More than one worker spreads the puzzles across a process pool, symmetry
+# answers equivalent puzzles from a symmetry index, and check writes whether
+# each puzzle has a unique solution instead of solving it. If a stats_log
+# stream is given, one line of JSON holding the statistics of each puzzle is
+# written to it as well. The backend picks the solving engine, and the limits
+# (see new_budget) limit the search of each puzzle. It returns a dictionary
+# holding the run's statistics.
+def solve_stream(lines, out, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+ symmetry=False, check=False, stats_log=None, backend=None, limits=None):
+    histogram = LatencyHistogram()
+    counts = {"solved": 0, "unsolvable": 0, "invalid": 0, core.UNIQUE: 0,
+     core.MULTIPLE: 0, core.NO_SOLUTION: 0, core.TIMED_OUT: 0}
+    totals = {"nodes": 0, "backtracks": 0, "propagations": 0, "max_depth": 0}
+    log = stats_log is not None
+    start = time.perf_counter()
+    if workers > 1:
+        results = solve_parallel(lines, workers, chunk_size, symmetry, check,
+         log, backend, limits)
+    else:
+        if symmetry:
+            enable_symmetry()
+        results = solve_serial(lines, check, log, backend, limits)
+    for index, (result, status, latency, record) in enumerate(results):
+        counts[status] += 1
+        histogram.record(latency)
+        out.write(result + "\n")
+        if record is not None:
+            for key in ("nodes", "backtracks", "propagations"):
+                totals[key] += record[key]
+            totals["max_depth"] = max(totals["max_depth"], record["max_depth"])
+            record = dict(puzzle=index, status=status,
+             latency=round(latency, 6), **record)
+            stats_log.write(json.dumps(record, separators=(",", ":")) + "\n")
+    elapsed = time.perf_counter() - start
+    return {
+        "log": log,
+        "nodes": totals["nodes"],
+        "backtracks": totals["backtracks"],
+        "propagations": totals["propagations"],
+        "max_depth": totals["max_depth"],
+        "puzzles": histogram.count,
+        "solved": counts["solved"],
+        "unsolvable": counts["unsolvable"],
+        "invalid": counts["invalid"],
+        "check": check,
+        "unique": counts[core.UNIQUE],
+        "multiple": counts[core.MULTIPLE],
+        "none": counts[core.NO_SOLUTION],
+        "timeout": counts[core.TIMED_OUT],
+        "workers": workers,
+        "seconds": elapsed,
+        "puzzles_per_sec": histogram.count / elapsed if elapsed else 0.0,
+        "p50_ms": histogram.percentile(50) * 1000,
+        "p99_ms": histogram.percentile(99) * 1000,
+    }
+
+
+################ print_stats function ################
+# This function prints the statistics from a batch run to stderr (so that it
+# doesn't get mixed in with the solutions on stdout)
+def print_stats(stats, stream=sys.stderr):
+    if stats["check"]:
+        summary = ("{puzzles} puzzles ({unique} unique, {multiple} multiple, "
+         "{none} without a solution, {invalid} invalid)")
+    else:
+        summary = ("{puzzles} puzzles ({solved} solved, {unsolvable} "
+         "unsolvable, {invalid} invalid)")
+    if stats["timeout"]:
+        summary = summary[:-1] + ", {timeout} timed out)"
+    stream.write((summary + " in {seconds:.3f}s using {workers} worker(s)\n"
+     "{puzzles_per_sec:.1f} puzzles/sec, p50 {p50_ms:.3f} ms, "
+     "p99 {p99_ms:.3f} ms\n").format(**stats))
+    if stats["log"]:
+        stream.write(("{nodes} nodes, {backtracks} backtracks, "
+         "{propagations} propagations, max depth {max_depth}\n").format(
+         **stats))
+################################################################################
+
+
+
+##################################### MAIN #####################################
+
+################### main function ####################
+# This function parses the command-line arguments and runs the batch solve
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Sudoku puzzles in "
+     "bulk. Each line holds one puzzle with one character per cell (81 for "
+     "9x9, 256 for 16x16, 625 for 25x25), using 0 or . for empty cells and "
+     "letters for values above 9.")
+    parser.add_argument("input", nargs="?", default="-",
+     help="file holding the puzzles (default: read from stdin)")
+    parser.add_argument("-o", "--output", default="-",
+     help="file the solutions are written to (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+     help="number of worker processes (0 uses every CPU core, default: 1)")
+    parser.add_argument("-c", "--chunk-size", type=int,
+     default=DEFAULT_CHUNK_SIZE, help="number of puzzles handed to a worker "
+     "at a time (default: {})".format(DEFAULT_CHUNK_SIZE))
+    parser.add_argument("-s", "--symmetry", action="store_true",
+     help="answer puzzles that are equivalent to an already solved puzzle "
+     "by transforming its solution")
+    parser.add_argument("-u", "--uniqueness", action="store_true",
+     help="check whether each puzzle has a unique solution instead of "
+     "solving it")
+    parser.add_argument("--stats-log", metavar="FILE",
+     help="write the search counters and phase timings of every puzzle to "
+     "this file as JSON lines")
+    parser.add_argument("-b", "--backend", choices=sorted(core.BACKENDS),
+     default=SOLVER_BACKEND, help="solving engine (default: {})".format(
+     SOLVER_BACKEND))
+    parser.add_argument("--max-nodes", type=int, metavar="N",
+     help="give up on a puzzle after visiting this many search nodes")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+     help="give up on a puzzle after searching for this many seconds")
+    parser.add_argument("-q", "--quiet", action="store_true",
+     help="don't print the statistics when finished")
+    args = parser.parse_args(argv)
+    if args.workers < 0 or args.chunk_size < 1:
+        parser.error("--workers must be >= 0 and --chunk-size must be >= 1")
+    if (args.max_nodes is not None and args.max_nodes < 1) or (
+     args.timeout is not None and args.timeout <= 0):
+        parser.error("--max-nodes and --timeout must be positive")
+    if args.symmetry and args.uniqueness:
+        parser.error("--symmetry can't be used with --uniqueness")
+    workers = args.workers or multiprocessing.cpu_count()
+    limits = None
+    if args.max_nodes is not None or args.timeout is not None:
+        limits = (args.max_nodes, args.timeout)
+    # open the input and output streams
+    source = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    stats_log = open(args.stats_log, "w") if args.stats_log else None
+    try:
+        stats = solve_stream(read_puzzles(source), out, workers,
+         args.chunk_size, args.symmetry, args.uniqueness, stats_log,
+         args.backend, limits)
+    finally:
+        if stats_log is not None:
+            stats_log.close()
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    if not args.quiet:
+        print_stats(stats)
+    # exit with an error code if any of the puzzles couldn't be solved (or
+    # don't have a unique solution)
+    done = stats["unique"] if args.uniqueness else stats["solved"]
+    return 0 if done == stats["puzzles"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+################################################################################
@@ -0,0 +1,181 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   batch_validator.py
+#
+# Description: This file contains a NumPy version of the conflict checks that
+#              can validate thousands of boards at once. Boards are passed in
+#              as an (N, 9, 9) uint8 array (or (N, 16, 16), and so on), and the
+#              row, column, and subgrid checks are done with array operations
+#              instead of Python loops. It can also be run from the command
+#              line to check a file of puzzle or solution lines (81 characters
+#              each for 9x9 boards), in the same format that batch.py reads
+#              (blank lines and lines starting with # are skipped).
+#
+#              Usage: python batch_validator.py [boards.txt] [--complete]
+#                      [--size N]
+#
+################################################################################
+
+import sys, argparse
+import numpy as np
+from settings import *
+import geometry_class as geo
+import batch as bt
+
+
+# Number of lines that are loaded into a single array by the command line tool
+CHUNK_LINES = 65536
+# Value of every byte that can appear in a board line (255 for any character
+# that isn't a value)
+BYTE_VALUES = np.full(256, 255, dtype=np.uint8)
+for char, val in geo.SYMBOL_VALUES.items():
+    BYTE_VALUES[ord(char)] = val
+    BYTE_VALUES[ord(char.lower())] = val
+
+
+############################## VALIDATION FUNCTIONS ############################
+
+############## duplicate_bits function ###############
+# This function takes an array whose last axis holds the digit bits of every
+# cell in a unit (row, column, or subgrid) and returns the bits of the digits
+# that appear more than once in each unit. It only loops over the cells of a
+# unit; every step works on all of the boards at once.
+def duplicate_bits(units):
+    seen = np.zeros(units.shape[:-1], dtype=units.dtype)
+    twice = np.zeros(units.shape[:-1], dtype=units.dtype)
+    for i in range(units.shape[-1]):
+        twice |= seen & units[..., i]
+        seen |= units[..., i]
+    return twice
+
+
+############# conflict_masks function ################
+# This function returns an (N, 9, 9) boolean array that is True for every cell
+# whose (non-zero) value also appears somewhere else in the same row, column,
+# or subgrid. It is the batch version of App.conflict_detected. The size of the
+# boards is taken from the array's shape.
+def conflict_masks(boards):
+    boards = np.asarray(boards, dtype=np.uint8)
+    if boards.ndim != 3 or boards.shape[1] != boards.shape[2]:
+        raise ValueError("boards must have the shape (N, size, size)")
+    count, size = boards.shape[:2]
+    g = geo.geometry(size)
+    height, width = g.box_height, g.box_width
+    # give every digit its own bit (bit 0 = digit 1), empty cells get no bits
+    # (out-of-range values are treated as empty here). The masks are only as
+    # wide as they need to be for the number of digits, but they are shifted
+    # one bit past the highest digit before being moved back down, so 16x16
+    # boards need 32-bit masks.
+    mask_type = np.uint16 if size < 16 else np.uint32
+    digits = np.where(boards <= size, boards, 0).astype(mask_type)
+    bits = np.left_shift(mask_type(1), digits) >> 1
+    # digits that are duplicated in every row, column, and subgrid
+    row_dups = duplicate_bits(bits) # (N, row)
+    col_dups = duplicate_bits(bits.transpose(0, 2, 1)) # (N, col)
+    boxes = bits.reshape(count, size // height, height, size // width,
+     width).transpose(0, 1, 3, 2, 4)
+    box_dups = duplicate_bits(boxes.reshape(count, size // height,
+     size // width, size)) # (N, band, stack)
+    # spread the duplicated digits back out over every cell on the board
+    duplicated = row_dups[:, :, None] | col_dups[:, None, :]
+    duplicated |= np.repeat(np.repeat(box_dups, height, axis=1), width,
+     axis=2)
+    # a cell conflicts if the digit it holds is duplicated in one of its units
+    return (bits & duplicated) != 0
+
+
+############## validate_boards function ##############
+# This function checks every board in an (N, 9, 9) array at once. It returns
+# a boolean array holding whether each board is valid (has no conflicts and,
+# if complete is True, no empty cells) along with the per-cell conflict masks.
+def validate_boards(boards, complete=False):
+    boards = np.asarray(boards, dtype=np.uint8)
+    conflicts = conflict_masks(boards)
+    valid = ~conflicts.any(axis=(1, 2))
+    # values above the board's size can never be valid
+    valid &= (boards <= boards.shape[1]).all(axis=(1, 2))
+    if complete:
+        valid &= (boards != 0).all(axis=(1, 2))
+    return valid, conflicts
+
+
+############### boards_from_lines function ###############
+# This function converts a list of lines (one character per cell, with 0 or .
+# for empty cells and letters for values above 9) into an (N, size, size) uint8
+# array. Lines with the wrong length are rejected with a ValueError.
+def boards_from_lines(lines, size=BOARD_SIZE):
+    lines = [line.strip() for line in lines]
+    for number, line in enumerate(lines):
+        if len(line) != size * size:
+            raise ValueError("line {} is not {} characters long".format(
+             number + 1, size * size))
+    if not lines:
+        return np.zeros((0, size, size), dtype=np.uint8)
+    raw = np.frombuffer("".join(lines).encode("ascii", "replace"),
+     dtype=np.uint8)
+    # any other character becomes an out-of-range value (and is reported as
+    # invalid by validate_boards)
+    return BYTE_VALUES[raw].reshape(len(lines), size, size)
+################################################################################
+
+
+
+##################################### MAIN #####################################
+
+################### main function ####################
+# This function validates every board in a file (or stdin) and prints the
+# (1-based) numbers of any invalid boards, counting only the board lines. It
+# returns 1 if any board was invalid.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check Sudoku boards for "
+     "conflicts. Each line holds one board with one character per cell.")
+    parser.add_argument("input", nargs="?", default="-",
+     help="file holding the boards (default: read from stdin)")
+    parser.add_argument("--complete", action="store_true",
+     help="also treat boards with empty cells as invalid")
+    parser.add_argument("--size", type=int, default=BOARD_SIZE,
+     help="number of rows on each board (default: {})".format(BOARD_SIZE))
+    args = parser.parse_args(argv)
+    source = sys.stdin if args.input == "-" else open(args.input)
+    total = invalid = 0
+    try:
+        chunk = []
+        for line in bt.read_puzzles(source):
+            chunk.append(line)
+            if len(chunk) == CHUNK_LINES:
+                invalid += report_chunk(chunk, total, args.complete,
+                 args.size)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            invalid += report_chunk(chunk, total, args.complete, args.size)
+            total += len(chunk)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    sys.stderr.write("{} boards checked, {} invalid\n".format(total, invalid))
+    return 1 if invalid else 0
+
+
+############### report_chunk function ################
+# This function validates one chunk of board lines, prints the (1-based)
+# number of every invalid board, and returns how many boards were invalid
+def report_chunk(lines, offset, complete, size=BOARD_SIZE):
+    # lines with the wrong length are reported without stopping the run
+    usable = [i for i, line in enumerate(lines) if len(line.strip()) ==
+     size * size]
+    valid = np.zeros(len(lines), dtype=bool)
+    if usable:
+        valid[usable] = validate_boards(boards_from_lines(
+         [lines[i] for i in usable], size), complete)[0]
+    for i in np.flatnonzero(~valid):
+        print(offset + i + 1)
+    return int((~valid).sum())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+################################################################################
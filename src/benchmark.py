@@ -0,0 +1,457 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   benchmark.py
+#
+# Description: This file contains the benchmark suite. It runs the game's
+#              solving, checking, and drawing functions (App.backtrack,
+#              App.is_solvable, App.conflict_detected on every cell, and
+#              App.playing_draw) against the bundled corpora in the corpora
+#              folder (easy, hard, and pathological boards), and reports the
+#              throughput, the p50/p90/p99 latency, and the peak memory of
+#              each one. Drawing runs under SDL's dummy video driver, so no
+#              window is opened. The results are written out as JSON, and if
+#              a baseline (saved by an earlier run with --save-baseline) is
+#              found, the run fails when any result is more than --threshold
+#              worse than the baseline's (lower throughput or more peak
+#              memory), plus however much that result varied between the
+#              --rounds runs that the baseline was saved from. Every run
+#              first goes through the corpus once without timing it, so
+#              caches (fonts, glyphs, and the solving engines' tables) are
+#              already warm, and peak memory is measured on a separate pass so
+#              tracing it doesn't slow the timed passes down.
+#              Each sample's latency is the fastest of the --repeat timed
+#              passes. A machine that is shared with other work speeds up and
+#              slows down from one second to the next, so a fixed reference
+#              loop is timed next to every pass, and the throughput that is
+#              compared against the baseline (per_ref) is counted in units of
+#              the reference loop's time rather than in seconds.
+#
+#              Usage: python benchmark.py [--corpus easy hard pathological]
+#                      [--repeat N] [-o results.json] [--baseline FILE]
+#                      [--threshold 0.2] [--save-baseline] [--rounds N]
+#                      [--skip-render] [--backend backtracking|dlx]
+#
+################################################################################
+
+import os, sys, time, json, argparse, platform, statistics, tracemalloc
+# draw without opening a window, and keep pygame's greeting off of stdout
+# (these have to be set before pygame is imported)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from settings import *
+import app_class as ac
+import board_class as brd
+import sudoku_core as core
+import geometry_class as geo
+import batch as bt
+
+try:
+    import resource # only available on Unix
+except ImportError:
+    resource = None
+
+
+CORPORA = ("easy", "hard", "pathological") # corpora that are run by default
+# Baseline that the results are compared against
+BASELINE_PATH = os.path.join(CORPORA_DIR, "baseline.json")
+DEFAULT_REPEAT = 5 # number of timed passes through each corpus
+# How much worse than the baseline a result can be before the run fails (0.2
+# allows 20% lower throughput or 20% more memory), on top of the spread that
+# was seen between the runs the baseline was saved from
+DEFAULT_THRESHOLD = 0.2
+# Number of whole runs that a baseline is saved from. Each result in the
+# baseline is the median of the runs, and how far apart the runs were is saved
+# with it, so results that vary a lot from run to run get more room.
+DEFAULT_ROUNDS = 3
+# Number of iterations of the reference loop that every timed pass is measured
+# against (about a millisecond), and the number of times it is run each time
+# it is timed (the fastest run is kept)
+REFERENCE_LOOPS = 20000
+REFERENCE_RUNS = 3
+# Number of times the selected cell is moved (and the window redrawn) per
+# board when timing the frames drawn during a game
+RENDER_MOVES = 9
+# Results compared against the baseline, along with whether a higher value is
+# better and how much worse (in the result's own units) it can get on top of
+# the threshold. The slack keeps tiny results (e.g. a few hundred bytes of
+# memory) from failing over differences that don't matter. The baseline also
+# holds each result's spread (e.g. per_ref_spread).
+COMPARED = (("per_ref", True, 0), ("peak_kib", False, 16))
+
+
+class Benchmark:
+
+    def __init__(self, backend=None, render=True):
+        self.backend = backend # solving engine used by backtrack
+        self.render = render # whether the drawing functions are run
+        self.apps = {} # game for each board size (made when first needed)
+        # latencies (in seconds) recorded during the current timed pass (None
+        # while nothing is being timed)
+        self.latencies = None
+        self.solutions = {} # solution of every board (by its text)
+
+
+    ################## app_for function ##################
+    # This function returns the game used to run boards of the given size. The
+    # game's puzzle pool is left off so it doesn't make boards in the
+    # background while the benchmark is timing.
+    def app_for(self, size):
+        if size not in self.apps:
+            self.apps[size] = ac.App(size, pool=False)
+        return self.apps[size]
+
+
+    ################ operations function #################
+    # This function returns the functions that are benchmarked as (name,
+    # function) pairs. Each function is called with a board (a list of rows)
+    # and times its operation on that board by calling self.sample (setting
+    # up the game isn't timed).
+    def operations(self):
+        ops = [("backtrack", self.time_backtrack),
+         ("is_solvable", self.time_is_solvable),
+         ("conflict_detected", self.time_conflict_detected)]
+        if self.render:
+            ops += [("render_full", self.time_render_full),
+             ("render_frame", self.time_render_frame)]
+        return ops
+
+
+    ################### sample function ##################
+    # This function calls func with the given arguments and records how long
+    # it took (only while a timed pass is running)
+    def sample(self, func, *args):
+        began = time.perf_counter()
+        func(*args)
+        if self.latencies is not None:
+            self.latencies.append(time.perf_counter() - began)
+
+
+    ############### time_backtrack function ##############
+    # This function times solving a copy of the board
+    def time_backtrack(self, board):
+        app = self.app_for(len(board))
+        self.sample(app.backtrack, [list(row) for row in board], self.backend)
+
+
+    ############## time_is_solvable function #############
+    # This function times checking the board's givens for conflicts (with the
+    # board loaded into the game the way a new game loads it)
+    def time_is_solvable(self, board):
+        app = self.load_game(board, None)
+        self.sample(app.is_solvable, app.sudoku_board)
+
+
+    ########### time_conflict_detected function ##########
+    # This function times checking every cell of the board for conflicts (one
+    # sample per board)
+    def time_conflict_detected(self, board):
+        app = self.app_for(len(board))
+        self.sample(self.check_cells, app, board)
+
+
+    ############### check_cells function #################
+    # This function checks every cell of the board for conflicts
+    def check_cells(self, app, board):
+        for row in range(len(board)):
+            for col in range(len(board)):
+                app.conflict_detected(row, col, board[row][col], board)
+
+
+    ############## time_render_full function #############
+    # This function times drawing the whole window for a new game
+    def time_render_full(self, board):
+        app = self.load_game(board, self.solutions[geo.board_text(board)])
+        app.selected = None
+        app.drawn_state = None # forget what was drawn so it is all redrawn
+        self.sample(app.playing_draw)
+
+
+    ############# time_render_frame function #############
+    # This function times the frames drawn while the selected cell moves
+    # across the board (each frame only redraws the cells that changed)
+    def time_render_frame(self, board):
+        app = self.load_game(board, self.solutions[geo.board_text(board)])
+        app.playing_draw()
+        for move in range(RENDER_MOVES):
+            app.selected = (move % app.size, (move * 2) % app.size)
+            app.cell_changed = True
+            self.sample(app.playing_draw)
+
+
+    ################ solution_of function ################
+    # This function returns the solution of the board, or the board itself if
+    # it can't be solved (the game only uses it to color the cells)
+    def solution_of(self, board):
+        solution = [list(row) for row in board]
+        if not core.solve(solution, backend=self.backend):
+            return [list(row) for row in board]
+        return solution
+
+
+    ################# load_game function #################
+    # This function starts a game of the board just like get_sudoku_board
+    # does, with the given solution (None skips tracking the correct and
+    # conflicting cells), and returns the game
+    def load_game(self, board, solution):
+        app = self.app_for(len(board))
+        app.sudoku_board = brd.Board(board)
+        app.reset_locked_cells()
+        if solution is not None:
+            app.finished_board = brd.Board(solution)
+            app.sudoku_board.track(app.finished_board)
+        app.notes = [0] * app.geometry.cells
+        app.state = "PLAYING"
+        return app
+
+
+    ################ run_corpus function #################
+    # This function benchmarks every operation on the given boards and returns
+    # a dictionary holding the results of each operation
+    def run_corpus(self, boards, repeat):
+        results = {}
+        # the boards are only solved once for the drawing functions
+        self.solutions = {geo.board_text(board): self.solution_of(board) for
+         board in boards}
+        for name, op in self.operations():
+            # warm up the caches without timing anything
+            self.latencies = None
+            for board in boards:
+                op(board)
+            # measure the memory on its own pass, since tracing it slows
+            # everything down
+            tracemalloc.start()
+            start = tracemalloc.get_traced_memory()[0]
+            for board in boards:
+                op(board)
+            peak = tracemalloc.get_traced_memory()[1] - start
+            tracemalloc.stop()
+            # then time the operation repeat times, keeping the fastest time of
+            # every sample (the slower ones were held up by something else
+            # running on the machine). The reference loop is timed before and
+            # after every pass, to tell how fast the machine was running.
+            passes = []
+            references = []
+            for run in range(repeat):
+                self.latencies = []
+                before = reference_time()
+                for board in boards:
+                    op(board)
+                passes.append(self.latencies)
+                references.append((before + reference_time()) / 2)
+            scaled = [min(time / ref for time, ref in zip(times, references))
+             for times in zip(*passes)]
+            results[name] = summarize([min(times) for times in zip(*passes)],
+             peak, sum(scaled))
+        self.latencies = None
+        return results
+
+
+    ##################### run function ###################
+    # This function benchmarks every operation on each of the named corpora
+    # and returns the results as a dictionary that can be turned into JSON
+    def run(self, corpora, repeat=DEFAULT_REPEAT):
+        results = {}
+        for corpus in corpora:
+            results[corpus] = self.run_corpus(bt.load_corpus(corpus), repeat)
+        return {"python": platform.python_version(),
+         "platform": platform.platform(),
+         "backend": self.backend or SOLVER_BACKEND, "repeat": repeat,
+         "render": self.render, "max_rss_kib": max_rss_kib(),
+         "results": results}
+
+
+
+############################### HELPER FUNCTIONS ###############################
+
+################# summarize function #################
+# This function turns the latencies of an operation (in seconds), its peak
+# memory (in bytes), and its total time in units of the reference loop's time
+# into the operation's results. The throughput only counts the time spent in
+# the operation itself.
+def summarize(latencies, peak, scaled_total):
+    histogram = bt.LatencyHistogram()
+    for latency in latencies:
+        histogram.record(latency)
+    total = histogram.total
+    return {"samples": histogram.count, "seconds": round(total, 6),
+     "per_sec": round(histogram.count / total, 3) if total else 0.0,
+     "per_ref": round(histogram.count / scaled_total, 4) if scaled_total else
+     0.0,
+     "p50_ms": round(histogram.percentile(50) * 1000, 4),
+     "p90_ms": round(histogram.percentile(90) * 1000, 4),
+     "p99_ms": round(histogram.percentile(99) * 1000, 4),
+     "peak_kib": round(peak / 1024, 1)}
+
+
+############### reference_time function ############
+# This function returns the time (in seconds) of the reference loop, a fixed
+# amount of plain Python work that slows down along with everything else when
+# the machine is busy
+def reference_time():
+    fastest = None
+    for run in range(REFERENCE_RUNS):
+        began = time.perf_counter()
+        total = 0
+        for i in range(REFERENCE_LOOPS):
+            total += i % 7
+        took = time.perf_counter() - began
+        if fastest is None or took < fastest:
+            fastest = took
+    return fastest
+
+
+################# max_rss_kib function ###############
+# This function returns the most memory the process has held (its peak
+# resident set size, in KiB), or None where that isn't available
+def max_rss_kib():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes while Linux reports kilobytes
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+################# merge_rounds function ##############
+# This function combines the results of several whole runs into a baseline:
+# every compared result becomes the median of the runs, and its spread (how
+# far the lowest run was below the highest, as a fraction) is saved alongside
+# it. The other results are the first run's.
+def merge_rounds(rounds):
+    baseline = json.loads(json.dumps(rounds[0])) # a deep copy
+    baseline["rounds"] = len(rounds)
+    for corpus, ops in baseline["results"].items():
+        for name, result in ops.items():
+            for key, higher_is_better, slack in COMPARED:
+                values = [run["results"][corpus][name][key] for run in rounds]
+                result[key] = round(statistics.median(values), 4)
+                highest = max(values)
+                result[key + "_spread"] = round(1 - min(values) / highest,
+                 3) if highest else 0.0
+    return baseline
+
+
+################ find_regressions function ###########
+# This function compares the results against the baseline and returns a
+# message for every result that is worse than the baseline's by more than
+# threshold plus the result's spread in the baseline. Results that aren't in
+# the baseline (e.g. one saved by an older version) aren't compared.
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for corpus, ops in results["results"].items():
+        for name, result in ops.items():
+            base = baseline["results"].get(corpus, {}).get(name)
+            if base is None:
+                continue
+            for key, higher_is_better, slack in COMPARED:
+                if key not in base:
+                    continue
+                old, new = base[key], result[key]
+                allowed = threshold + base.get(key + "_spread", 0)
+                if higher_is_better:
+                    worse = new < old * (1 - allowed) - slack
+                else:
+                    worse = new > old * (1 + allowed) + slack
+                if worse:
+                    regressions.append("{}/{}: {} went from {} to {}".format(
+                     corpus, name, key, old, new))
+    return regressions
+
+
+################ print_results function ##############
+# This function prints a table of the results to stderr (so that it doesn't
+# get mixed in with the JSON on stdout)
+def print_results(results, stream=sys.stderr):
+    stream.write("{:<14}{:<19}{:>12}{:>10}{:>10}{:>10}{:>11}\n".format(
+     "corpus", "operation", "per sec", "p50 ms", "p90 ms", "p99 ms",
+     "peak KiB"))
+    for corpus, ops in results["results"].items():
+        for name, result in ops.items():
+            stream.write(("{:<14}{:<19}{per_sec:>12.1f}{p50_ms:>10.3f}"
+             "{p90_ms:>10.3f}{p99_ms:>10.3f}{peak_kib:>11.1f}\n").format(
+             corpus, name, **result))
+    if results["max_rss_kib"] is not None:
+        stream.write("peak resident memory: {} KiB\n".format(
+         results["max_rss_kib"]))
+################################################################################
+
+
+
+##################################### MAIN #####################################
+
+################### main function ####################
+# This function parses the command-line arguments and runs the benchmarks
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solver, the "
+     "conflict checks, and the drawing functions against the bundled "
+     "corpora.")
+    parser.add_argument("--corpus", nargs="+", default=list(CORPORA),
+     help="corpora to run (names from the corpora folder or paths to puzzle "
+     "files, default: {})".format(" ".join(CORPORA)))
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT,
+     help="number of timed passes through each corpus (default: {})".format(
+     DEFAULT_REPEAT))
+    parser.add_argument("-o", "--output", default="-",
+     help="file the results are written to as JSON (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+     help="results to compare against (default: corpora/baseline.json)")
+    parser.add_argument("-t", "--threshold", type=float,
+     default=DEFAULT_THRESHOLD, help="how much worse than the baseline a "
+     "result can be (on top of its spread), as a fraction (default: "
+     "{})".format(DEFAULT_THRESHOLD))
+    parser.add_argument("--save-baseline", action="store_true",
+     help="save the results as the new baseline instead of comparing them")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS,
+     help="number of whole runs a baseline is saved from (default: "
+     "{})".format(DEFAULT_ROUNDS))
+    parser.add_argument("--skip-render", action="store_true",
+     help="don't benchmark the drawing functions")
+    parser.add_argument("-b", "--backend", choices=sorted(core.BACKENDS),
+     default=SOLVER_BACKEND, help="solving engine (default: {})".format(
+     SOLVER_BACKEND))
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or args.rounds < 1 or args.threshold < 0:
+        parser.error("--repeat and --rounds must be >= 1 and --threshold must "
+         "be >= 0")
+    bench = Benchmark(args.backend, not args.skip_render)
+    results = bench.run(args.corpus, args.repeat)
+    if args.save_baseline and args.rounds > 1:
+        results = merge_rounds([results] + [bench.run(args.corpus,
+         args.repeat) for run in range(args.rounds - 1)])
+    text = json.dumps(results, indent=2) + "\n"
+    if args.output == "-":
+        sys.stdout.write(text)
+    else:
+        with open(args.output, "w") as out:
+            out.write(text)
+    print_results(results)
+    if args.save_baseline:
+        with open(args.baseline, "w") as out:
+            out.write(text)
+        sys.stderr.write("saved the baseline to {}\n".format(args.baseline))
+        return 0
+    if not os.path.isfile(args.baseline):
+        sys.stderr.write("no baseline found at {}, so nothing was compared\n"
+         .format(args.baseline))
+        return 0
+    with open(args.baseline) as source:
+        baseline = json.load(source)
+    if baseline.get("backend") != results["backend"]:
+        sys.stderr.write("the baseline was run with the {} backend, so "
+         "nothing was compared\n".format(baseline.get("backend")))
+        return 0
+    regressions = find_regressions(results, baseline, args.threshold)
+    for message in regressions:
+        sys.stderr.write("regression: " + message + "\n")
+    if not regressions:
+        sys.stderr.write("no regressions (threshold {:.0%})\n".format(
+         args.threshold))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+################################################################################
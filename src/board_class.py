@@ -0,0 +1,235 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   board_class.py
+#
+# Description: This file contains the compact Sudoku board. The cell values
+#              are stored in a single bytearray, and the locked, correct, and
+#              conflicting cells are each stored as an integer bitset (bit
+#              row * N + col is set for every cell in the set, where N is the
+#              board's size), which makes membership checks O(1) and keeps each
+#              board small. Indexing a board by row returns a view of that row,
+#              so board[row][col] works just like it did with the old list of
+#              lists. Boards can be any size (9x9, 16x16, 25x25, and so on);
+#              the lookup tables of each size come from geometry_class.py.
+#
+#              The board also tracks its own state as cells are edited with
+#              set_cell: how many times each digit appears in each row,
+#              column, and subgrid, which cells are in conflict, and how many
+#              cells match the solution. Each edit only has to look at the
+#              cell's peers, so checking for conflicts or for a finished
+#              board never has to scan the whole board.
+#
+################################################################################
+
+from settings import *
+import geometry_class as geo
+
+
+class Board:
+
+    __slots__ = ("geometry", "size", "cells", "view", "locked", "correct",
+     "conflicting", "unit_counts", "solution", "matched")
+
+    def __init__(self, rows=None, size=BOARD_SIZE):
+        if rows is not None:
+            size = len(rows) # the board is as big as the rows it is given
+        self.geometry = geo.geometry(size) # lookup tables of the board's size
+        self.size = size # number of rows, columns, and digits
+        self.cells = bytearray(self.geometry.cells) # cell values (0 = empty)
+        self.view = memoryview(self.cells) # zero-copy view of the values
+        self.locked = 0 # bitset of the locked (given) cells
+        self.correct = 0 # bitset of the cells the user got right
+        self.conflicting = 0 # bitset of the cells currently in conflict
+        # number of times each digit appears in each unit (row, column, and
+        # subgrid), indexed as unit_counts[unit][digit]
+        self.unit_counts = None
+        self.solution = None # values of the solved board (if it is known)
+        self.matched = 0 # number of cells that match the solution
+        # copy the values over from a list of rows (if one was provided)
+        if rows is not None:
+            for x, row in enumerate(rows):
+                self.cells[x * size:(x + 1) * size] = bytes(row)
+        self.track()
+
+
+    ################## __getitem__ function ##############
+    # This function returns a writable view of the given row, so that a cell
+    # can be read or written with board[row][col]
+    def __getitem__(self, row):
+        if not 0 <= row < self.size:
+            raise IndexError("row index out of range")
+        return self.view[row * self.size:(row + 1) * self.size]
+
+
+    #################### __len__ function ################
+    # This function returns the number of rows on the board
+    def __len__(self):
+        return self.size
+
+
+    ##################### __eq__ function ################
+    # Two boards are equal when all of their cell values are equal
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.cells == other.cells
+        return NotImplemented
+
+
+    #################### copy function ###################
+    # This function returns an independent copy of the board (values and cell
+    # sets)
+    def copy(self):
+        board = Board.__new__(Board)
+        board.geometry = self.geometry
+        board.size = self.size
+        board.cells = bytearray(self.cells)
+        board.view = memoryview(board.cells)
+        board.locked = self.locked
+        board.correct = self.correct
+        board.conflicting = self.conflicting
+        board.unit_counts = [bytearray(counts) for counts in self.unit_counts]
+        board.solution = self.solution
+        board.matched = self.matched
+        return board
+
+
+    ################### buffer function ##################
+    # This function exports the cell values without copying them (e.g. for
+    # numpy.frombuffer or for writing the board straight to a file)
+    def buffer(self):
+        return self.view
+
+
+    ################### to_rows function #################
+    # This function returns the board values as a list of rows
+    def to_rows(self):
+        size = self.size
+        return [list(self.cells[x * size:(x + 1) * size]) for x in range(size)]
+
+
+    ################# lock_givens function ###############
+    # This function locks every filled in cell and resets the correct cells.
+    # It is called whenever a new game is created.
+    def lock_givens(self):
+        self.locked = 0
+        for i, val in enumerate(self.cells):
+            if val != 0:
+                self.locked |= 1 << i
+        self.correct = 0
+
+
+    ################# is_locked function #################
+    # This function returns True if the given cell is locked
+    def is_locked(self, row, col):
+        return (self.locked >> (row * self.size + col)) & 1 == 1
+
+
+    ################ is_correct function #################
+    # This function returns True if the given cell is marked as correct
+    def is_correct(self, row, col):
+        return (self.correct >> (row * self.size + col)) & 1 == 1
+
+
+    ############## is_conflicting function ###############
+    # This function returns True if the given cell is marked as conflicting
+    def is_conflicting(self, row, col):
+        return (self.conflicting >> (row * self.size + col)) & 1 == 1
+
+
+    ############### add_correct function #################
+    # This function marks the given cell as correct
+    def add_correct(self, row, col):
+        self.correct |= 1 << (row * self.size + col)
+
+
+    ################# cells_in function ##################
+    # This function yields the (row, col) position of every cell in the given
+    # bitset (e.g. board.cells_in(board.locked))
+    def cells_in(self, bitset):
+        while bitset:
+            low = bitset & -bitset # lowest set bit
+            i = low.bit_length() - 1
+            yield divmod(i, self.size)
+            bitset ^= low
+
+
+    ##################### track function #################
+    # This function recounts the digits in every unit, the conflicting cells,
+    # and the cells that match the given solution (a Board or its cell values,
+    # or None to keep the current one) from scratch. It is called when a
+    # board is created and after cells were changed without set_cell.
+    def track(self, solution=None):
+        if solution is not None:
+            self.solution = bytes(getattr(solution, "cells", solution))
+        cells = self.cells
+        g = self.geometry
+        self.unit_counts = counts = [bytearray(self.size + 1) for unit in
+         g.units]
+        for i in range(g.cells):
+            for u in g.units_of[i]:
+                counts[u][cells[i]] += 1
+        self.conflicting = 0
+        for i in range(g.cells):
+            if self.in_conflict(i):
+                self.conflicting |= 1 << i
+        self.matched = 0
+        if self.solution is not None:
+            self.matched = sum(1 for i in range(g.cells) if
+             cells[i] == self.solution[i])
+
+
+    #################### set_cell function ###############
+    # This function changes the value of a cell (0 empties it) and updates
+    # the digit counts, the conflicting cells, and the number of cells that
+    # match the solution. Only the cell and its peers are looked at.
+    def set_cell(self, row, col, val):
+        i = row * self.size + col
+        cells = self.cells
+        old = cells[i]
+        if old == val:
+            return
+        for u in self.geometry.units_of[i]:
+            counts = self.unit_counts[u]
+            counts[old] -= 1
+            counts[val] += 1
+        if self.solution is not None:
+            self.matched += ((val == self.solution[i]) -
+             (old == self.solution[i]))
+        cells[i] = val
+        # only the cell and the peers holding the old or new digit can have
+        # gained or lost a conflict
+        self.update_conflict(i)
+        for p in self.geometry.peers[i]:
+            if cells[p] != 0 and (cells[p] == old or cells[p] == val):
+                self.update_conflict(p)
+
+
+    ################## in_conflict function ##############
+    # This function returns True if the value of cell i appears more than
+    # once in any of the cell's units
+    def in_conflict(self, i):
+        val = self.cells[i]
+        if val == 0:
+            return False
+        for u in self.geometry.units_of[i]:
+            if self.unit_counts[u][val] > 1:
+                return True
+        return False
+
+
+    ################ update_conflict function ############
+    # This function sets or clears the conflicting bit of cell i
+    def update_conflict(self, i):
+        if self.in_conflict(i):
+            self.conflicting |= 1 << i
+        else:
+            self.conflicting &= ~(1 << i)
+
+
+    ################### is_solved function ###############
+    # This function returns True if every cell matches the solution
+    def is_solved(self):
+        return self.matched == self.geometry.cells
@@ -0,0 +1,112 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   budget_class.py
+#
+# Description: This file contains the search budgets. A SearchBudget limits
+#              how many nodes a search can visit and how long it can run, and
+#              can hold a CancelToken that another thread uses to stop the
+#              search early. Both solving engines can be paused after any
+#              number of nodes (see their resume functions), so the budget
+#              runs the search in small slices and checks its limits between
+#              them. The slices are sized by how long the engine's nodes take
+#              (a node on a 25x25 board can cost a thousand times more than
+#              one on a 9x9 board), so the limits are checked about every
+#              CHECK_SECONDS whatever the board. A search that is stopped by
+#              its budget returns None instead of True or False, and the
+#              budget remembers why it was stopped. A budget starts counting
+#              the first time it is used, so every solve should be handed a
+#              new one (a CancelToken can be shared by as many budgets as
+#              needed).
+#
+################################################################################
+
+import threading, time
+from settings import *
+
+
+# Seconds of searching between checks of the time limit and the cancel token
+# (checking is cheap, but not free)
+CHECK_SECONDS = 0.002
+# Most search nodes visited between checks (the first slice is a single node,
+# and each slice is at most twice as long as the one before it)
+CHECK_NODES = 256
+
+# Reasons that a search was stopped by its budget
+OUT_OF_NODES = "nodes" # the search visited max_nodes nodes
+OUT_OF_TIME = "time" # the search ran for longer than the time limit
+CANCELLED = "cancelled" # the search's cancel token was cancelled
+
+
+class CancelToken:
+
+    def __init__(self):
+        self.event = threading.Event() # set once the token is cancelled
+
+
+    ################### cancel function ##################
+    # This function asks every search using the token to stop (they stop
+    # within about CHECK_SECONDS)
+    def cancel(self):
+        self.event.set()
+
+
+    ################# cancelled function #################
+    # This function returns True once the token has been cancelled
+    def cancelled(self):
+        return self.event.is_set()
+
+
+
+class SearchBudget:
+
+    def __init__(self, max_nodes=None, seconds=None, token=None):
+        self.max_nodes = max_nodes # most nodes the search can visit (or None)
+        self.seconds = seconds # most seconds the search can run (or None)
+        self.token = token # CancelToken that can stop the search (or None)
+        self.deadline = None # time.perf_counter() reading the search ends at
+        self.reason = None # why the search was stopped (None if it wasn't)
+        self.slice = 1 # number of nodes in the next slice of the search
+
+
+    ################### search function ##################
+    # This function continues the search of the given engine (a Solver or
+    # DancingLinks that has a board loaded) within the budget. It returns
+    # what the engine's resume returns (True when a solution was found and
+    # False once every branch has been tried), or None if the budget ran out
+    # first, in which case reason says which limit was reached.
+    def search(self, solver):
+        if self.deadline is None and self.seconds is not None:
+            self.deadline = time.perf_counter() + self.seconds
+        while True:
+            nodes = self.slice
+            if self.max_nodes is not None:
+                # the engine counts the nodes visited since its board loaded
+                left = self.max_nodes - solver.nodes
+                if left <= 0:
+                    return self.stop(OUT_OF_NODES)
+                nodes = min(nodes, left)
+            if self.token is not None and self.token.cancelled():
+                return self.stop(CANCELLED)
+            if self.deadline is not None and time.perf_counter() >= \
+             self.deadline:
+                return self.stop(OUT_OF_TIME)
+            began, visited = time.perf_counter(), solver.nodes
+            result = solver.resume(nodes)
+            if result is not None:
+                return result
+            # size the next slice to take about CHECK_SECONDS
+            spent = time.perf_counter() - began
+            visited = solver.nodes - visited
+            wanted = int(visited * CHECK_SECONDS / spent) if spent else \
+             CHECK_NODES
+            self.slice = max(1, min(wanted, 2 * self.slice, CHECK_NODES))
+
+
+    #################### stop function ###################
+    # This function records why the search was stopped and returns None
+    def stop(self, reason):
+        self.reason = reason
+        return None
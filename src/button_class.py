@@ -13,6 +13,7 @@
 
 import pygame
 from settings import *
+import glyph_class as gly
 
 class Button:
     def __init__(self, x, y, width, height, text = None, color = (73, 73, 73),
@@ -30,6 +31,10 @@ class Button:
         self.selected = False # keeps track of whether button was selected
         self.width = width # width of the button
         self.height = height # height of the button
+        # finished button surfaces (color and text already drawn) for each
+        # color that the button has been drawn in (the normal and the hover
+        # color, which the notes and hints buttons swap when toggled)
+        self.surfaces = {}
 
 
     ################### update function ##################
@@ -48,13 +53,18 @@ class Button:
     def draw(self, window):
         # Display the correct color based on whether the mouse position
         # intersects with the inside of the button
-        self.surface.fill(self.background_color if self.selected else
-         self.color)
-        if self.text:
-            # Adds the buttons text (if applicable) to the surface
-            self.add_text_to_surface(self.text)
+        color = self.background_color if self.selected else self.color
+        surface = self.surfaces.get((color, self.text))
+        if surface is None:
+            # the button hasn't been drawn in this color yet
+            surface = self.surface.copy()
+            surface.fill(color)
+            if self.text:
+                # Adds the buttons text (if applicable) to the surface
+                self.add_text_to_surface(surface, self.text)
+            self.surfaces[(color, self.text)] = surface
         # Blit the button and its text to the window
-        window.blit(self.surface, self.pos)
+        window.blit(surface, self.pos)
 
 
     ################### click function ###################
@@ -70,15 +80,15 @@ class Button:
 
 
     ############ add_text_to_surface function ############
-    # Add the button text to the surface of the surface
-    def add_text_to_surface(self, text):
-        # Create a font for the button text
-        font = pygame.font.SysFont("arial", 20, bold=1)
+    # Add the button text to the given surface
+    def add_text_to_surface(self, surface, text):
+        # Get the font for the button text
+        font = gly.glyphs.font("arial", 20, bold=True)
         # Render the font with the button text
-        text = font.render(text, True, BLACK)
+        text = gly.glyphs.render(font, text, BLACK)
         # Find the center of the button (make sure to subtract the text-width
         # and text-height so that it will be correctly centered in the button)
         x = (self.width - text.get_width())//2
         y = (self.height - text.get_height())//2
         # Add the text to the center of the button
-        self.surface.blit(text, (x, y))
+        surface.blit(text, (x, y))
@@ -0,0 +1,138 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   cache_class.py
+#
+# Description: This file contains the persistent puzzle cache. Every puzzle
+#              that gets solved is saved in a SQLite file along with its
+#              solution, how long it took to solve, and its difficulty. Puzzles
+#              are keyed by a hash of their canonical form (see
+#              symmetry_class.py), so a board that has been seen before (even
+#              in an earlier run of the program, or relabeled, reflected, or
+#              shuffled by the website) only costs a single lookup. Once the
+#              cache holds more than its maximum number of puzzles, the least
+#              recently used ones are removed.
+#
+################################################################################
+
+import os, sqlite3, hashlib, threading, time
+from settings import *
+import geometry_class as geo
+import symmetry_class as sym
+
+
+class PuzzleCache:
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries # most puzzles kept in the cache
+        # the cache is used by both the game and the puzzle pool's background
+        # thread, so every query is made while holding this lock
+        self.lock = threading.Lock()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False,
+         isolation_level=None)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS puzzles (
+         key TEXT PRIMARY KEY, puzzle TEXT NOT NULL, solution TEXT NOT NULL,
+         difficulty TEXT, solve_time REAL, last_used REAL NOT NULL)""")
+        self.connection.execute("""CREATE INDEX IF NOT EXISTS puzzles_last_used
+         ON puzzles (last_used)""")
+        self.count = self.connection.execute(
+         "SELECT COUNT(*) FROM puzzles").fetchone()[0] # puzzles in the cache
+
+
+    ################## lookup function ###################
+    # This function returns the cached solution (a list of rows) of the given
+    # board, or None if the board hasn't been cached. The solution is stored in
+    # canonical form, so it is turned back into the board's own layout.
+    def lookup(self, board):
+        text, transform = sym.canonical_form(board)
+        key = board_key(text)
+        with self.lock:
+            if self.connection is None:
+                return None # the cache has been closed
+            row = self.connection.execute(
+             "SELECT solution FROM puzzles WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.touch(key)
+        return sym.untransform_board(text_to_rows(row[0]), transform)
+
+
+    ################### store function ###################
+    # This function saves a board and its solution in the cache, removing the
+    # least recently used puzzles if the cache has grown too large. Nothing is
+    # saved once the cache has been closed (the puzzle pool's thread can still
+    # be finishing a board while the game quits). Both are saved in the
+    # board's canonical form.
+    def store(self, board, solution, solve_time=None, difficulty=None):
+        text, transform = sym.canonical_form(board)
+        key = board_key(text)
+        solution = sym.transform_board(solution, transform)
+        with self.lock:
+            if self.connection is None:
+                return
+            cached = self.connection.execute(
+             "SELECT 1 FROM puzzles WHERE key = ?", (key,)).fetchone()
+            self.connection.execute("""INSERT OR REPLACE INTO puzzles
+             (key, puzzle, solution, difficulty, solve_time, last_used) VALUES
+             (?, ?, ?, ?, ?, ?)""", (key, text,
+             board_text(solution), difficulty, solve_time, time.time()))
+            if cached is None:
+                self.count += 1
+            if self.count > self.max_entries:
+                self.evict(self.count - self.max_entries)
+
+
+    ################### touch function ###################
+    # This function marks a cached puzzle as just used (the lock must already
+    # be held)
+    def touch(self, key):
+        self.connection.execute(
+         "UPDATE puzzles SET last_used = ? WHERE key = ?", (time.time(), key))
+
+
+    ################### evict function ###################
+    # This function removes the given number of least recently used puzzles
+    # (the lock must already be held)
+    def evict(self, amount):
+        self.connection.execute("""DELETE FROM puzzles WHERE key IN (SELECT key
+         FROM puzzles ORDER BY last_used LIMIT ?)""", (amount,))
+        self.count -= amount
+
+
+    ################### close function ###################
+    # This function closes the cache file (the other functions do nothing
+    # once it has been closed)
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+
+############################### HELPER FUNCTIONS ###############################
+
+################# board_text function ################
+# This function converts a board (a Board or a list of rows) into its values
+# as a string, using 0 for the empty cells (see geometry_class.py)
+def board_text(board):
+    return geo.board_text(board)
+
+
+################# board_key function #################
+# This function returns the key that a board is cached under, given its
+# canonical form (as returned by symmetry_class.canonical_form)
+def board_key(text):
+    return hashlib.sha1(text.encode("ascii")).hexdigest()
+
+
+################ text_to_rows function ###############
+# This function converts a string made by board_text back into a list of rows
+def text_to_rows(text):
+    return geo.text_to_rows(text)
+################################################################################
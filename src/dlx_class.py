@@ -0,0 +1,407 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   dlx_class.py
+#
+# Description: This file contains the exact cover solving engine (Knuth's
+#              Algorithm X with dancing links). A Sudoku is an exact cover
+#              problem: every (cell, digit) choice is a row that covers four
+#              constraints (the cell is filled, and the digit is used once in
+#              its row, column, and subgrid), which gives 324 constraints for a
+#              9x9 board. The rows are kept in circular doubly linked lists
+#              stored in flat arrays, and the search always branches on the
+#              constraint with the fewest rows left. The arrays are built once
+#              per board size and reused for every board: a copy of the links
+#              as they were built is kept, and loading a board copies it back
+#              over the arrays (in place) instead of linking the rows again. The
+#              engine has the same solve/count/resume interface as the
+#              backtracking engine in solver_class.py (but can't be saved with
+#              checkpoint), and sudoku_core.py picks between the two.
+#
+################################################################################
+
+from settings import *
+import geometry_class as geo
+
+
+class DancingLinks:
+
+    def __init__(self, size=BOARD_SIZE):
+        self.geometry = None # lookup tables of the loaded board's size
+        self.use_geometry(geo.geometry(size))
+        self.cells = [0] * self.geometry.cells # flattened values (0 = empty)
+        # One entry for every branch point of the search, stored as
+        # [constraint, node of the row being tried]
+        self.stack = []
+        self.found = False # True while the search is stopped at a solution
+        self.exhausted = False # True once every branch has been tried
+        self.nodes = 0 # number of search nodes visited since the board loaded
+        self.backtracks = 0 # number of nodes that turned out to be dead ends
+        # number of cells filled in without a choice (constraints that only had
+        # one row left, the exact cover version of a single)
+        self.propagations = 0
+        self.max_depth = 0 # most branch points on the stack at once
+        self.on_change = None # optional callback for every assign/unassign
+
+
+    #################### solve function ##################
+    # This function solves the provided board (a list of rows) in place. It
+    # returns True if a solution was found and False if the board contains
+    # conflicting values or can't be completed. The optional on_change callback
+    # is called with (row, col, value) each time a cell is assigned or reset.
+    # With a budget (see budget_class.py), None is returned if the budget runs
+    # out before the search is done.
+    def solve(self, board, on_change=None, budget=None):
+        self.on_change = None
+        if not self.load(board):
+            return False
+        # only watch the search once the givens have been loaded
+        if on_change:
+            self.on_change = (lambda i, val:
+             self.write_cell(board, on_change, i, val))
+        solved = self.resume() if budget is None else budget.search(self)
+        self.on_change = None
+        if solved:
+            # copy the solution back into the provided board
+            for i, val in enumerate(self.cells):
+                board[self.row_of[i]][self.col_of[i]] = val
+        return solved
+
+
+    ################ use_geometry function ###############
+    # This function builds the links for another board size. Node 0 is the
+    # root, nodes 1 to 4 * cells are the constraint headers, and the four nodes
+    # of every (cell, digit) row follow them. Each node's left, right, up, and
+    # down neighbors are kept in their own list, along with the constraint
+    # that the node belongs to.
+    def use_geometry(self, geometry):
+        self.geometry = geometry
+        self.size = size = geometry.size
+        self.row_of = geometry.row_of
+        self.col_of = geometry.col_of
+        cells = geometry.cells
+        headers = 4 * cells
+        total = 1 + headers + 4 * cells * size
+        left = list(range(-1, total - 1))
+        right = list(range(1, total + 1))
+        up = list(range(total))
+        down = list(range(total))
+        column = list(range(total))
+        # the root and the headers form their own circular list
+        left[0] = headers
+        right[headers] = 0
+        # rows each constraint still has left
+        self.counts = [0] * (1 + headers)
+        # 1 while a constraint hasn't been covered yet (the root is never
+        # covered, so it is left at 0)
+        self.active = bytearray([0] + [1] * headers)
+        # cell and digit of the row that every node belongs to (as
+        # cell * size + digit - 1)
+        self.choice = [0] * total
+        # first node of every (cell, digit) row
+        self.row_nodes = [0] * (cells * size)
+        node = 1 + headers
+        for i in range(cells):
+            row, col, box = geometry.row_of[i], geometry.col_of[i], \
+             geometry.box_of[i]
+            for d in range(size):
+                self.row_nodes[i * size + d] = node
+                for c in (1 + i, 1 + cells + row * size + d,
+                 1 + 2 * cells + col * size + d,
+                 1 + 3 * cells + box * size + d):
+                    # add the node to the bottom of its constraint's list
+                    up[node] = up[c]
+                    down[node] = c
+                    down[up[c]] = node
+                    up[c] = node
+                    column[node] = c
+                    self.choice[node] = i * size + d
+                    self.counts[c] += 1
+                    node += 1
+                # the four nodes of the row link up in a circle
+                left[node - 4] = node - 1
+                right[node - 1] = node - 4
+        self.left, self.right, self.up, self.down = left, right, up, down
+        self.column = column
+        # Covering only changes the up and down links, the counts, and the
+        # left and right links of the headers, so those are all that has to be
+        # put back to start over (see load)
+        self.built = (up[:], down[:], left[:1 + headers], right[:1 + headers],
+         self.counts[:], self.active[:])
+        self.stack = []
+
+
+    #################### load function ###################
+    # This function resets the engine and loads the given board (of any size)
+    # by selecting the row of every given value. It returns False if any of
+    # the given values conflict with each other.
+    def load(self, board):
+        if len(board) != self.size:
+            self.use_geometry(geo.geometry(len(board)))
+        else:
+            # put the links back the way use_geometry built them
+            up, down, left, right, counts, active = self.built
+            headers = len(left)
+            self.up[:] = up
+            self.down[:] = down
+            self.left[:headers] = left
+            self.right[:headers] = right
+            self.counts[:] = counts
+            self.active[:] = active
+        size = self.size
+        active, column = self.active, self.column
+        self.stack = []
+        self.cells = [0] * self.geometry.cells
+        self.found = False
+        self.exhausted = False
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+        self.max_depth = 0
+        for r, row in enumerate(board):
+            for c, val in enumerate(row):
+                if val != 0:
+                    i = r * size + c
+                    node = self.row_nodes[i * size + val - 1]
+                    # the cell is already filled, or the digit is already used
+                    # in this row, column, or subgrid
+                    if not (active[column[node]] and
+                     active[column[node + 1]] and active[column[node + 2]]
+                     and active[column[node + 3]]):
+                        return False
+                    self.cover(column[node])
+                    self.cover_row(node)
+                    self.cells[i] = val
+        return True
+
+
+    ################## exclude function ##################
+    # This function takes the row of a digit in an empty cell out of the
+    # loaded board's links, so the search never places that digit there (e.g.
+    # to look for a solution other than a known one). Loading the next board
+    # puts the row back.
+    def exclude(self, i, val):
+        up, down, column, counts = self.up, self.down, self.column, self.counts
+        node = self.row_nodes[i * self.size + val - 1]
+        for n in range(node, node + 4):
+            down[up[n]] = down[n]
+            up[down[n]] = up[n]
+            counts[column[n]] -= 1
+
+
+    ################### cover function ###################
+    # This function removes a constraint from the header list along with every
+    # row that satisfies it (from the lists of their other constraints)
+    def cover(self, c):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, counts = self.column, self.counts
+        left[right[c]] = left[c]
+        right[left[c]] = right[c]
+        self.active[c] = 0
+        i = down[c]
+        while i != c:
+            j = right[i]
+            while j != i:
+                up[down[j]] = up[j]
+                down[up[j]] = down[j]
+                counts[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+
+    ################## uncover function ##################
+    # This function puts back a constraint removed by cover (the links are
+    # restored in the reverse order that they were removed in)
+    def uncover(self, c):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, counts = self.column, self.counts
+        i = up[c]
+        while i != c:
+            j = left[i]
+            while j != i:
+                counts[column[j]] += 1
+                up[down[j]] = j
+                down[up[j]] = j
+                j = left[j]
+            i = up[i]
+        left[right[c]] = c
+        right[left[c]] = c
+        self.active[c] = 1
+
+
+    ################# cover_row function #################
+    # This function covers the constraints of the node's row other than the
+    # node's own (the same as calling cover on each of them, written out
+    # because it is the engine's hot loop)
+    def cover_row(self, node):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, counts, active = self.column, self.counts, self.active
+        k = right[node]
+        while k != node:
+            c = column[k]
+            left[right[c]] = left[c]
+            right[left[c]] = right[c]
+            active[c] = 0
+            i = down[c]
+            while i != c:
+                j = right[i]
+                while j != i:
+                    up[down[j]] = up[j]
+                    down[up[j]] = down[j]
+                    counts[column[j]] -= 1
+                    j = right[j]
+                i = down[i]
+            k = right[k]
+
+
+    ################ uncover_row function ################
+    # This function puts back the constraints covered by cover_row (the same
+    # as calling uncover on each of them, in the reverse order)
+    def uncover_row(self, node):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, counts, active = self.column, self.counts, self.active
+        k = left[node]
+        while k != node:
+            c = column[k]
+            i = up[c]
+            while i != c:
+                j = left[i]
+                while j != i:
+                    counts[column[j]] += 1
+                    up[down[j]] = j
+                    down[up[j]] = j
+                    j = left[j]
+                i = up[i]
+            left[right[c]] = c
+            right[left[c]] = c
+            active[c] = 1
+            k = left[k]
+
+
+    ################### select function ##################
+    # This function tries the row of the given node during the search: the
+    # row's other constraints are covered (the node's own constraint is covered
+    # by the branch point) and its digit is placed in its cell
+    def select(self, node):
+        self.cover_row(node)
+        i, d = divmod(self.choice[node], self.size)
+        self.cells[i] = d + 1
+        if self.on_change is not None:
+            self.on_change(i, d + 1)
+
+
+    ################## unselect function #################
+    # This function takes back a row tried by select
+    def unselect(self, node):
+        self.uncover_row(node)
+        i = self.choice[node] // self.size
+        self.cells[i] = 0
+        if self.on_change is not None:
+            self.on_change(i, 0)
+
+
+    ################# write_cell function ################
+    # This function mirrors a single assignment made by the engine onto the
+    # caller's board and notifies the caller's callback.
+    def write_cell(self, board, callback, i, val):
+        row, col = self.row_of[i], self.col_of[i]
+        board[row][col] = val
+        callback(row, col, val)
+
+
+    ################### resume function ##################
+    # This function continues the search of the loaded board. Each node of the
+    # search picks the constraint with the fewest rows left, covers it, and
+    # tries its rows in turn. It returns True when a solution has been found
+    # (it is left in self.cells, and calling resume again continues on to the
+    # next solution), False once every branch has been tried, and None if
+    # max_nodes nodes were visited first, in which case the search can be
+    # continued later by calling resume again.
+    def resume(self, max_nodes=None):
+        if self.exhausted:
+            return False
+        if self.found:
+            # the search stopped at a solution, so move past it
+            self.found = False
+            if not self.next_branch():
+                return False
+        right, down, counts = self.right, self.down, self.counts
+        stack = self.stack
+        visited = 0
+        while max_nodes is None or visited < max_nodes:
+            visited += 1
+            c = right[0]
+            if c == 0:
+                self.nodes += visited
+                self.found = True
+                return True # every constraint has been covered
+            # pick the constraint with the fewest rows left (stopping early
+            # once one with a single row is found)
+            best, best_count = c, counts[c]
+            c = right[c]
+            while c != 0 and best_count > 1:
+                if counts[c] < best_count:
+                    best, best_count = c, counts[c]
+                c = right[c]
+            if best_count:
+                if best_count == 1:
+                    self.propagations += 1
+                self.cover(best)
+                node = down[best]
+                stack.append([best, node])
+                if len(stack) > self.max_depth:
+                    self.max_depth = len(stack)
+                self.select(node)
+                continue
+            # no row satisfies this constraint, so this node can't be solved
+            self.backtracks += 1
+            if not self.next_branch():
+                self.nodes += visited
+                return False
+        self.nodes += visited
+        return None
+
+
+    ################ next_branch function ################
+    # This function backtracks to the most recent branch point that still has
+    # an untried row and selects that row. It returns False once every branch
+    # of the search has been tried.
+    def next_branch(self):
+        down = self.down
+        stack = self.stack
+        while stack:
+            frame = stack[-1]
+            self.unselect(frame[1])
+            node = down[frame[1]]
+            if node != frame[0]:
+                frame[1] = node
+                self.select(node)
+                return True
+            # every row failed, so this branch point can't be solved either
+            self.uncover(frame[0])
+            stack.pop()
+        self.exhausted = True
+        return False
+
+
+    #################### count function ##################
+    # This function counts the solutions of the provided board without
+    # changing it. Counting stops as soon as the limit has been reached, so a
+    # limit of 2 is enough to tell whether a board has a unique solution.
+    # With a budget (see budget_class.py), None is returned if the budget runs
+    # out before the counting is done.
+    def count(self, board, limit=2, budget=None):
+        self.on_change = None
+        if not self.load(board):
+            return 0
+        found = 0
+        while found < limit:
+            result = self.resume() if budget is None else budget.search(self)
+            if result is None:
+                return None
+            if not result:
+                break
+            found += 1
+        return found
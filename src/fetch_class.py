@@ -0,0 +1,208 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   fetch_class.py
+#
+# Description: This file contains the websudoku fetcher, which retrieves
+#              boards from https://nine.websudoku.com (or any server that
+#              serves pages in the same format, like the stand-in in
+#              websudoku_server.py). Every request goes through one shared
+#              session, so connections are kept alive and reused instead of
+#              being opened again for every board, and every request has a
+#              timeout. A request that fails (a network error, a timeout, or
+#              an error status from the server) is tried again after a delay
+#              that doubles each time (up to FETCH_BACKOFF_MAX seconds), and
+#              the fetcher gives up with a FetchError after FETCH_RETRIES
+#              retries. Boards are fetched FETCH_BATCH at a time: the requests
+#              of a batch are run concurrently by an asyncio event loop (on a
+#              small thread pool, since the session blocks), and the boards
+#              that aren't needed yet are kept for the next calls.
+#
+################################################################################
+
+import asyncio, functools, random, threading, time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from settings import *
+import geometry_class as geo
+
+
+# Response statuses that are worth trying again (the server is busy or had a
+# problem of its own); any other error status fails right away
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class FetchError(Exception):
+    pass
+
+
+
+class WebsudokuFetcher:
+
+    def __init__(self, url=WEBSUDOKU_URL, timeout=FETCH_TIMEOUT,
+     retries=FETCH_RETRIES, connections=FETCH_CONNECTIONS, batch=FETCH_BATCH):
+        self.url = url # page that a board is retrieved from
+        self.timeout = timeout # seconds to wait to connect and for each read
+        self.retries = retries # times a failed request is tried again
+        self.connections = connections # most requests running at once
+        self.batch = batch # number of boards fetched together
+        # Session shared by every request. Its adapter keeps up to
+        # `connections` connections to the server open between requests.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # threads that the blocking requests are run on
+        self.executor = ThreadPoolExecutor(connections,
+         thread_name_prefix="websudoku")
+        self.boards = {} # boards fetched ahead of time for each difficulty
+        self.lock = threading.Lock() # guards boards (used by several threads)
+
+
+    #################### fetch function ##################
+    # This function returns a board (a list of rows) of the given difficulty.
+    # A board fetched ahead of time is used if there is one; otherwise a new
+    # batch is fetched. It raises FetchError if none of the batch's requests
+    # worked. The time spent fetching and parsing is added to the optional
+    # stats.
+    def fetch(self, difficulty, stats=None):
+        with self.lock:
+            ready = self.boards.get(difficulty)
+            if ready:
+                return ready.pop()
+        boards = self.fetch_many(difficulty, self.batch, stats)
+        board = boards.pop()
+        with self.lock:
+            self.boards.setdefault(difficulty, []).extend(boards)
+        return board
+
+
+    ################# fetch_many function ################
+    # This function fetches up to count boards of the given difficulty at the
+    # same time and returns the ones that were retrieved. It raises FetchError
+    # if none of them were (whatever went wrong, e.g. a page without a board
+    # or a fetcher that has been closed).
+    def fetch_many(self, difficulty, count, stats=None):
+        began = time.perf_counter()
+        try:
+            pages = asyncio.run(self.fetch_pages(difficulty, count))
+        except Exception as error:
+            raise FetchError("couldn't fetch from {} ({})".format(self.url,
+             error)) from error
+        if stats is not None:
+            stats.add_phase("fetch", began)
+            began = time.perf_counter()
+        boards = []
+        errors = []
+        for page in pages:
+            try:
+                if isinstance(page, BaseException):
+                    raise page
+                boards.append(parse_board(page))
+            except FetchError as error:
+                errors.append(error)
+            except Exception as error:
+                # anything else (e.g. the executor after close) is reported
+                # as a FetchError too, so callers only have to catch that
+                errors.append(FetchError("couldn't fetch from {} ({})".format(
+                 self.url, error)))
+        if stats is not None:
+            stats.add_phase("parse", began)
+        if not boards:
+            # every request failed, so report the first reason
+            raise errors[0]
+        return boards
+
+
+    ################ fetch_pages function ################
+    # This function requests count pages of the given difficulty concurrently.
+    # The list that is returned holds each page's contents, or the exception
+    # that its request ended with (usually a FetchError).
+    async def fetch_pages(self, difficulty, count):
+        limit = asyncio.Semaphore(self.connections)
+        return await asyncio.gather(*(self.fetch_page(difficulty, limit) for
+         _ in range(count)), return_exceptions=True)
+
+
+    ################ fetch_page function #################
+    # This function requests a single page of the given difficulty (at most
+    # `connections` requests are sent at once). Failed requests are tried
+    # again after the backoff delay, and FetchError is raised once the
+    # retries have been used up.
+    async def fetch_page(self, difficulty, limit):
+        loop = asyncio.get_running_loop()
+        # difficulty needs to be parsed in as a string with one digit. 1-4
+        get = functools.partial(self.session.get, self.url,
+         params={"level": difficulty}, timeout=self.timeout)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff(attempt))
+            try:
+                async with limit:
+                    response = await loop.run_in_executor(self.executor, get)
+            except requests.RequestException as error:
+                reason = error
+                continue
+            if response.status_code in RETRY_STATUSES:
+                reason = "status {}".format(response.status_code)
+                continue
+            if response.status_code >= 400:
+                raise FetchError("{} returned status {}".format(self.url,
+                 response.status_code))
+            return response.content
+        raise FetchError("couldn't reach {} after {} attempts ({})".format(
+         self.url, self.retries + 1, reason))
+
+
+    ################### backoff function #################
+    # This function returns the number of seconds to wait before the given
+    # retry: FETCH_BACKOFF doubled for every earlier retry, capped at
+    # FETCH_BACKOFF_MAX. Each wait is cut by a random amount (up to half), so
+    # requests that failed together don't all retry at the same moment.
+    def backoff(self, attempt):
+        delay = min(FETCH_BACKOFF * 2 ** (attempt - 1), FETCH_BACKOFF_MAX)
+        return delay * random.uniform(0.5, 1)
+
+
+    #################### close function ##################
+    # This function closes the kept-alive connections and the request threads
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+
+############################### HELPER FUNCTIONS ###############################
+
+################ parse_board function ################
+# This function turns the contents of a websudoku page into a board (a list of
+# rows). Every cell is an input with an id of f followed by its row and column
+# (f00 through f88), and the givens have their value filled in. FetchError is
+# raised if the page doesn't have any givens (e.g. an error page), since
+# trying to play it would only fail again.
+def parse_board(page):
+    # parse the contents of the webpage into a readable/retrievable format
+    soup = BeautifulSoup(page, "html.parser")
+    # the website only has 9x9 boards
+    g = geo.geometry(WEBSUDOKU_SIZE)
+    # value of every input, by id (one pass over the page instead of a search
+    # for each cell)
+    values = {cell.get("id", "").lower(): cell.get("value") for cell in
+     soup.find_all("input")}
+    board = [[0] * g.size for _ in range(g.size)]
+    givens = 0
+    for i in range(g.cells):
+        row, col = g.row_of[i], g.col_of[i]
+        value = values.get("f{}{}".format(row, col))
+        # substitute in non-zero id values into the board
+        if value and value.isdigit() and 0 < int(value) <= g.size:
+            board[row][col] = int(value)
+            givens += 1
+    if not givens:
+        raise FetchError("the page doesn't have a board on it")
+    return board
+################################################################################
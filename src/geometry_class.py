@@ -0,0 +1,144 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   geometry_class.py
+#
+# Description: This file contains the board geometry. A board with N rows has
+#              N columns, N digits, and N subgrids (3x3 subgrids for 9x9
+#              boards, 4x4 for 16x16, 5x5 for 25x25, and 2x3 for 6x6). The
+#              Geometry of a size holds the lookup tables that everything else
+#              is built on (the row, column, and subgrid of every cell, the
+#              cells of every unit, and the peers of every cell). The tables
+#              only depend on the size, so geometry() builds them once per size
+#              and every board, solver, and renderer of that size shares them.
+#              This file also converts boards to and from text, where values
+#              above 9 are written as letters (A = 10, B = 11, and so on).
+#
+################################################################################
+
+import math, threading
+from settings import *
+
+
+# Largest board (in rows) whose candidates are counted with a lookup table
+# (bigger boards count the bits of each mask instead)
+POPCOUNT_TABLE_SIZE = 16
+# Value of every character that can appear in a board's text (see SYMBOLS in
+# settings.py), where a period can also be used for an empty cell
+SYMBOL_VALUES = {char: val for val, char in enumerate(SYMBOLS)}
+SYMBOL_VALUES["."] = 0
+
+# Every geometry built so far, keyed by size
+geometries = {}
+# Lock held while a geometry is built (boards are made on several threads)
+geometries_lock = threading.Lock()
+
+
+class Geometry:
+
+    def __init__(self, size):
+        if not 0 < size < len(SYMBOLS):
+            raise ValueError("board size must be between 1 and {}".format(
+             len(SYMBOLS) - 1))
+        # the subgrids are as close to square as the size allows
+        box_height = max(d for d in range(1, math.isqrt(size) + 1)
+         if size % d == 0)
+        self.size = size # number of rows, columns, and digits
+        self.box_height = box_height # number of rows in each subgrid
+        self.box_width = size // box_height # number of columns in each subgrid
+        self.cells = size * size # number of cells on the board
+        # mask with one bit set for every digit (bit d - 1 = digit d)
+        self.full_mask = (1 << size) - 1
+        # row, column, and subgrid index of every cell on the board
+        self.row_of = [i // size for i in range(self.cells)]
+        self.col_of = [i % size for i in range(self.cells)]
+        self.box_of = [(i // size) // box_height * box_height +
+         (i % size) // self.box_width for i in range(self.cells)]
+        # cell indices that make up every row, column, and subgrid (3N units)
+        self.units = tuple(
+         [tuple(i for i in range(self.cells) if self.row_of[i] == r)
+          for r in range(size)] +
+         [tuple(i for i in range(self.cells) if self.col_of[i] == c)
+          for c in range(size)] +
+         [tuple(i for i in range(self.cells) if self.box_of[i] == b)
+          for b in range(size)])
+        # the units (indices into units) that each cell belongs to, stored as
+        # (row unit, column unit, subgrid unit)
+        self.units_of = tuple((self.row_of[i], size + self.col_of[i],
+         2 * size + self.box_of[i]) for i in range(self.cells))
+        # the other cells that share a row, column, or subgrid with each cell
+        # (20 for a 9x9 board)
+        self.peers = tuple(tuple(sorted({p for u in self.units_of[i] for p in
+         self.units[u]} - {i})) for i in range(self.cells))
+        # every place where a subgrid crosses a row or column, stored as the
+        # shared cells, the rest of the subgrid, and the rest of the row or
+        # column (used to find locked candidates)
+        self.intersections = tuple((shared,
+         tuple(i for i in box if i not in shared),
+         tuple(i for i in line if i not in shared))
+         for box in self.units[2 * size:] for line in self.units[:2 * size]
+         for shared in [tuple(i for i in box if i in line)] if shared)
+        # digit represented by each single-bit mask
+        self.digit_of_bit = {1 << (d - 1): d for d in range(1, size + 1)}
+        # function returning the number of candidates held by a mask (a table
+        # lookup when the table is small enough to build)
+        if size <= POPCOUNT_TABLE_SIZE:
+            self.popcount = [bin(mask).count("1") for mask in
+             range(self.full_mask + 1)].__getitem__
+        else:
+            self.popcount = lambda mask: bin(mask).count("1")
+
+
+
+############################### HELPER FUNCTIONS ###############################
+
+################## geometry function #################
+# This function returns the (shared) geometry of boards with the given number
+# of rows, building it the first time it is asked for
+def geometry(size=BOARD_SIZE):
+    found = geometries.get(size)
+    if found is None:
+        with geometries_lock:
+            found = geometries.get(size)
+            if found is None:
+                found = geometries[size] = Geometry(size)
+    return found
+
+
+################# size_of_text function ##############
+# This function returns the board size of a puzzle written as text with the
+# given number of characters (e.g. 81 for 9x9), or None if no board has that
+# many cells
+def size_of_text(length):
+    size = math.isqrt(length)
+    if size * size != length or not 0 < size < len(SYMBOLS):
+        return None
+    return size
+
+
+################# board_text function ################
+# This function converts a board (a Board or a list of rows) into a string
+# holding one character per cell, using 0 for the empty cells
+def board_text(board):
+    return "".join(SYMBOLS[val] for row in board for val in row)
+
+
+################ text_to_rows function ###############
+# This function converts a string made by board_text back into a list of rows.
+# Empty cells can also be written as a period, and letters can be lowercase.
+# It returns None if the text isn't a valid board.
+def text_to_rows(text):
+    size = size_of_text(len(text))
+    if size is None:
+        return None
+    values = []
+    for char in text.upper():
+        val = SYMBOL_VALUES.get(char)
+        if val is None or val > size:
+            return None
+        values.append(val)
+    return [values[row * size:(row + 1) * size] for row in range(size)]
+
+################################################################################
@@ -0,0 +1,59 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   glyph_class.py
+#
+# Description: This file contains the glyph cache. Rendering text with a font
+#              is slow compared to blitting a surface, and the game only ever
+#              shows a handful of different strings (the digits 1-9 in a few
+#              colors, the notes, and the button labels), so every string is
+#              rendered once and the finished surface is reused from then on.
+#              Fonts are cached as well, since loading a system font means
+#              searching for it on disk.
+#
+################################################################################
+
+import pygame
+from settings import *
+
+
+class GlyphCache:
+
+    def __init__(self):
+        # rendered text surfaces keyed by (text, color, font)
+        self.glyphs = {}
+        # loaded fonts keyed by (name, size, bold)
+        self.fonts = {}
+
+
+    ##################### font function ##################
+    # This function returns the system font with the given name and size
+    # (loading it the first time it is asked for)
+    def font(self, name, size, bold=False):
+        key = (name, size, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size, bold=bold)
+            self.fonts[key] = font
+        return font
+
+
+    #################### render function #################
+    # This function returns the given text rendered with the given font and
+    # color (rendering it the first time it is asked for). The surface that is
+    # returned is shared, so it must not be drawn on.
+    def render(self, font, text, color):
+        key = (text, color, font)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            glyph = font.render(text, True, color)
+            self.glyphs[key] = glyph
+        return glyph
+
+
+
+# glyph cache shared by the game and its buttons
+glyphs = GlyphCache()
+################################################################################
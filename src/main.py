@@ -1,5 +1,31 @@
+import sys, argparse
 from app_class import *
 
+# Largest board that fits the window (the cells of a 25x25 board are 18 pixels)
+MAX_SIZE = 25
+
+
+################### board_size function ##################
+# This function checks the board size given on the command line. The size has
+# to split into subgrids with at least two rows and two columns (e.g. 4, 6, 9,
+# or 16), since a prime size would leave every subgrid a single row.
+def board_size(text):
+    try:
+        size = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("{!r} isn't a number".format(text))
+    if not 4 <= size <= MAX_SIZE or geo.geometry(size).box_height < 2:
+        raise argparse.ArgumentTypeError("{} isn't a supported size (use a "
+         "size from 4 to {} that isn't prime, e.g. 4, 6, 9, or 16)".format(
+         size, MAX_SIZE))
+    return size
+
+
 if __name__ == "__main__":
-    app = App()
+    # the board size can be given on the command line (e.g. python main.py 16)
+    parser = argparse.ArgumentParser(description="Play Sudoku.")
+    parser.add_argument("size", nargs="?", type=board_size, default=BOARD_SIZE,
+     help="number of rows, columns, and digits on the board (default: "
+     "{})".format(BOARD_SIZE))
+    app = App(parser.parse_args().size)
     app.run()
@@ -0,0 +1,105 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   pool_class.py
+#
+# Description: This file contains the puzzle pool. A background thread keeps a
+#              small queue of ready-to-play boards (each one stored with its
+#              solution) for every difficulty level, so starting a new game
+#              only has to take a board off of a queue. The queues are topped
+#              back up as boards are used.
+#
+################################################################################
+
+import threading, queue
+from settings import *
+
+
+class PuzzlePool:
+
+    def __init__(self, source, difficulties=DIFFICULTIES, size=POOL_SIZE):
+        # function called with a difficulty that returns a (puzzle, solution)
+        # pair, or None if a board couldn't be made this time
+        self.source = source
+        # queue of ready-to-play boards for each difficulty
+        self.queues = {difficulty: queue.Queue(size) for difficulty in
+         difficulties}
+        self.wanted = threading.Event() # set whenever a board is taken
+        # difficulty that a board was asked for while its queue was empty (it
+        # is made before any other board)
+        self.requested = None
+        self.running = False # tells the background thread when to stop
+        self.thread = None # background thread that fills the queues
+
+
+    #################### start function ##################
+    # This function starts the background thread that fills the queues
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.fill, name="puzzle-pool",
+         daemon=True)
+        self.thread.start()
+
+
+    #################### stop function ###################
+    # This function tells the background thread to stop and waits (briefly)
+    # for it to finish the board it is working on
+    def stop(self):
+        self.running = False
+        self.wanted.set() # wake the thread up if it is waiting
+        if self.thread:
+            self.thread.join(POOL_STOP_TIMEOUT)
+
+
+    ##################### get function ###################
+    # This function returns a (puzzle, solution) pair for the given difficulty.
+    # A board is taken off of the queue if one is ready; otherwise (e.g. right
+    # after the program starts) one is made on the spot, unless wait is False,
+    # in which case None is returned. None is also returned if no board could
+    # be made in POOL_GET_ATTEMPTS tries.
+    def get(self, difficulty, wait=True):
+        try:
+            board = self.queues[difficulty].get_nowait()
+        except queue.Empty:
+            board = None
+            self.requested = difficulty
+        self.wanted.set() # let the background thread know to refill
+        attempts = POOL_GET_ATTEMPTS if wait else 0
+        while board is None and attempts:
+            board = self.source(difficulty)
+            attempts -= 1
+        return board
+
+
+    ##################### fill function ##################
+    # This function runs on the background thread. It keeps adding boards to
+    # whichever queue is the emptiest, and waits for a board to be taken once
+    # every queue is full. A board that was asked for while its queue was empty
+    # is made first.
+    def fill(self):
+        while self.running:
+            difficulty = self.requested
+            if difficulty is None or not self.queues[difficulty].empty():
+                difficulty = min(self.queues, key=lambda d:
+                 self.queues[d].qsize())
+            if self.queues[difficulty].full():
+                # every queue is full, so wait until a board is taken
+                self.wanted.wait()
+                self.wanted.clear()
+                continue
+            try:
+                board = self.source(difficulty)
+            except Exception as error:
+                # don't let one bad board stop the pool (e.g. a network error)
+                print(f"Error filling the puzzle pool: {error}")
+                self.wanted.wait(POOL_RETRY_DELAY)
+                continue
+            if board is not None:
+                try:
+                    self.queues[difficulty].put_nowait(board)
+                except queue.Full:
+                    pass
+                if self.requested == difficulty:
+                    self.requested = None
@@ -0,0 +1,452 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   puzzle_generator.py
+#
+# Description: This file contains the offline puzzle generator. It fills in a
+#              random finished board, removes values for as long as the
+#              puzzle keeps a unique solution, and rates the result by the
+#              hardest technique a human needs to solve it and by how many of
+#              its values are given:
+#
+#                1 (Easy)   - hidden singles only, at least 34 givens
+#                2 (Medium) - hidden and naked singles, at least 28 givens
+#                3 (Hard)   - locked candidates and naked/hidden pairs (or
+#                             singles with fewer than 28 givens)
+#                4 (Evil)   - anything beyond that
+#
+#              (the numbers of givens are for 9x9 boards, and are scaled to
+#              the number of cells on other sizes). Puzzles can be made for any
+#              board size (see geometry_class.py). Nothing in this file needs
+#              a network connection or pygame.
+#
+################################################################################
+
+import random
+from settings import *
+import solver_class as slv
+import dlx_class as dlx
+import geometry_class as geo
+import budget_class as bud
+
+
+############################### LOOKUP TABLES ##################################
+# Number of dead ends (per cell) that randomly filling in an empty board can
+# run into before it is started over (9x9 boards rarely run into more than a
+# few, while 25x25 boards almost always get stuck)
+FILL_DEAD_ENDS_PER_CELL = 20
+# Number of times an empty board is randomly filled in before a seeded board
+# is solved by the solving engine instead
+FILL_ATTEMPTS = 4
+# Number of search nodes (per cell) spent on solving a seeded board before
+# giving up on it and placing new givens (on big boards a few unlucky seeds
+# take far longer to solve than the rest)
+SEED_NODES_PER_CELL = 2
+# Number of puzzles dug out of one finished board before a new one is made
+PUZZLES_PER_SOLUTION = 4
+# Number of search nodes that looking for a second solution of an Evil puzzle
+# can take before the removal being checked is given up on (almost every
+# search on a 9x9 board takes fewer than 30 nodes, but on 16x16 and 25x25
+# boards a few removals leave puzzles that take minutes to search)
+DIG_COUNT_NODES = 2000
+# Fewest givens (per 81 cells) that a puzzle of each difficulty is dug down
+# to. A puzzle with fewer givens than the Easy or Medium minimum is rated at
+# least one level harder, whatever techniques it needs (see clue_level).
+MIN_CLUES = {1: 34, 2: 28, 3: 25, 4: 0}
+################################################################################
+
+
+
+############################### GRADING FUNCTIONS ##############################
+
+############## place_digit function ##################
+# This function places a digit in a cell and removes it from the candidates of
+# every peer of that cell
+def place_digit(g, cells, cand, i, bit):
+    cells[i] = g.digit_of_bit[bit]
+    cand[i] = 0
+    for p in g.peers[i]:
+        cand[p] &= ~bit
+
+
+############### hidden_single function ###############
+# This function places every digit that only fits in one cell of a unit. It
+# returns True if any digits were placed.
+def hidden_single(g, cells, cand):
+    placed = False
+    for unit in g.units:
+        once = twice = 0
+        for i in unit:
+            twice |= once & cand[i]
+            once |= cand[i]
+        singles = once & ~twice
+        if singles:
+            for i in unit:
+                # (a placement earlier in this pass may have taken the digit)
+                bit = cand[i] & singles
+                if bit and bit & (bit - 1) == 0:
+                    place_digit(g, cells, cand, i, bit)
+                    placed = True
+    return placed
+
+
+############### naked_single function ################
+# This function places the digit of one cell that only has one candidate. It
+# returns True if a digit was placed.
+def naked_single(g, cells, cand):
+    for i in range(g.cells):
+        mask = cand[i]
+        if mask and mask & (mask - 1) == 0:
+            place_digit(g, cells, cand, i, mask)
+            return True
+    return False
+
+
+############ locked_candidates function ##############
+# This function looks for a digit that is confined to one row or column within
+# a subgrid (pointing), or to one subgrid within a row or column (claiming),
+# and removes it from the rest of the other unit. It returns True if any
+# candidates were removed.
+def locked_candidates(g, cand):
+    removed = False
+    for shared, box_rest, line_rest in g.intersections:
+        inside = rest_of_box = rest_of_line = 0
+        for i in shared:
+            inside |= cand[i]
+        if not inside:
+            continue
+        for i in box_rest:
+            rest_of_box |= cand[i]
+        for i in line_rest:
+            rest_of_line |= cand[i]
+        # pointing: digits only in the shared cells of the subgrid
+        # claiming: digits only in the shared cells of the row/col
+        for digits, rest in ((inside & ~rest_of_box, line_rest),
+         (inside & ~rest_of_line, box_rest)):
+            if digits:
+                for i in rest:
+                    if cand[i] & digits:
+                        cand[i] &= ~digits
+                        removed = True
+    return removed
+
+
+################# pairs function #####################
+# This function looks for naked pairs (two cells in a unit holding the same
+# two candidates) and hidden pairs (two digits that only fit the same two
+# cells of a unit) and removes the candidates they rule out. It returns True
+# if any candidates were removed.
+def pairs(g, cand):
+    popcount = g.popcount
+    removed = False
+    for unit in g.units:
+        # naked pairs
+        seen = {}
+        for i in unit:
+            if popcount(cand[i]) == 2:
+                if cand[i] in seen:
+                    pair = cand[i]
+                    for j in unit:
+                        if j != i and j != seen[pair] and cand[j] & pair:
+                            cand[j] &= ~pair
+                            removed = True
+                else:
+                    seen[cand[i]] = i
+        # hidden pairs (only digits that fit exactly two cells can form one)
+        once = twice = thrice = 0
+        for i in unit:
+            thrice |= twice & cand[i]
+            twice |= once & cand[i]
+            once |= cand[i]
+        doubles = twice & ~thrice
+        if popcount(doubles) < 2:
+            continue
+        spots = {}
+        while doubles:
+            bit = doubles & -doubles
+            doubles ^= bit
+            where = tuple(i for i in unit if cand[i] & bit)
+            spots[where] = spots.get(where, 0) | bit
+        for where, digits in spots.items():
+            if popcount(digits) == 2:
+                for i in where:
+                    if cand[i] & ~digits:
+                        cand[i] &= digits
+                        removed = True
+    return removed
+
+
+################### grade function ###################
+# This function solves the board the way a person would (easiest technique
+# first) and returns the difficulty level (1-4) of the hardest technique that
+# was needed. The board is a list of rows (of any size) and isn't changed.
+def grade(board):
+    g = geo.geometry(len(board))
+    cells = [val for row in board for val in row]
+    cand = [0] * g.cells
+    for i in range(g.cells):
+        if cells[i] == 0:
+            cand[i] = g.full_mask
+    for i in range(g.cells):
+        if cells[i] != 0:
+            for p in g.peers[i]:
+                cand[p] &= ~(1 << (cells[i] - 1))
+    level = 1
+    while 0 in cells:
+        if hidden_single(g, cells, cand):
+            continue
+        if naked_single(g, cells, cand):
+            level = max(level, 2)
+            continue
+        if locked_candidates(g, cand) or pairs(g, cand):
+            level = 3
+            continue
+        return 4 # a harder technique (or guessing) is needed
+    return level
+
+
+################ clue_level function #################
+# This function returns the difficulty level (1-3) that a puzzle with the
+# given number of givens (out of cells cells) is rated at least, going by
+# MIN_CLUES
+def clue_level(givens, cells):
+    for level in (1, 2):
+        if givens >= min_givens(level, cells):
+            return level
+    return 3
+
+
+################ min_givens function #################
+# This function returns the MIN_CLUES of the level, scaled from 81 cells to
+# the given number of cells (and rounded up)
+def min_givens(level, cells):
+    return -(-MIN_CLUES[level] * cells // 81)
+
+
+#################### rate function ###################
+# This function returns the difficulty (1-4) of a puzzle (a list of rows): the
+# level of the hardest technique needed to solve it, raised to the level that
+# its number of givens calls for
+def rate(board):
+    givens = sum(1 for row in board for val in row if val)
+    return max(grade(board), clue_level(givens, len(board) ** 2))
+################################################################################
+
+
+
+############################# GENERATING FUNCTIONS #############################
+
+############### random_fill function ################
+# This function fills in an empty board of the given geometry one cell at a
+# time (row by row), trying the digits that fit each cell in a random order and
+# backing up to the previous cell whenever none are left. It returns the
+# finished board as a flat list of values, or None if it runs into more than
+# FILL_DEAD_ENDS_PER_CELL dead ends per cell.
+def random_fill(rng, g):
+    row_of, col_of, box_of = g.row_of, g.col_of, g.box_of
+    bits = list(g.digit_of_bit)
+    cells = [0] * g.cells
+    rows = [0] * g.size # digits used in each row
+    cols = [0] * g.size # digits used in each column
+    boxes = [0] * g.size # digits used in each subgrid
+    # digits that haven't been tried yet in each cell (None until the fill
+    # gets to the cell)
+    untried = [None] * g.cells
+    dead_ends = 0
+    i = 0
+    while i < g.cells:
+        r, c, b = row_of[i], col_of[i], box_of[i]
+        if untried[i] is None:
+            free = g.full_mask & ~(rows[r] | cols[c] | boxes[b])
+            untried[i] = [bit for bit in bits if bit & free]
+            rng.shuffle(untried[i])
+        else:
+            # the fill backed up to this cell, so take back its digit
+            bit = 1 << (cells[i] - 1)
+            rows[r] ^= bit
+            cols[c] ^= bit
+            boxes[b] ^= bit
+            cells[i] = 0
+        if not untried[i]:
+            untried[i] = None
+            dead_ends += 1
+            if dead_ends > FILL_DEAD_ENDS_PER_CELL * g.cells:
+                return None
+            i -= 1
+            continue
+        bit = untried[i].pop()
+        cells[i] = g.digit_of_bit[bit]
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        i += 1
+    return cells
+
+
+############## random_solution function ##############
+# This function returns a random finished board of the given geometry as a
+# flat list of values. The board is filled in at random (see random_fill),
+# which is quick up to 16x16. If that keeps getting stuck (as it does on 25x25
+# boards), the subgrids along the diagonal (which don't share any rows or
+# columns) are filled with random digits instead, and the rest of the board
+# is solved by the solving engine. Seeds that take too long to solve are
+# thrown away.
+def random_solution(rng, g):
+    for attempt in range(FILL_ATTEMPTS):
+        cells = random_fill(rng, g)
+        if cells is not None:
+            return cells
+    solver = slv.Solver(g.size)
+    height, width = g.box_height, g.box_width
+    while True:
+        board = [[0] * g.size for x in range(g.size)]
+        for box in range(min(g.size // height, g.size // width)):
+            digits = rng.sample(range(1, g.size + 1), g.size)
+            for n, val in enumerate(digits):
+                board[box * height + n // width][box * width + n % width] = val
+        if solver.load(board) and solver.resume(SEED_NODES_PER_CELL *
+         g.cells):
+            return list(solver.cells)
+
+
+############### remove_forced function ###############
+# This function makes the first pass of dig_puzzle. It goes through the cells
+# in the given order and removes each value that the remaining givens still
+# force: a digit that doesn't fit any other empty cell of one of its units (a
+# hidden single), or, if naked is True, the only digit that fits its cell (a
+# naked single). A person would fill such a value straight back in, so the
+# puzzle keeps its unique solution and doesn't get any harder to solve, and
+# checking it only looks at the cell's units instead of solving the puzzle.
+# Nothing is removed once the puzzle is down to floor givens. It returns the
+# puzzle as a flat list of values, along with the cells that kept their values
+# (in the same order).
+def remove_forced(solution, order, naked, floor, g):
+    row_of, col_of, box_of = g.row_of, g.col_of, g.box_of
+    units, units_of = g.units, g.units_of
+    full = g.full_mask
+    cells = list(solution)
+    rows = [full] * g.size # digits given in each row
+    cols = [full] * g.size # digits given in each column
+    boxes = [full] * g.size # digits given in each subgrid
+    givens = g.cells
+    kept = []
+    for i in order:
+        if givens <= floor:
+            kept.append(i)
+            continue
+        bit = 1 << (cells[i] - 1)
+        r, c, b = row_of[i], col_of[i], box_of[i]
+        cells[i] = 0
+        rows[r] ^= bit
+        cols[c] ^= bit
+        boxes[b] ^= bit
+        forced = naked and (full & ~(rows[r] | cols[c] | boxes[b])) == bit
+        for u in units_of[i]:
+            if forced:
+                break
+            for j in units[u]:
+                if cells[j] == 0 and j != i and not (rows[row_of[j]] |
+                 cols[col_of[j]] | boxes[box_of[j]]) & bit:
+                    break # the digit fits another cell of the unit
+            else:
+                forced = True
+        if forced:
+            givens -= 1
+            continue
+        cells[i] = solution[i]
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        kept.append(i)
+    return cells, kept
+
+
+############### other_solution function ##############
+# This function returns True if the puzzle (a list of rows whose cell i was
+# just emptied) has a solution without val in cell i, which means that
+# removing val gave it a second solution. The engine (a DancingLinks) only
+# has to find one solution instead of counting two. A search that runs past
+# DIG_COUNT_NODES nodes (or is cancelled by the optional token) counts as
+# finding one.
+def other_solution(engine, puzzle, i, val, token=None):
+    engine.load(puzzle)
+    engine.exclude(i, val)
+    budget = bud.SearchBudget(max_nodes=DIG_COUNT_NODES, token=token)
+    return budget.search(engine) is not False
+
+
+############### dig_puzzle function ##################
+# This function removes values from a finished board (in a random order)
+# until the puzzle reaches the requested difficulty (see rate), or until
+# nothing else can go without making it too hard or giving it a second
+# solution. It returns the puzzle as a list of rows, or None if the optional
+# CancelToken is cancelled. The first pass only removes values that the other
+# givens force (see remove_forced), which is all Easy puzzles need. For the
+# other levels, the values that the first pass kept are tried once more, each
+# removal checked by grading the whole puzzle (levels 2 and 3), or for Evil by
+# looking for a second solution with the optional engine (see
+# other_solution). Medium and Hard puzzles are dug down to a random number of
+# givens within their level's range (see MIN_CLUES), so they vary in how much
+# is given away, while Easy and Evil puzzles lose everything they can.
+def dig_puzzle(solution, level, rng, g, token=None, engine=None):
+    row_of, col_of = g.row_of, g.col_of
+    order = list(range(g.cells))
+    rng.shuffle(order)
+    floor = min_givens(level, g.cells)
+    if level in (2, 3):
+        floor = rng.randint(floor, min_givens(level - 1, g.cells) - 1)
+    cells, kept = remove_forced(solution, order, level > 1, floor, g)
+    puzzle = [cells[r * g.size:(r + 1) * g.size] for r in range(g.size)]
+    if level == 1:
+        return puzzle
+    if level == 4 and engine is None:
+        engine = dlx.DancingLinks(g.size)
+    givens = len(kept)
+    for i in kept:
+        if givens <= floor:
+            break
+        if token is not None and token.cancelled():
+            return None
+        puzzle[row_of[i]][col_of[i]] = 0
+        if level < 4:
+            removed = grade(puzzle) <= level
+        else:
+            removed = not other_solution(engine, puzzle, i, solution[i], token)
+        if removed:
+            givens -= 1
+        else:
+            # put the value back since the puzzle got too hard (or isn't
+            # unique anymore)
+            puzzle[row_of[i]][col_of[i]] = solution[i]
+    if token is not None and token.cancelled():
+        return None
+    return puzzle
+
+
+################# generate function ##################
+# This function generates a puzzle with a unique solution for the given
+# difficulty (1-4, as an int or a one-digit string like the difficulty
+# buttons use) and board size. It returns the puzzle and its solution as lists
+# of rows, or None if the optional CancelToken (see budget_class.py) is
+# cancelled first, which lets the game quit without waiting for a big board.
+def generate(difficulty, rng=None, size=BOARD_SIZE, token=None):
+    level = int(difficulty)
+    rng = rng or random.Random()
+    g = geo.geometry(size)
+    # every Evil puzzle's removals are checked with the same engine (building
+    # its links takes a few milliseconds)
+    engine = dlx.DancingLinks(size) if level == 4 else None
+    while token is None or not token.cancelled():
+        solution = random_solution(rng, g)
+        # several puzzles can usually be dug out of the same finished board
+        for attempt in range(PUZZLES_PER_SOLUTION):
+            puzzle = dig_puzzle(solution, level, rng, g, token, engine)
+            if puzzle is None:
+                return None
+            if rate(puzzle) == level:
+                return puzzle, [solution[r * size:(r + 1) * size]
+                 for r in range(size)]
+    return None
+################################################################################
@@ -10,18 +10,83 @@
 #
 ################################################################################
 
+import os
+
 ############################### GENERAL CONSTANTS ##############################
 # General window/sudoku-related constants
 WIDTH = 600 # width of the window
 HEIGHT = 600 # height of the window
 GRID_POS = (75, 75) # position of the Sudoku grid on the screen
-CELL_SIZE = 50 # size of each cell on the Sudoku grid
-GRID_SIZE = CELL_SIZE * 9 # size of the entire Sudoku grid
-SUBGRID_WIDTH = 3 # width of each subgrid on the Sudoku
-SUBGRID_HEIGHT = 3 # height of each subgrid on the Sudoku
-ROWS = 9 # number of rows in the Sudoku
-COLS = 9 # number of columns in the Sudoku
-NUMS = 9 # number of digits available to input into the Sudoku  (1-9)
+# space set aside for the Sudoku grid on the screen (the cells are sized to fit
+# it, so the grid itself can come out a few pixels smaller)
+GRID_SIZE = 450
+TEXT_FONT_SIZE = 25 # size of the prompt and elapsed time text
+# Number of rows, columns, and digits of a new Sudoku (e.g. 9, 16, or 25). The
+# subgrids are as close to square as possible (3x3 for 9x9, 4x4 for 16x16).
+# The game can also be started with another size: python main.py 16
+BOARD_SIZE = 9
+# Character used for every value when a board is written as text (0 = empty,
+# and values above 9 are written as letters)
+SYMBOLS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# Where new Sudoku boards come from: "generator" creates them offline and
+# "websudoku" retrieves them from https://nine.websudoku.com
+PUZZLE_SOURCE = "generator"
+WEBSUDOKU_SIZE = 9 # size of the boards on websudoku.com (others are generated)
+# page that websudoku boards are retrieved from (point it at a local
+# websudoku_server.py to play without a network connection)
+WEBSUDOKU_URL = "https://nine.websudoku.com/"
+# Engine used to solve and count boards: "backtracking" (fills in singles and
+# branches on the cell with the fewest candidates, fastest on easy boards) or
+# "dlx" (exact cover with dancing links, faster at enumerating many solutions
+# and on hard boards)
+SOLVER_BACKEND = "backtracking"
+DIFFICULTIES = ("1", "2", "3", "4") # difficulty levels (Easy, Medium, etc.)
+FPS = 30 # most frames drawn per second (0 removes the limit)
+# Speeds (cells filled in per second) that a solve can be shown at, and the
+# speed that is used when a solve starts
+SOLVE_SPEEDS = (10, 30, 100, 300, 1000, 3000, 10000)
+SOLVE_SPEED = 1
+
+# Puzzle pool-related constants
+POOL_SIZE = 3 # number of ready-to-play boards kept for each difficulty
+POOL_RETRY_DELAY = 1 # seconds to wait after failing to make a board
+POOL_STOP_TIMEOUT = 2 # seconds to wait for the pool thread when quitting
+# most boards that are made on the spot when the pool is asked for a board it
+# doesn't have (e.g. the websudoku boards keep turning out unsolvable)
+POOL_GET_ATTEMPTS = 5
+
+# Websudoku fetcher-related constants (see fetch_class.py)
+FETCH_TIMEOUT = 5 # seconds to wait to connect to the website and for each read
+FETCH_RETRIES = 3 # times a failed request is tried again before giving up
+FETCH_BACKOFF = 0.5 # seconds to wait before the first retry (doubled after it)
+FETCH_BACKOFF_MAX = 4 # most seconds to wait before any retry
+FETCH_CONNECTIONS = 4 # most requests (and kept-alive connections) at once
+FETCH_BATCH = 3 # number of boards fetched together when none are left
+
+# folder holding the bundled corpora of puzzles (one .txt file per corpus,
+# see batch.load_corpus)
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+ "corpora")
+
+# Puzzle cache-related constants
+# file that solved puzzles are saved in (kept in the user's cache folder,
+# $XDG_CACHE_HOME or ~/.cache, which is created if it doesn't exist yet)
+CACHE_PATH = os.path.join(os.environ.get("XDG_CACHE_HOME") or
+ os.path.join(os.path.expanduser("~"), ".cache"), "sudoku",
+ "puzzle_cache.sqlite3")
+CACHE_MAX_ENTRIES = 10000 # most puzzles kept in the cache
+SYMMETRY_MAX_ENTRIES = 100000 # most solutions kept in the symmetry index
+
+# Solve statistics-related constants
+# JSON-lines file that the statistics of every board made by the game are
+# appended to (see stats_class.py). None turns the statistics off.
+STATS_LOG = None
+
+# Search budget-related constants
+# most seconds that a solve (or uniqueness check) started by the game can run,
+# so a bad board never stalls the window or the puzzle pool (see
+# budget_class.py)
+SOLVE_TIME_LIMIT = 10
 
 # Padding-related constants
 BTN_PADDING = 5 # padding used between each button
@@ -123,3 +188,4 @@ DK_GRAY = (105,105,105)
 PROMPT_TEXT = "Please Choose A Difficulty:"
 ELAPSED_TIME_TEXT = "Elapsed Time:"
 TOTAL_TIME_TEXT = "Total Time:"
+WAITING_TEXT = "Making A New Board..."
@@ -0,0 +1,441 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   solver_class.py
+#
+# Description: This file contains the Sudoku solving engine. Instead of
+#              scanning the board for conflicts, the engine keeps a 9-bit mask
+#              of the digits used in every row, column, and subgrid, fills in
+#              naked and hidden singles (and rules out locked candidates when
+#              no singles are left), and then branches on the empty cell with
+#              the fewest remaining candidates. The search keeps its own
+#              stack instead of recursing, so it can be paused after any
+#              number of nodes, saved, and continued later. Boards of any size
+#              can be solved (see geometry_class.py), and the masks are as
+#              wide as the board has digits (25 bits for a 25x25 board).
+#
+################################################################################
+
+from settings import *
+import geometry_class as geo
+
+
+class Solver:
+
+    def __init__(self, size=BOARD_SIZE):
+        self.geometry = None # lookup tables of the loaded board's size
+        self.use_geometry(geo.geometry(size))
+        self.cells = [0] * self.geometry.cells # flattened values (0 = empty)
+        self.rows = [0] * size # digits used in each row
+        self.cols = [0] * size # digits used in each column
+        self.boxes = [0] * size # digits used in each subgrid
+        # cell indices in the order they were assigned, along with ~i for every
+        # time candidates were ruled out of cell i
+        self.trail = []
+        # digits ruled out of each cell by locked candidates (on top of the
+        # digits used in the cell's row, column, and subgrid)
+        self.excluded = [0] * self.geometry.cells
+        self.removed = [] # digits ruled out by each ~i entry on the trail
+        self.empty = [] # cells that were empty on the loaded board
+        # One entry for every branch point of the search, stored as
+        # [cell, candidates not tried yet, trail length before the node's
+        # singles were filled in, trail length after they were]
+        self.stack = []
+        self.found_mark = None # trail length of the last solution's node
+        self.exhausted = False # True once every branch has been tried
+        self.nodes = 0 # number of search nodes visited since the board loaded
+        self.backtracks = 0 # number of nodes that turned out to be dead ends
+        self.propagations = 0 # number of cells filled in by propagate
+        self.max_depth = 0 # most branch points on the stack at once
+        self.on_change = None # optional callback for every assign/unassign
+
+
+    #################### solve function ##################
+    # This function solves the provided board (a list of rows) in place. It
+    # returns True if a solution was found and False if the board contains
+    # conflicting values or can't be completed. The optional on_change callback
+    # is called with (row, col, value) each time a cell is assigned or reset,
+    # which lets the caller watch the search as it happens.
+    # With a budget (see budget_class.py), None is returned if the budget runs
+    # out before the search is done.
+    def solve(self, board, on_change=None, budget=None):
+        self.on_change = None
+        if not self.load(board):
+            return False
+        # only watch the search once the givens have been loaded
+        if on_change:
+            self.on_change = (lambda i, val:
+             self.write_cell(board, on_change, i, val))
+        solved = self.resume() if budget is None else budget.search(self)
+        self.on_change = None
+        if solved:
+            # copy the solution back into the provided board
+            for i, val in enumerate(self.cells):
+                board[self.row_of[i]][self.col_of[i]] = val
+        return solved
+
+
+    ################ use_geometry function ###############
+    # This function switches the engine over to the lookup tables of another
+    # board size. The tables are copied into attributes because they are read
+    # on every step of the search.
+    def use_geometry(self, geometry):
+        self.geometry = geometry
+        self.size = geometry.size
+        self.full_mask = geometry.full_mask
+        self.row_of = geometry.row_of
+        self.col_of = geometry.col_of
+        self.box_of = geometry.box_of
+        self.units = geometry.units
+        self.intersections = geometry.intersections
+        self.digit_of_bit = geometry.digit_of_bit
+        self.popcount = geometry.popcount
+
+
+    #################### load function ###################
+    # This function resets the engine and loads the given board (of any size)
+    # into the masks. It returns False if any of the given values conflict
+    # with each other.
+    def load(self, board):
+        if len(board) != self.size:
+            self.use_geometry(geo.geometry(len(board)))
+        size = self.size
+        box_of = self.box_of
+        self.cells = [0] * self.geometry.cells
+        self.rows = [0] * size
+        self.cols = [0] * size
+        self.boxes = [0] * size
+        self.trail = []
+        self.excluded = [0] * self.geometry.cells
+        self.removed = []
+        self.stack = []
+        self.found_mark = None
+        self.exhausted = False
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+        self.max_depth = 0
+        for r, row in enumerate(board):
+            for c, val in enumerate(row):
+                if val != 0:
+                    i = r * size + c
+                    bit = 1 << (val - 1)
+                    # the digit is already used in this row, column, or subgrid
+                    if (self.rows[r] | self.cols[c] |
+                     self.boxes[box_of[i]]) & bit:
+                        return False
+                    self.cells[i] = val
+                    self.rows[r] |= bit
+                    self.cols[c] |= bit
+                    self.boxes[box_of[i]] |= bit
+        self.empty = [i for i, val in enumerate(self.cells) if val == 0]
+        return True
+
+
+    ################# write_cell function ################
+    # This function mirrors a single assignment made by the engine onto the
+    # caller's board and notifies the caller's callback.
+    def write_cell(self, board, callback, i, val):
+        row, col = self.row_of[i], self.col_of[i]
+        board[row][col] = val
+        callback(row, col, val)
+
+
+    ################### assign function ##################
+    # This function places a digit (given as its bit) in the cell at index i
+    def assign(self, i, bit):
+        val = self.digit_of_bit[bit]
+        self.cells[i] = val
+        self.rows[self.row_of[i]] |= bit
+        self.cols[self.col_of[i]] |= bit
+        self.boxes[self.box_of[i]] |= bit
+        self.trail.append(i)
+        if self.on_change is not None:
+            self.on_change(i, val)
+
+
+    #################### undo function ###################
+    # This function resets every cell that was assigned (and gives back every
+    # candidate that was ruled out) after the given trail mark (this is how the
+    # engine backtracks).
+    def undo(self, mark):
+        trail = self.trail
+        while len(trail) > mark:
+            i = trail.pop()
+            if i < 0:
+                self.excluded[~i] &= ~self.removed.pop()
+                continue
+            bit = ~(1 << (self.cells[i] - 1))
+            self.cells[i] = 0
+            self.rows[self.row_of[i]] &= bit
+            self.cols[self.col_of[i]] &= bit
+            self.boxes[self.box_of[i]] &= bit
+            if self.on_change is not None:
+                self.on_change(i, 0)
+
+
+    ################ candidates function #################
+    # This function returns the mask of digits that can still go in cell i
+    def candidates(self, i):
+        return self.full_mask & ~(self.rows[self.row_of[i]] |
+         self.cols[self.col_of[i]] | self.boxes[self.box_of[i]] |
+         self.excluded[i])
+
+
+    ################# propagate function #################
+    # This function repeatedly fills in naked singles (cells with only one
+    # candidate) and hidden singles (digits that only fit one cell in a unit).
+    # Once neither is left, locked candidates are ruled out, which can uncover
+    # more singles. It returns False as soon as a contradiction is found.
+    def propagate(self):
+        # (the tables and masks are bound to locals because this is the
+        # engine's hot loop)
+        cells, rows, cols, boxes = self.cells, self.rows, self.cols, self.boxes
+        row_of, col_of, box_of = self.row_of, self.col_of, self.box_of
+        excluded = self.excluded
+        full = self.full_mask
+        changed = True
+        while changed:
+            changed = False
+            # naked singles
+            for i in self.empty:
+                if cells[i] == 0:
+                    cand = full & ~(rows[row_of[i]] | cols[col_of[i]] |
+                     boxes[box_of[i]] | excluded[i])
+                    if cand == 0:
+                        return False # no digit fits this cell
+                    if cand & (cand - 1) == 0:
+                        self.assign(i, cand)
+                        changed = True
+            # hidden singles
+            for unit in self.units:
+                placed = 0 # digits already placed in the unit
+                once = 0 # digits that fit at least one empty cell
+                twice = 0 # digits that fit at least two empty cells
+                for i in unit:
+                    if cells[i]:
+                        placed |= 1 << (cells[i] - 1)
+                    else:
+                        cand = full & ~(rows[row_of[i]] |
+                         cols[col_of[i]] | boxes[box_of[i]] | excluded[i])
+                        twice |= once & cand
+                        once |= cand
+                # some digit has nowhere left to go in this unit
+                if (placed | once) != full:
+                    return False
+                singles = once & ~twice
+                if singles:
+                    for i in unit:
+                        if cells[i] == 0:
+                            bit = self.candidates(i) & singles
+                            if bit:
+                                # two digits can only go in the same cell
+                                if bit & (bit - 1):
+                                    return False
+                                self.assign(i, bit)
+                                changed = True
+            if not changed:
+                changed = self.exclude_locked()
+        return True
+
+
+    ############### exclude_locked function ##############
+    # This function looks for locked candidates: a digit that can only go in
+    # the cells a subgrid shares with a row or column (in either one of them)
+    # can't go anywhere else in the other one, so it is ruled out of those
+    # cells. It returns True if any candidates were ruled out.
+    def exclude_locked(self):
+        cells, rows, cols, boxes = self.cells, self.rows, self.cols, self.boxes
+        row_of, col_of, box_of = self.row_of, self.col_of, self.box_of
+        excluded, trail, removed = self.excluded, self.trail, self.removed
+        full = self.full_mask
+        found = False
+        for shared, box_rest, line_rest in self.intersections:
+            inside = 0 # digits that fit the shared cells
+            for i in shared:
+                if cells[i] == 0:
+                    inside |= full & ~(rows[row_of[i]] | cols[col_of[i]] |
+                     boxes[box_of[i]] | excluded[i])
+            if not inside:
+                continue
+            rest_of_box = rest_of_line = 0
+            for i in box_rest:
+                if cells[i] == 0:
+                    rest_of_box |= full & ~(rows[row_of[i]] | cols[col_of[i]] |
+                     boxes[box_of[i]] | excluded[i])
+            for i in line_rest:
+                if cells[i] == 0:
+                    rest_of_line |= full & ~(rows[row_of[i]] |
+                     cols[col_of[i]] | boxes[box_of[i]] | excluded[i])
+            # pointing: digits only in the shared cells of the subgrid
+            # claiming: digits only in the shared cells of the row/col
+            for digits, rest, rest_cand in (
+             (inside & ~rest_of_box, line_rest, rest_of_line),
+             (inside & ~rest_of_line, box_rest, rest_of_box)):
+                if digits & rest_cand:
+                    for i in rest:
+                        if cells[i] == 0:
+                            bits = digits & ~(rows[row_of[i]] |
+                             cols[col_of[i]] | boxes[box_of[i]] | excluded[i])
+                            if bits:
+                                excluded[i] |= bits
+                                trail.append(~i)
+                                removed.append(bits)
+                                found = True
+        return found
+
+
+    ################### choose function ##################
+    # This function returns the empty cell with the fewest remaining
+    # candidates (minimum remaining values) along with its candidates, or
+    # (-1, 0) if every cell has been filled in
+    def choose(self):
+        cells, rows, cols, boxes = self.cells, self.rows, self.cols, self.boxes
+        row_of, col_of, box_of = self.row_of, self.col_of, self.box_of
+        excluded = self.excluded
+        full, popcount = self.full_mask, self.popcount
+        best = -1
+        best_cand = 0
+        best_count = self.size + 1
+        for i in self.empty:
+            if cells[i] == 0:
+                cand = full & ~(rows[row_of[i]] | cols[col_of[i]] |
+                 boxes[box_of[i]] | excluded[i])
+                count = popcount(cand)
+                if count < best_count:
+                    best, best_cand, best_count = i, cand, count
+                    if count == 2:
+                        break # a cell can't have fewer after propagation
+        return best, best_cand
+
+
+    ################### resume function ##################
+    # This function continues the search of the loaded board. Each node of
+    # the search propagates singles and then branches on the cell picked by
+    # choose, trying its candidates in turn (the branch points are kept on
+    # self.stack instead of the call stack). It returns True when a solution
+    # has been found (it is left in self.cells, and calling resume again
+    # continues on to the next solution), False once every branch has been
+    # tried, and None if max_nodes nodes were visited first, in which case
+    # the search can be continued later by calling resume again.
+    def resume(self, max_nodes=None):
+        if self.exhausted:
+            return False
+        if self.found_mark is not None:
+            # the search stopped at a solution, so move past it
+            self.undo(self.found_mark)
+            self.found_mark = None
+            if not self.next_branch():
+                return False
+        stack = self.stack
+        trail = self.trail
+        visited = 0
+        while max_nodes is None or visited < max_nodes:
+            visited += 1
+            mark = len(trail)
+            solvable = self.propagate()
+            # the statistics are only updated once per node, never inside of
+            # propagate, so keeping them costs nothing measurable
+            self.propagations += len(trail) - mark
+            if solvable:
+                best, best_cand = self.choose()
+                if best == -1:
+                    self.nodes += visited
+                    self.found_mark = mark
+                    return True # every cell has been filled in
+                stack.append([best, best_cand, mark, len(trail)])
+                if len(stack) > self.max_depth:
+                    self.max_depth = len(stack)
+            else:
+                self.backtracks += 1
+                self.undo(mark) # this node can't be solved
+            if not self.next_branch():
+                self.nodes += visited
+                return False
+        self.nodes += visited
+        return None
+
+
+    ################ next_branch function ################
+    # This function backtracks to the most recent branch point that still has
+    # an untried candidate and assigns that candidate. It returns False once
+    # every branch of the search has been tried.
+    def next_branch(self):
+        stack = self.stack
+        while stack:
+            frame = stack[-1]
+            self.undo(frame[3]) # reset the cell and anything after it
+            if frame[1]:
+                bit = frame[1] & -frame[1]
+                frame[1] ^= bit
+                self.assign(frame[0], bit)
+                return True
+            # every candidate failed, so this node can't be solved either
+            self.undo(frame[2])
+            stack.pop()
+        self.exhausted = True
+        return False
+
+
+    ################# checkpoint function ################
+    # This function returns a copy of the search's progress (e.g. to be
+    # pickled) that restore can continue from later, even in another process
+    def checkpoint(self):
+        return {"size": self.size, "cells": list(self.cells),
+         "trail": list(self.trail), "excluded": list(self.excluded),
+         "removed": list(self.removed), "empty": list(self.empty),
+         "stack": [list(f) for f in self.stack],
+         "found_mark": self.found_mark, "exhausted": self.exhausted,
+         "nodes": self.nodes, "backtracks": self.backtracks,
+         "propagations": self.propagations, "max_depth": self.max_depth}
+
+
+    ################## restore function ##################
+    # This function continues from a checkpoint (call resume afterwards)
+    def restore(self, checkpoint):
+        if checkpoint["size"] != self.size:
+            self.use_geometry(geo.geometry(checkpoint["size"]))
+        self.cells = list(checkpoint["cells"])
+        self.rows = [0] * self.size
+        self.cols = [0] * self.size
+        self.boxes = [0] * self.size
+        for i, val in enumerate(self.cells):
+            if val != 0:
+                bit = 1 << (val - 1)
+                self.rows[self.row_of[i]] |= bit
+                self.cols[self.col_of[i]] |= bit
+                self.boxes[self.box_of[i]] |= bit
+        self.trail = list(checkpoint["trail"])
+        self.excluded = list(checkpoint["excluded"])
+        self.removed = list(checkpoint["removed"])
+        self.empty = list(checkpoint["empty"])
+        self.stack = [list(f) for f in checkpoint["stack"]]
+        self.found_mark = checkpoint["found_mark"]
+        self.exhausted = checkpoint["exhausted"]
+        self.nodes = checkpoint["nodes"]
+        self.backtracks = checkpoint["backtracks"]
+        self.propagations = checkpoint["propagations"]
+        self.max_depth = checkpoint["max_depth"]
+
+
+    #################### count function ##################
+    # This function counts the solutions of the provided board without
+    # changing it. Counting stops as soon as the limit has been reached, so a
+    # limit of 2 is enough to tell whether a board has a unique solution.
+    # With a budget (see budget_class.py), None is returned if the budget runs
+    # out before the counting is done.
+    def count(self, board, limit=2, budget=None):
+        self.on_change = None
+        if not self.load(board):
+            return 0
+        found = 0
+        while found < limit:
+            result = self.resume() if budget is None else budget.search(self)
+            if result is None:
+                return None
+            if not result:
+                break
+            found += 1
+        return found
@@ -0,0 +1,105 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   stats_class.py
+#
+# Description: This file contains the solve statistics. A SolveStats object
+#              collects the search counters of every solve it is handed (nodes
+#              visited, dead ends backtracked out of, cells filled in by
+#              propagation, and the deepest branch point) along with the wall
+#              time spent in each phase of getting a board ready (fetch, parse,
+#              validate, and solve). The statistics can be read directly or
+#              written out as one JSON object per line. Callers that don't
+#              want statistics pass None instead of a SolveStats object, which
+#              skips the timing as well.
+#
+################################################################################
+
+import json
+import threading
+import time
+from settings import *
+
+
+# Phases that are timed, in the order they happen
+PHASES = ("fetch", "parse", "validate", "solve")
+
+# Lock shared by everything that appends to a statistics log, so lines
+# written from different threads don't get mixed together
+log_lock = threading.Lock()
+
+
+class SolveStats:
+
+    def __init__(self):
+        self.solves = 0 # number of searches that were added
+        self.nodes = 0 # search nodes visited
+        self.backtracks = 0 # nodes that turned out to be dead ends
+        self.propagations = 0 # cells filled in by propagation
+        self.max_depth = 0 # most branch points on the stack at once
+        self.phases = {} # seconds spent in each phase
+
+
+    ################# add_search function ################
+    # This function adds the counters of a finished search (a Solver from
+    # solver_class.py) to the statistics
+    def add_search(self, solver):
+        self.solves += 1
+        self.nodes += solver.nodes
+        self.backtracks += solver.backtracks
+        self.propagations += solver.propagations
+        self.max_depth = max(self.max_depth, solver.max_depth)
+
+
+    ################# add_phase function #################
+    # This function adds the time since began (a time.perf_counter() reading)
+    # to the given phase
+    def add_phase(self, phase, began):
+        self.phases[phase] = self.phases.get(phase, 0.0) + \
+         time.perf_counter() - began
+
+
+    ################## as_dict function ##################
+    # This function returns the statistics as a dictionary that can be turned
+    # into JSON. Phases that never ran are left out.
+    def as_dict(self):
+        phases = {phase: round(seconds, 6) for phase, seconds in
+         sorted(self.phases.items(), key=lambda item: phase_order(item[0]))}
+        return {"solves": self.solves, "nodes": self.nodes,
+         "backtracks": self.backtracks, "propagations": self.propagations,
+         "max_depth": self.max_depth, "phases": phases}
+
+
+    ################### to_json function #################
+    # This function returns the statistics as a single line of JSON, with any
+    # extra fields (e.g. the puzzle or its difficulty) added in front
+    def to_json(self, **fields):
+        record = dict(fields)
+        record.update(self.as_dict())
+        return json.dumps(record, separators=(",", ":"))
+
+
+    ################### write function ###################
+    # This function appends the statistics to a JSON-lines stream (an open
+    # text file) or, if a path is given instead, to the file at that path
+    def write(self, target, **fields):
+        line = self.to_json(**fields) + "\n"
+        with log_lock:
+            if isinstance(target, str):
+                with open(target, "a") as log:
+                    log.write(line)
+            else:
+                target.write(line)
+
+
+
+################ phase_order function ################
+# This function returns the sort key of a phase, so the known phases are listed
+# in the order they happen and any others are listed after them
+def phase_order(phase):
+    if phase in PHASES:
+        return (PHASES.index(phase), phase)
+    return (len(PHASES), phase)
+################################################################################
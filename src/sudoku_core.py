@@ -0,0 +1,281 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   sudoku_core.py
+#
+# Description: This file contains the board logic that doesn't depend on
+#              pygame (solving, validating, and counting the solutions of a
+#              Sudoku board). It only imports the settings and the solving
+#              engine, so it can be used by batch jobs and headless machines
+#              without opening a window. Boards can be any size (a list of N
+#              rows of N values); the size is taken from the board itself.
+#              Two solving engines can be used: "backtracking" (solver_class.py)
+#              and "dlx" (exact cover with dancing links, dlx_class.py). Every
+#              function takes an optional backend, and SOLVER_BACKEND in
+#              settings.py is used when none is given. The searches can also
+#              be limited by a budget (see budget_class.py), and precheck
+#              rules out most unsolvable boards without searching at all.
+#
+################################################################################
+
+import time, threading
+from settings import *
+import solver_class as slv
+import dlx_class as dlx
+import geometry_class as geo
+
+
+# Results reported by check_uniqueness
+UNIQUE = "unique" # the board has exactly one solution
+MULTIPLE = "multiple" # the board has more than one solution
+NO_SOLUTION = "none" # the board can't be solved (or its givens conflict)
+TIMED_OUT = "timeout" # the search's budget ran out before it was done
+
+# Solving engine classes by backend name
+BACKENDS = {"backtracking": slv.Solver, "dlx": dlx.DancingLinks}
+
+# Engines that have already been made in each thread, keyed by (backend, size).
+# An engine is reused for every board its thread solves, so its tables (and
+# the dancing links' node arrays) are only built once, while the functions in
+# this file can still be used from several threads at once.
+engines = threading.local()
+
+
+################################# PUBLIC API ###################################
+
+################### solve function ###################
+# This function solves the provided board (a list of rows) in place and
+# returns True if it was solved. The optional on_change callback is called
+# with (row, col, value) every time the engine changes a cell. If a
+# SolveStats object (see stats_class.py) is given, the search's counters and
+# the time it took are added to it as the solve phase. The backend picks the
+# solving engine (see BACKENDS). With a budget (a SearchBudget), None is
+# returned if the budget runs out before the board is solved.
+def solve(board, on_change=None, stats=None, backend=None, budget=None):
+    solver = engine(len(board), backend)
+    if stats is None:
+        return solver.solve(board, on_change, budget)
+    began = time.perf_counter()
+    solved = solver.solve(board, on_change, budget)
+    stats.add_phase("solve", began)
+    stats.add_search(solver)
+    return solved
+
+
+################# validate function ##################
+# This function returns True if none of the filled in cells on the board
+# conflict with each other, and False otherwise.
+def validate(board):
+    for row in range(len(board)):
+        for col in range(len(board)):
+            if conflict_detected(row, col, board[row][col], board):
+                return False
+    # no conflicts have been detected
+    return True
+
+
+################ solve_trace function ################
+# This function solves the provided board in place just like solve, and
+# appends every change that the engine makes to the board onto the given
+# trace (e.g. an array("I")), encoded by encode_step. The trace can be read
+# while it is still being filled (e.g. from another thread), which is how the
+# game replays a solve at its own speed.
+def solve_trace(board, trace, backend=None, budget=None):
+    append = trace.append
+    size = len(board)
+    return solve(board, lambda row, col, val:
+     append(encode_step(row, col, val, size)), backend=backend, budget=budget)
+
+
+################ encode_step function ################
+# This function packs a single change to a board of the given size (a cell and
+# its new value, where 0 means the cell was reset) into one integer
+def encode_step(row, col, val, size=BOARD_SIZE):
+    return (row * size + col) * (size + 1) + val
+
+
+################ decode_step function ################
+# This function unpacks a change made by encode_step into (row, col, value)
+def decode_step(step, size=BOARD_SIZE):
+    i, val = divmod(step, size + 1)
+    return i // size, i % size, val
+
+
+############## count_solutions function ##############
+# This function returns the number of solutions that the board has. It
+# stops counting once the limit has been reached (a limit of 2 is enough to
+# tell whether the board's solution is unique). The optional stats are
+# filled in the same way as for solve, under the validate phase. With a
+# budget, None is returned if the budget runs out before the counting is done.
+def count_solutions(board, limit=2, stats=None, backend=None, budget=None):
+    return count_search(board, limit, stats, backend, budget)[0]
+
+
+############# check_uniqueness function ##############
+# This function checks whether the board has a unique solution. The search
+# stops as soon as the limit (at least 2) has been reached, so a board with
+# many solutions is rejected just as quickly as one with two. It returns
+# (result, solutions, nodes), where result is UNIQUE, MULTIPLE, NO_SOLUTION,
+# or TIMED_OUT (when the budget runs out first, in which case solutions is
+# None), solutions is the number of solutions found (up to the limit), and
+# nodes is the number of search nodes that were visited. The optional stats
+# are filled in like count_solutions'.
+def check_uniqueness(board, limit=2, stats=None, backend=None, budget=None):
+    solutions, solver = count_search(board, max(limit, 2), stats, backend,
+     budget)
+    if solutions is None:
+        result = TIMED_OUT
+    elif solutions == 0:
+        result = NO_SOLUTION
+    elif solutions == 1:
+        result = UNIQUE
+    else:
+        result = MULTIPLE
+    return result, solutions, solver.nodes
+
+
+############### count_search function ################
+# This function counts the board's solutions (up to the limit) and returns
+# (solutions, solver), where solver is the engine that did the counting (its
+# counters are only valid until the thread's next search). The optional stats
+# are filled in like solve's, under the validate phase. Solutions is None if
+# the budget ran out before the counting was done.
+def count_search(board, limit, stats=None, backend=None, budget=None):
+    solver = engine(len(board), backend)
+    if stats is None:
+        return solver.count(board, limit, budget), solver
+    began = time.perf_counter()
+    solutions = solver.count(board, limit, budget)
+    stats.add_phase("validate", began)
+    stats.add_search(solver)
+    return solutions, solver
+
+
+################## precheck function #################
+# This function looks for a quick proof that the board can't be solved: its
+# givens conflict, or filling in the cells that only have one option (naked
+# and hidden singles, along with locked candidates) leaves a cell without any
+# candidates or a digit with nowhere to go in a row, column, or subgrid. It
+# returns False if the board was proved unsolvable, and True otherwise (which
+# doesn't mean the board can be solved, only that a search is needed to find
+# out). Most unsolvable boards are caught within microseconds, since the
+# contradiction shows up while the givens are loaded or soon after.
+def precheck(board):
+    solver = engine(len(board), "backtracking")
+    return solver.load(board) and solver.propagate()
+
+
+################### engine function ##################
+# This function returns the current thread's engine for the given backend
+# (SOLVER_BACKEND when it is None) and board size, making it the first time
+# it is asked for. It raises a ValueError for an unknown backend.
+def engine(size, backend=None):
+    key = (backend or SOLVER_BACKEND, size)
+    made = getattr(engines, "made", None)
+    if made is None:
+        made = engines.made = {}
+    found = made.get(key)
+    if found is None:
+        if key[0] not in BACKENDS:
+            raise ValueError("unknown solver backend: {}".format(key[0]))
+        found = made[key] = BACKENDS[key[0]](size)
+    return found
+
+
+############## candidate_masks function ##############
+# This function returns the candidates of every cell on the board as a list
+# of masks, one per cell (bit d - 1 is set if the digit d can go in the cell,
+# and filled in cells have no candidates). The digits used in each row,
+# column, and subgrid are gathered once, so this only takes two passes over
+# the board.
+def candidate_masks(board):
+    g = geo.geometry(len(board))
+    used = [0] * len(g.units) # digits used in each unit
+    values = [val for row in board for val in row]
+    for i, val in enumerate(values):
+        if val != 0:
+            for u in g.units_of[i]:
+                used[u] |= 1 << (val - 1)
+    masks = [0] * g.cells
+    for i, val in enumerate(values):
+        if val == 0:
+            row_unit, col_unit, box_unit = g.units_of[i]
+            masks[i] = g.full_mask & ~(used[row_unit] | used[col_unit] |
+             used[box_unit])
+    return masks
+
+
+############## candidate_mask function ###############
+# This function returns the candidates of a single cell as a mask (see
+# candidate_masks) by looking at the cell's peers
+def candidate_mask(board, row, col):
+    if board[row][col] != 0:
+        return 0
+    g = geo.geometry(len(board))
+    used = 0
+    for p in g.peers[row * g.size + col]:
+        val = board[g.row_of[p]][g.col_of[p]]
+        if val != 0:
+            used |= 1 << (val - 1)
+    return g.full_mask & ~used
+################################################################################
+
+
+
+############################## CONFLICT CHECKING ###############################
+
+################# check_row function #################
+# This function checks to see if there are any conflicting row values
+def check_row(row, col, value, board):
+    return check_unit(row, col, value, board, 0)
+
+
+################# check_col function #################
+# This function checks to see if there are any conflicting column values
+def check_col(row, col, value, board):
+    return check_unit(row, col, value, board, 1)
+
+
+############### check_subgrid function ###############
+# This function checks to see if there are any conflicting subgrid values
+def check_subgrid(row, col, value, board):
+    return check_unit(row, col, value, board, 2)
+
+
+################ check_unit function #################
+# This function checks to see if the value appears anywhere else in one of
+# the cell's units (0 = its row, 1 = its column, 2 = its subgrid), using the
+# precomputed unit tables in geometry_class.py
+def check_unit(row, col, value, board, unit):
+    # only non-zero values can conflict with each other
+    if value == 0:
+        return False
+    g = geo.geometry(len(board))
+    i = row * g.size + col
+    for p in g.units[g.units_of[i][unit]]:
+        # make sure to skip the index that is being checked against.
+        if p != i and board[g.row_of[p]][g.col_of[p]] == value:
+            return True
+    # no conflicting value detected, return False
+    return False
+
+
+############# conflict_detected function #############
+# This function checks to see if there are any conflicting values in the
+# surrounding row, column, or subgrid (the cell's peers). If there are any
+# conflicting values, the function returns True. If there aren't any
+# conflicting values, then the function returns False.
+def conflict_detected(row, col, value, board):
+    # only non-zero values can conflict with each other
+    if value == 0:
+        return False
+    g = geo.geometry(len(board))
+    row_of, col_of = g.row_of, g.col_of
+    for p in g.peers[row * g.size + col]:
+        if board[row_of[p]][col_of[p]] == value:
+            return True
+    # no conflicting value detected, return False
+    return False
+################################################################################
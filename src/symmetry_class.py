@@ -0,0 +1,268 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   symmetry_class.py
+#
+# Description: This file contains the symmetry index. Two puzzles are
+#              equivalent if one can be turned into the other by relabeling
+#              the digits, swapping rows within a band (or columns within a
+#              stack), swapping whole bands or stacks, or transposing the
+#              board. canonical_form picks the same representative for every
+#              puzzle in such a family (the smallest one, read row by row), so
+#              once any puzzle in a family has been solved, the solution to
+#              every other member can be found by transforming the stored
+#              solution instead of solving the puzzle again. Boards of any
+#              size can be used, although only 9x9 boards canonicalize quickly
+#              (the number of row and column orders grows very fast with the
+#              size of the subgrids).
+#
+################################################################################
+
+from itertools import permutations, product
+from settings import *
+import sudoku_core as core
+import geometry_class as geo
+
+
+# Most partial transformations followed at once when several of them tie for
+# the smallest board (only boards with very few givens come close to this)
+BEAM_LIMIT = 4096
+
+
+class SymmetryIndex:
+
+    def __init__(self, max_entries=SYMMETRY_MAX_ENTRIES):
+        self.max_entries = max_entries # most solutions kept in the index
+        # solution of every canonical puzzle seen so far (as strings)
+        self.solutions = {}
+        self.hits = 0 # puzzles answered from the index
+        self.misses = 0 # puzzles that had to be solved
+
+
+    ################## lookup function ###################
+    # This function returns the solution (a list of rows) of the given board if
+    # an equivalent board has already been stored, and None otherwise
+    def lookup(self, board):
+        text, transform = canonical_form(board)
+        solution = self.solutions.get(text)
+        if solution is None:
+            return None
+        return untransform_board(text_to_rows(solution), transform)
+
+
+    ################### store function ###################
+    # This function stores the solution of the given board under the board's
+    # canonical form
+    def store(self, board, solution):
+        text, transform = canonical_form(board)
+        if text not in self.solutions and len(self.solutions) >= \
+         self.max_entries:
+            # forget the oldest solution to make room
+            del self.solutions[next(iter(self.solutions))]
+        self.solutions[text] = rows_to_text(transform_board(solution,
+         transform))
+
+
+    ################### solve function ###################
+    # This function solves the provided board in place (just like
+    # sudoku_core.solve), using the stored solution of an equivalent board when
+    # there is one. It returns True if the board was solved. The optional stats
+    # are only filled in when the board actually has to be solved (by the
+    # given backend, within the optional budget). None is returned if the
+    # budget runs out first.
+    def solve(self, board, stats=None, backend=None, budget=None):
+        text, transform = canonical_form(board)
+        solution = self.solutions.get(text)
+        if solution is not None:
+            self.hits += 1
+            solution = untransform_board(text_to_rows(solution), transform)
+        else:
+            self.misses += 1
+            solution = [list(row) for row in board]
+            solved = core.solve(solution, stats=stats, backend=backend,
+             budget=budget)
+            if not solved:
+                return solved
+            if len(self.solutions) >= self.max_entries:
+                del self.solutions[next(iter(self.solutions))]
+            self.solutions[text] = rows_to_text(transform_board(solution,
+             transform))
+        for row in range(len(board)):
+            for col in range(len(board)):
+                board[row][col] = solution[row][col]
+        return True
+
+
+
+########################### CANONICAL FORM FUNCTIONS ###########################
+
+############# first_row_orders function ##############
+# This function returns every column order that moves the empty cells of the
+# given row as far to the left as possible (empty cells first within each
+# stack, and the stacks with the most empty cells first). Because digits are
+# relabeled in the order they are first seen, this is what makes the first
+# row of the board as small as it can be. It also returns that smallest
+# pattern (1 for a filled cell, 0 for an empty one) so rows can be compared.
+def first_row_orders(row):
+    width = geo.geometry(len(row)).box_width
+    stacks = [list(range(s * width, (s + 1) * width)) for s in
+     range(len(row) // width)]
+    empty = [[c for c in stack if row[c] == 0] for stack in stacks]
+    filled = [[c for c in stack if row[c] != 0] for stack in stacks]
+    # every way to order the columns inside of each stack
+    inside = [[list(e) + list(f) for e in permutations(empty[s]) for f in
+     permutations(filled[s])] for s in range(len(stacks))]
+    orders = []
+    pattern = None
+    for stack_order in permutations(range(len(stacks))):
+        counts = [len(empty[s]) for s in stack_order]
+        # stacks holding more empty cells have to come first
+        if counts != sorted(counts, reverse=True):
+            continue
+        if pattern is None:
+            pattern = tuple(bit for s in stack_order for bit in
+             [0] * len(empty[s]) + [1] * len(filled[s]))
+        for parts in product(*(inside[s] for s in stack_order)):
+            orders.append([c for part in parts for c in part])
+    return pattern, orders
+
+
+############### relabel_row function #################
+# This function reads a row in the given column order, relabeling the digits
+# in the order they are first seen. It returns the relabeled row along with
+# the relabeling (the one passed in is extended, not changed). If a bound is
+# given, None is returned as soon as the row is known to be larger than it,
+# which skips most of the work for rows that can't be the smallest.
+def relabel_row(row, col_order, relabel, bound=None):
+    labels = None
+    text = []
+    below = bound is None # True once the row is known to be below the bound
+    for index, c in enumerate(col_order):
+        val = row[c]
+        if val == 0:
+            label = 0
+        else:
+            label = (labels or relabel).get(val)
+            if label is None:
+                if labels is None:
+                    labels = dict(relabel)
+                label = len(labels) + 1
+                labels[val] = label
+        if not below:
+            if label > bound[index]:
+                return None, None
+            below = label < bound[index]
+        text.append(label)
+    return tuple(text), (labels or relabel)
+
+
+############## next_row_choices function #############
+# This function returns the rows that can come next on a board of the given
+# size, given the rows that have already been placed. The rows of a band have
+# to stay together, but the bands (and the rows inside of them) can come in any
+# order.
+def next_row_choices(placed, size):
+    height = geo.geometry(size).box_height
+    step = len(placed)
+    if step % height == 0:
+        # start a new band with any row from a band that hasn't been used
+        used = {r // height for r in placed}
+        return [r for r in range(size) if r // height not in used]
+    band = placed[step - step % height] // height
+    return [r for r in range(band * height, (band + 1) * height)
+     if r not in placed]
+
+
+############### canonical_form function ##############
+# This function returns the canonical form of the board (a string with one
+# character per cell) along with the transform that turns the board into it.
+# Every board in the same family of equivalent boards has the same canonical
+# form.
+def canonical_form(board):
+    rows = [list(row) for row in board]
+    size = len(rows)
+    grids = (rows, [list(col) for col in zip(*rows)])
+    # find the transforms that give the smallest first row
+    best = None
+    states = []
+    for transposed, grid in enumerate(grids):
+        for first in range(size):
+            pattern, orders = first_row_orders(grid[first])
+            if best is None or pattern < best:
+                best = pattern
+                states = []
+            if pattern == best:
+                for order in orders:
+                    relabel = relabel_row(grid[first], order, {})[1]
+                    states.append((transposed, [first], order, relabel))
+    # add the remaining rows one at a time, only following the transforms
+    # that keep the board read so far as small as possible
+    for step in range(1, size):
+        best = None
+        next_states = []
+        for transposed, placed, order, relabel in states:
+            grid = grids[transposed]
+            for row in next_row_choices(placed, size):
+                text, labels = relabel_row(grid[row], order, relabel, best)
+                if text is None:
+                    continue # larger than the smallest row found so far
+                if best is None or text < best:
+                    best = text
+                    next_states = []
+                if text == best and len(next_states) < BEAM_LIMIT:
+                    next_states.append((transposed, placed + [row], order,
+                     labels))
+        states = next_states
+    transposed, placed, order, relabel = states[0]
+    # digits that aren't on the board get the labels that are left over
+    relabel = dict(relabel)
+    for val in range(1, size + 1):
+        if val not in relabel:
+            relabel[val] = len(relabel) + 1
+    transform = (bool(transposed), placed, order,
+     [0] + [relabel[val] for val in range(1, size + 1)])
+    return rows_to_text(transform_board(rows, transform)), transform
+
+
+############### transform_board function #############
+# This function applies a transform (as returned by canonical_form) to a
+# board and returns the result as a list of rows
+def transform_board(board, transform):
+    transposed, row_order, col_order, relabel = transform
+    grid = [list(row) for row in board]
+    if transposed:
+        grid = [list(col) for col in zip(*grid)]
+    return [[relabel[grid[r][c]] for c in col_order] for r in row_order]
+
+
+############# untransform_board function #############
+# This function undoes a transform, turning a board in canonical form back
+# into the original board's layout and digits
+def untransform_board(board, transform):
+    transposed, row_order, col_order, relabel = transform
+    size = len(board)
+    unlabel = [0] * (size + 1)
+    for val, label in enumerate(relabel):
+        unlabel[label] = val
+    grid = [[0] * size for r in range(size)]
+    for r, source_row in enumerate(row_order):
+        for c, source_col in enumerate(col_order):
+            grid[source_row][source_col] = unlabel[board[r][c]]
+    if transposed:
+        grid = [list(col) for col in zip(*grid)]
+    return grid
+
+
+################ rows_to_text function ###############
+# This function converts a list of rows into a string (see geometry_class.py)
+def rows_to_text(rows):
+    return geo.board_text(rows)
+
+
+################ text_to_rows function ###############
+# This function converts a string made by rows_to_text back into a list of rows
+def text_to_rows(text):
+    return geo.text_to_rows(text)
+################################################################################
@@ -0,0 +1,150 @@
+################################ Sudoku Project ################################
+# Author:      Victor Espinoza
+# Created:     Mid-November / December 2021
+# Project:     Sudoku
+#
+# File Name:   websudoku_server.py
+#
+# Description: This file contains a local stand-in for websudoku.com. It
+#              serves pages in the same format as the website (one input per
+#              cell, with ids f00 through f88 and the givens filled in) made
+#              from the boards of a corpus (see the corpora folder), handing
+#              them out in turn. Connections are kept alive like the real
+#              website's. It can also slow its responses down (--delay) or
+#              answer every few requests with an error (--fail-every), so the
+#              fetcher's timeouts and retries (see fetch_class.py) can be
+#              tried out without a network connection. To play against it,
+#              set WEBSUDOKU_URL in settings.py to the address it prints.
+#
+#              Usage: python websudoku_server.py [--corpus easy]
+#                      [--host 127.0.0.1] [--port 8000] [--delay SECONDS]
+#                      [--fail-every N]
+#
+################################################################################
+
+import sys, time, argparse, itertools, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from settings import *
+import batch as bt
+
+
+DEFAULT_PORT = 8000 # port the server listens on
+
+
+class StandInServer(ThreadingHTTPServer):
+
+    daemon_threads = True # don't wait for open connections when stopping
+
+    def __init__(self, address, boards, delay=0, fail_every=0):
+        super().__init__(address, PageHandler)
+        self.boards = itertools.cycle(boards) # boards handed out in turn
+        self.delay = delay # seconds to wait before every response
+        # every fail_every-th request gets an error response (0 never fails)
+        self.fail_every = fail_every
+        self.requests = 0 # number of page requests received
+        self.lock = threading.Lock() # guards boards and requests
+
+
+    ################# next_page function #################
+    # This function returns the contents of the next page, or None if this
+    # request should fail
+    def next_page(self):
+        with self.lock:
+            self.requests += 1
+            if self.fail_every and self.requests % self.fail_every == 0:
+                return None
+            board = next(self.boards)
+        return make_page(board).encode()
+
+
+
+class PageHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1" # keeps connections alive between requests
+
+
+    ################### do_GET function ##################
+    # This function answers a request for a page (the level parameter is
+    # accepted but every level gets the same boards)
+    def do_GET(self):
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        page = self.server.next_page()
+        if page is None:
+            self.send_error(503, "Stand-in failure")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+
+    ################ log_message function ################
+    # This function keeps the requests from being logged to stderr
+    def log_message(self, format, *args):
+        pass
+
+
+
+############################### HELPER FUNCTIONS ###############################
+
+################# make_page function #################
+# This function returns a page in websudoku's format for the given 9x9 board
+# (givens are read-only inputs with a value, and the empty cells are blank
+# inputs)
+def make_page(board):
+    rows = []
+    for r, row in enumerate(board):
+        cells = []
+        for c, val in enumerate(row):
+            if val:
+                cells.append('<TD><INPUT CLASS=s0 SIZE=2 AUTOCOMPLETE=off '
+                 'ID=f{}{} VALUE="{}" READONLY></TD>'.format(r, c, val))
+            else:
+                cells.append('<TD><INPUT CLASS=d0 SIZE=2 AUTOCOMPLETE=off '
+                 'ID=f{}{} MAXLENGTH=1></TD>'.format(r, c))
+        rows.append("<TR>" + "".join(cells) + "</TR>")
+    return ('<HTML><BODY><FORM><TABLE ID="puzzle_grid">' + "".join(rows) +
+     "</TABLE></FORM></BODY></HTML>")
+
+
+################### main function ####################
+# This function parses the command-line arguments and serves pages until it
+# is interrupted
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve websudoku-style pages "
+     "made from a corpus of boards.")
+    parser.add_argument("--corpus", default="easy",
+     help="corpus the boards come from (a name from the corpora folder or "
+     "the path to a puzzle file, default: easy)")
+    parser.add_argument("--host", default="127.0.0.1",
+     help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+     help="port to listen on (default: {})".format(DEFAULT_PORT))
+    parser.add_argument("--delay", type=float, default=0,
+     help="seconds to wait before every response (default: 0)")
+    parser.add_argument("--fail-every", type=int, default=0,
+     help="answer every Nth request with an error (default: never)")
+    args = parser.parse_args(argv)
+    boards = [board for board in bt.load_corpus(args.corpus) if
+     len(board) == WEBSUDOKU_SIZE]
+    if not boards:
+        parser.error("the corpus doesn't have any {0}x{0} boards".format(
+         WEBSUDOKU_SIZE))
+    server = StandInServer((args.host, args.port), boards, args.delay,
+     args.fail_every)
+    sys.stderr.write("serving {} boards at http://{}:{}/\n".format(
+     len(boards), *server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+################################################################################